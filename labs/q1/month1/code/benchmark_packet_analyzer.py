@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+Lab 1: Packet Analyzer Benchmark
+Advanced AI in Cybersecurity and Digital Forensics Program
+
+This script generates deterministic synthetic PCAP files and measures
+the throughput, per-phase latency and peak memory use of the packet
+analyzer's analysis modes, reporting the results as JSON.
+
+Author: Manus AI
+Date: January 2026
+"""
+
+from packet_analyzer import (ANALYZERS, iter_frame_batches, iter_frames, iter_mapped_records,
+                             run_analyzers, run_analyzers_parallel)
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import struct
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Traffic mix: relative weight of each session type
+DEFAULT_MIX = {'http': 40, 'dns': 25, 'tcp': 15, 'icmp': 10, 'arp': 5, 'fragment': 5}
+DEFAULT_PACKETS = 200000
+DEFAULT_SEED = 1
+DEFAULT_CONCURRENCY = 64
+DEFAULT_REORDER_RATE = 0.05
+START_TIME = 1700000000.0
+MEAN_PACKET_GAP = 0.0001
+
+# Analysis modes: (registered analyzer names, engine, worker processes)
+MODES = {
+    'stats': (['stats'], 'fast', 1),
+    'stats-numpy': (['stats'], 'numpy', 1),
+    'stats-scapy': (['stats'], 'scapy', 1),
+    'sketch': (['sketch'], 'fast', 1),
+    'http': (['http'], 'fast', 1),
+    'dns': (['dns'], 'fast', 1),
+    'stats+http': (['stats', 'http'], 'fast', 1),
+    'flows': (['flows'], 'fast', 1),
+    'stats-parallel': (['stats'], 'fast', 0)
+}
+DEFAULT_MODES = ['stats', 'stats-numpy', 'sketch', 'http', 'dns', 'stats+http', 'flows']
+
+HTTP_HOSTS = ['www.example.com', 'api.example.org', 'cdn.example.net', 'intranet.corp.local']
+HTTP_PATHS = ['/', '/index.html', '/login', '/api/v1/items', '/static/app.js', '/images/logo.png']
+DNS_NAMES = ['www.example.com', 'mail.example.org', 'updates.vendor.net', 'time.example.com',
+             'xk2j9qz7w1.badcdn.info', 'login.microsoftonline.com']
+
+def ethernet(src_mac, dst_mac, ethertype, payload):
+    """Build an Ethernet II frame"""
+    return dst_mac + src_mac + struct.pack('!H', ethertype) + payload
+
+def ipv4(src, dst, proto, payload, ident=0, fragment=0x4000, total_length=None):
+    """
+    Build an IPv4 packet with a valid header checksum
+
+    Args:
+        src (bytes): Source address (4 bytes)
+        dst (bytes): Destination address (4 bytes)
+        proto (int): Protocol number
+        payload (bytes): Packet payload
+        ident (int): Identification field
+        fragment (int): Flags and fragment offset (default: don't fragment)
+        total_length (int): Total length field (default: from the payload)
+
+    Returns:
+        bytes: IPv4 packet
+    """
+    if total_length is None:
+        total_length = 20 + len(payload)
+    header = struct.pack('!BBHHHBBH4s4s', 0x45, 0, total_length, ident, fragment,
+                         64, proto, 0, src, dst)
+    total = sum(struct.unpack('!10H', header))
+    total = (total & 0xFFFF) + (total >> 16)
+    checksum = ~((total & 0xFFFF) + (total >> 16)) & 0xFFFF
+    return header[:10] + struct.pack('!H', checksum) + header[12:] + payload
+
+def tcp(sport, dport, seq, ack, flags, payload=b''):
+    """Build a TCP segment (checksum left zero)"""
+    return struct.pack('!HHIIBBHHH', sport, dport, seq & 0xFFFFFFFF, ack & 0xFFFFFFFF,
+                       5 << 4, flags, 65535, 0, 0) + payload
+
+def udp(sport, dport, payload):
+    """Build a UDP datagram (no checksum)"""
+    return struct.pack('!HHHH', sport, dport, 8 + len(payload), 0) + payload
+
+def dns_message(ident, name, response=False, nxdomain=False, address=b'\x00\x00\x00\x00'):
+    """
+    Build a DNS query or response for an A record
+
+    Args:
+        ident (int): Transaction ID
+        name (str): Queried domain name
+        response (bool): Build the response instead of the query
+        nxdomain (bool): Answer with NXDOMAIN and no records
+        address (bytes): Address returned in the answer
+
+    Returns:
+        bytes: DNS message
+    """
+    question = b''.join(bytes([len(label)]) + label.encode() for label in name.split('.'))
+    question += b'\x00' + struct.pack('!HH', 1, 1)
+    if not response:
+        return struct.pack('!HHHHHH', ident, 0x0100, 1, 0, 0, 0) + question
+    if nxdomain:
+        return struct.pack('!HHHHHH', ident, 0x8183, 1, 0, 0, 0) + question
+    answer = struct.pack('!HHHIH', 0xC00C, 1, 1, 300, 4) + address
+    return struct.pack('!HHHHHH', ident, 0x8180, 1, 1, 0, 0) + question + answer
+
+class TrafficGenerator:
+    """
+    Deterministic synthetic traffic
+
+    Sessions of each type in the mix are started at random and their
+    packets interleaved, as on a busy link. The same seed and settings
+    always produce the same bytes.
+    """
+
+    def __init__(self, seed=DEFAULT_SEED, mix=None, concurrency=DEFAULT_CONCURRENCY,
+                 reorder_rate=DEFAULT_REORDER_RATE):
+        """
+        Args:
+            seed (int): Random seed
+            mix (dict): Relative weight per session type ('http', 'dns',
+                'tcp', 'icmp', 'arp', 'fragment')
+            concurrency (int): Sessions interleaved at once
+            reorder_rate (float): Share of TCP sessions whose data segments
+                are sent out of order
+        """
+        self.rng = random.Random(seed)
+        self.mix = mix or DEFAULT_MIX
+        self.concurrency = concurrency
+        self.reorder_rate = reorder_rate
+        self.builders = {
+            'http': self._http_session,
+            'dns': self._dns_session,
+            'tcp': self._tcp_session,
+            'icmp': self._icmp_session,
+            'arp': self._arp_session,
+            'fragment': self._fragment_session
+        }
+        unknown = set(self.mix) - set(self.builders)
+        if unknown:
+            raise ValueError(f"Unknown traffic types: {', '.join(sorted(unknown))}")
+
+    def _host(self, network):
+        """Random address and MAC of a host in 10.<network>.0.0/16"""
+        host = self.rng.randrange(1, 65000)
+        address = bytes([10, network, host >> 8, host & 0xFF])
+        return address, b'\x02\x00' + address
+
+    def _tcp_exchange(self, client, server, dport, request_segments, response):
+        """Frames of a TCP connection carrying one request and its response"""
+        rng = self.rng
+        (caddr, cmac), (saddr, smac) = client, server
+        sport = rng.randrange(1024, 65536)
+        cseq, sseq = rng.getrandbits(32), rng.getrandbits(32)
+
+        def to_server(flags, payload=b''):
+            return ethernet(cmac, smac, 0x0800,
+                            ipv4(caddr, saddr, 6, tcp(sport, dport, cseq, sseq, flags, payload)))
+
+        def to_client(flags, payload=b''):
+            return ethernet(smac, cmac, 0x0800,
+                            ipv4(saddr, caddr, 6, tcp(dport, sport, sseq, cseq, flags, payload)))
+
+        frames = [to_server(0x02)]
+        cseq += 1
+        frames.append(to_client(0x12))
+        sseq += 1
+        frames.append(to_server(0x10))
+
+        data = []
+        for segment in request_segments:
+            data.append(to_server(0x18, segment))
+            cseq += len(segment)
+        if len(data) > 1 and rng.random() < self.reorder_rate:
+            data[0], data[1] = data[1], data[0]
+        frames += data
+        frames.append(to_client(0x10))
+        for start in range(0, len(response), 1460):
+            segment = response[start:start + 1460]
+            frames.append(to_client(0x18, segment))
+            sseq += len(segment)
+        frames.append(to_server(0x11))
+        cseq += 1
+        frames.append(to_client(0x11))
+        sseq += 1
+        frames.append(to_server(0x10))
+        return frames
+
+    def _http_session(self):
+        rng = self.rng
+        request = (f"GET {rng.choice(HTTP_PATHS)} HTTP/1.1\r\n"
+                   f"Host: {rng.choice(HTTP_HOSTS)}\r\n"
+                   f"User-Agent: Mozilla/5.0 (benchmark)\r\n"
+                   f"Accept: */*\r\n\r\n").encode()
+        split = rng.randrange(1, len(request))
+        body = bytes(rng.randrange(200, 4000))
+        response = (f"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+        return self._tcp_exchange(self._host(1), self._host(2), rng.choice([80, 8080]),
+                                  [request[:split], request[split:]], response)
+
+    def _tcp_session(self):
+        rng = self.rng
+        request = bytes(rng.randrange(20, 600))
+        response = bytes(rng.randrange(20, 3000))
+        return self._tcp_exchange(self._host(1), self._host(3), rng.choice([22, 443, 3306, 8443]),
+                                  [request[:10], request[10:]], response)
+
+    def _dns_session(self):
+        rng = self.rng
+        (caddr, cmac), (saddr, smac) = self._host(1), self._host(4)
+        sport = rng.randrange(1024, 65536)
+        ident = rng.getrandbits(16)
+        name = rng.choice(DNS_NAMES)
+        nxdomain = rng.random() < 0.1
+        query = dns_message(ident, name)
+        answer = dns_message(ident, name, response=True, nxdomain=nxdomain,
+                             address=bytes([93, 184, rng.randrange(256), rng.randrange(256)]))
+        return [ethernet(cmac, smac, 0x0800, ipv4(caddr, saddr, 17, udp(sport, 53, query))),
+                ethernet(smac, cmac, 0x0800, ipv4(saddr, caddr, 17, udp(53, sport, answer)))]
+
+    def _icmp_session(self):
+        rng = self.rng
+        (caddr, cmac), (saddr, smac) = self._host(1), self._host(5)
+        ident, payload = rng.getrandbits(16), bytes(56)
+        frames = []
+        for seq in range(rng.randrange(1, 5)):
+            request = struct.pack('!BBHHH', 8, 0, 0, ident, seq) + payload
+            reply = struct.pack('!BBHHH', 0, 0, 0, ident, seq) + payload
+            frames.append(ethernet(cmac, smac, 0x0800, ipv4(caddr, saddr, 1, request)))
+            frames.append(ethernet(smac, cmac, 0x0800, ipv4(saddr, caddr, 1, reply)))
+        return frames
+
+    def _arp_session(self):
+        (caddr, cmac), (saddr, smac) = self._host(1), self._host(1)
+        request = struct.pack('!HHBBH6s4s6s4s', 1, 0x0800, 6, 4, 1, cmac, caddr, bytes(6), saddr)
+        reply = struct.pack('!HHBBH6s4s6s4s', 1, 0x0800, 6, 4, 2, smac, saddr, cmac, caddr)
+        return [ethernet(cmac, b'\xff' * 6, 0x0806, request + bytes(18)),
+                ethernet(smac, cmac, 0x0806, reply + bytes(18))]
+
+    def _fragment_session(self):
+        """A large UDP datagram split into IPv4 fragments"""
+        rng = self.rng
+        (caddr, cmac), (saddr, smac) = self._host(1), self._host(6)
+        datagram = udp(rng.randrange(1024, 65536), 5000, bytes(rng.randrange(2000, 6000)))
+        ident = rng.getrandbits(16)
+        frames = []
+        for start in range(0, len(datagram), 1480):
+            chunk = datagram[start:start + 1480]
+            more = 0x2000 if start + 1480 < len(datagram) else 0
+            frames.append(ethernet(cmac, smac, 0x0800,
+                                   ipv4(caddr, saddr, 17, chunk, ident, more | (start // 8))))
+        return frames
+
+    def frames(self, count):
+        """
+        Generate interleaved frames
+
+        Args:
+            count (int): Number of frames
+
+        Yields:
+            tuple: (timestamp, frame bytes)
+        """
+        rng = self.rng
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        active = []
+        timestamp = START_TIME
+        for _ in range(count):
+            while len(active) < self.concurrency:
+                kind = rng.choices(kinds, weights)[0]
+                active.append(iter(self.builders[kind]()))
+            i = rng.randrange(len(active))
+            frame = next(active[i], None)
+            while frame is None:
+                active[i] = iter(self.builders[rng.choices(kinds, weights)[0]]())
+                frame = next(active[i])
+            timestamp += rng.expovariate(1 / MEAN_PACKET_GAP)
+            yield timestamp, frame
+
+def generate_pcap(path, packets=DEFAULT_PACKETS, seed=DEFAULT_SEED, mix=None,
+                  concurrency=DEFAULT_CONCURRENCY, reorder_rate=DEFAULT_REORDER_RATE):
+    """
+    Write a deterministic synthetic capture
+
+    Args:
+        path (str): Output PCAP file
+        packets (int): Number of packets
+        seed (int): Random seed
+        mix (dict): Relative weight per session type
+        concurrency (int): Sessions interleaved at once
+        reorder_rate (float): Share of TCP sessions sent out of order
+
+    Returns:
+        dict: Generator settings, file size and SHA-256 of the file
+    """
+    generator = TrafficGenerator(seed, mix, concurrency, reorder_rate)
+    start = time.perf_counter()
+    digest = hashlib.sha256()
+    with open(path, 'wb') as f:
+        header = struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1)
+        f.write(header)
+        digest.update(header)
+        for timestamp, frame in generator.frames(packets):
+            ts_sec = int(timestamp)
+            record = struct.pack('<IIII', ts_sec, int((timestamp - ts_sec) * 1e6),
+                                 len(frame), len(frame)) + frame
+            f.write(record)
+            digest.update(record)
+    return {
+        'path': path,
+        'packets': packets,
+        'seed': seed,
+        'mix': generator.mix,
+        'concurrency': concurrency,
+        'reorder_rate': reorder_rate,
+        'bytes': os.path.getsize(path),
+        'sha256': digest.hexdigest(),
+        'seconds': time.perf_counter() - start
+    }
+
+def _reset_peak_rss():
+    """
+    Reset this process's peak RSS to its current RSS (Linux)
+    
+    A process started by fork (which spawn also uses under the hood)
+    inherits its parent's high-water mark; writing 5 to clear_refs
+    resets VmHWM so that later readings only cover this process.
+    
+    Returns:
+        bool: True if the peak was reset
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_mb():
+    """
+    Peak resident set size of this process in MB (None if unknown)
+    
+    Reads VmHWM from /proc/self/status, which _reset_peak_rss() can reset.
+    Falls back to ru_maxrss, which also counts the parent's peak when
+    the process was forked, only where /proc is not available.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024  # kB
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def _worker_peak_rss_mb():
+    """
+    Peak resident set size of the largest finished worker in MB
+    
+    ru_maxrss of RUSAGE_CHILDREN covers the pool processes that this
+    process started and reaped; forked workers start from the RSS they
+    share with it. None where getrusage is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def measure_phases(pcap_file, engines=('fast',)):
+    """
+    Time each stage of the pipeline separately
+
+    'read' only walks the records, 'decode' also decodes every frame
+    with an engine (in batches for 'numpy'); the difference is the
+    decoding cost.
+
+    Args:
+        pcap_file (str): Path to PCAP file
+        engines (tuple): Decoding engines to time
+
+    Returns:
+        dict: Seconds and microseconds per packet for each phase
+    """
+    phases = {}
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_mapped_records(pcap_file))
+    phases['read'] = time.perf_counter() - start
+    for engine in engines:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if engine == 'numpy':
+                for _ in iter_frame_batches(pcap_file):
+                    pass
+            else:
+                for _ in iter_frames(pcap_file, engine, stream=True):
+                    pass
+        phases[f'decode_{engine}'] = time.perf_counter() - start
+    return {name: {'seconds': seconds, 'us_per_packet': seconds / count * 1e6 if count else None}
+            for name, seconds in phases.items()}
+
+def _run_mode(pcap_file, mode, conn):
+    """Run one analysis mode in a fresh process and send back its measurements"""
+    names, engine, workers = MODES[mode]
+    _reset_peak_rss()
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if workers != 1:
+            analyzers = run_analyzers_parallel(pcap_file, names, workers or None, engine=engine)
+            count = analyzers[0].total_packets
+        else:
+            analyzers = [ANALYZERS[name]() for name in names]
+            count = run_analyzers(pcap_file, analyzers, engine)
+    seconds = time.perf_counter() - start
+    conn.send({
+        'packets': count,
+        'seconds': seconds,
+        'packets_per_second': count / seconds if seconds else None,
+        'us_per_packet': seconds / count * 1e6 if count else None,
+        'baseline_rss_mb': baseline,
+        'peak_rss_mb': _peak_rss_mb(),
+        'worker_peak_rss_mb': _worker_peak_rss_mb() if workers != 1 else None
+    })
+    conn.close()
+
+def benchmark_mode(pcap_file, mode):
+    """
+    Measure one analysis mode in its own process
+
+    A fresh process per mode keeps peak memory figures independent;
+    the baseline is the peak after imports, before reading the capture.
+    peak_rss_mb only covers that process; for parallel modes the
+    largest worker's peak is reported as worker_peak_rss_mb.
+
+    Args:
+        pcap_file (str): Path to PCAP file
+        mode (str): Name from MODES
+
+    Returns:
+        dict: Packets, seconds, packets per second and baseline/peak RSS
+            (of the mode's process and, for parallel modes, its workers)
+    """
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_mode, args=(pcap_file, mode, sender))
+    process.start()
+    sender.close()
+    result = receiver.recv()
+    process.join()
+    return result
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Packet Analyzer Benchmark - Lab 1",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Generate a 200k-packet capture and benchmark the default modes
+  python benchmark_packet_analyzer.py
+
+  # Larger capture, custom traffic mix, JSON report to a file
+  python benchmark_packet_analyzer.py --packets 1000000 --mix http=60,dns=30,arp=10 \\
+      --output bench.json
+
+  # Benchmark an existing capture with selected modes
+  python benchmark_packet_analyzer.py --pcap capture.pcap --modes stats,stats-numpy,http
+
+  # Only generate the synthetic capture
+  python benchmark_packet_analyzer.py --generate-only --pcap synthetic.pcap
+        """
+    )
+
+    parser.add_argument('--pcap', metavar='FILE', default='benchmark.pcap',
+                       help='Capture to benchmark; generated unless it exists '
+                            '(default: benchmark.pcap)')
+    parser.add_argument('--regenerate', action='store_true',
+                       help='Generate the capture even if the file exists')
+    parser.add_argument('--generate-only', action='store_true',
+                       help='Generate the capture and exit')
+    parser.add_argument('--packets', type=int, default=DEFAULT_PACKETS,
+                       help=f'Packets to generate (default: {DEFAULT_PACKETS})')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                       help=f'Random seed (default: {DEFAULT_SEED})')
+    parser.add_argument('--mix',
+                       help='Traffic mix as type=weight pairs, e.g. http=40,dns=25,arp=5 '
+                            f'(types: {", ".join(DEFAULT_MIX)})')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                       help=f'Sessions interleaved at once (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--reorder-rate', type=float, default=DEFAULT_REORDER_RATE,
+                       help=f'Share of TCP sessions sent out of order (default: {DEFAULT_REORDER_RATE})')
+    parser.add_argument('--modes', default=','.join(DEFAULT_MODES),
+                       help=f'Comma-separated analysis modes (available: {", ".join(MODES)})')
+    parser.add_argument('--output', metavar='FILE',
+                       help='Write the JSON report to a file instead of stdout')
+
+    args = parser.parse_args()
+
+    mix = None
+    if args.mix:
+        try:
+            mix = {kind: float(weight) for kind, weight in
+                   (item.split('=') for item in args.mix.split(','))}
+        except ValueError:
+            parser.error(f"invalid --mix: {args.mix}")
+    modes = [mode for mode in args.modes.split(',') if mode]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(unknown)}")
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        }
+    }
+
+    if args.regenerate or args.generate_only or not os.path.exists(args.pcap):
+        print(f"[*] Generating {args.packets} packets: {args.pcap}", file=sys.stderr)
+        report['generator'] = generate_pcap(args.pcap, args.packets, args.seed, mix,
+                                            args.concurrency, args.reorder_rate)
+        if args.generate_only:
+            print(json.dumps(report['generator'], indent=2))
+            return
+    report['capture'] = {'path': args.pcap, 'bytes': os.path.getsize(args.pcap)}
+
+    print("[*] Timing pipeline phases", file=sys.stderr)
+    engines = ('fast', 'numpy') + (('scapy',) if 'stats-scapy' in modes else ())
+    report['phases'] = measure_phases(args.pcap, engines)
+
+    report['modes'] = {}
+    for mode in modes:
+        print(f"[*] Benchmarking mode: {mode}", file=sys.stderr)
+        report['modes'][mode] = benchmark_mode(args.pcap, mode)
+        print(f"[+] {mode}: {report['modes'][mode]['packets_per_second']:.0f} packets/s",
+              file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"[+] Results saved to: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
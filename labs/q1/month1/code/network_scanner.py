@@ -10,11 +10,86 @@ Author: Manus AI
 Date: January 2026
 """
 
-from scapy.all import ARP, Ether, srp, sr1, IP, TCP, ICMP
+from scapy.all import ARP, Ether, srp, sr1, IP, ICMP
 import argparse
+import asyncio
+import errno
+import heapq
+import ipaddress
+import json
+import math
+import random
+import socket
+import struct
 import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from collections import Counter, deque
 from datetime import datetime
 
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# TCP scanner engine: probes per second, probes awaiting a response,
+# seconds before an unanswered probe is retransmitted, retransmissions
+DEFAULT_SCAN_RATE = 1000
+DEFAULT_MAX_INFLIGHT = 2000
+DEFAULT_PROBE_TIMEOUT = 1.0
+DEFAULT_RETRIES = 2
+
+# Adaptive timeouts: range of the probe timeout derived from measured
+# round-trip times (nmap's defaults)
+MIN_RTT_TIMEOUT = 0.1
+MAX_RTT_TIMEOUT = 10.0
+
+# Sweeps: results flushed to the store at least this often (seconds),
+# and progress reported every this many results
+STORE_FLUSH_INTERVAL = 1.0
+SWEEP_PROGRESS_INTERVAL = 10000
+
+# Ping sweeps: echo requests per host, and echo payload size (as ping)
+DEFAULT_PING_COUNT = 3
+PING_PAYLOAD_SIZE = 56
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+# Sniffer: ring slots and bytes kept per frame, frames decoded per batch,
+# seconds between progress reports, talkers listed in the summary,
+# default capture duration
+DEFAULT_RING_SLOTS = 8192
+DEFAULT_SNIFF_SNAPLEN = 2048
+SNIFF_BATCH_SIZE = 256
+SNIFF_REPORT_INTERVAL = 5.0
+SNIFF_POLL_INTERVAL = 0.2
+DEFAULT_SNIFF_TOP = 5
+SNIFF_TIMEOUT = 30
+# AF_PACKET capture (linux/if_ether.h, linux/if_packet.h)
+ETH_P_ALL = 0x0003
+SOL_PACKET = 263
+PACKET_STATISTICS = 6
+
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
+SEQ_MASK = 0xFFFFFFFF
+# ICMP destination unreachable codes that mean a probe was filtered
+ICMP_FILTERED_CODES = frozenset([1, 2, 3, 9, 10, 13])
+
+# Connect scans: descriptors left for the rest of the process, and how
+# long to wait when the system runs out of descriptors or ports
+FD_RESERVE = 64
+RESOURCE_RETRY_DELAY = 0.05
+# Errors that mean the local system is out of resources (retry later)
+# and errors that mean the target cannot be reached (filtered)
+RESOURCE_ERRNOS = frozenset([errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM,
+                             errno.EADDRNOTAVAIL])
+UNREACHABLE_ERRNOS = frozenset([errno.EHOSTUNREACH, errno.ENETUNREACH, errno.EHOSTDOWN,
+                                errno.ENETDOWN, errno.EACCES, errno.EPERM])
+
 def print_banner():
     """Print a banner for the network scanner"""
     print("=" * 60)
@@ -23,33 +98,791 @@ def print_banner():
     print("=" * 60)
     print()
 
-def arp_scan(network):
+class TokenBucket:
+    """Token bucket rate limiter for asyncio tasks"""
+    
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate (float): Tokens per second (None or 0 for no limit)
+            burst (float): Bucket size (default: 10 ms worth of tokens)
+        """
+        self.rate = rate
+        self.capacity = burst or max(1.0, (rate or 0) / 100)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    async def take(self):
+        """Wait until a token is available and take it"""
+        if not self.rate:
+            await asyncio.sleep(0)  # Let responses be processed
+            return
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def _checksum(data):
+    """Internet checksum (RFC 1071)"""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total & 0xFFFF) + (total >> 16)
+    return ~((total & 0xFFFF) + (total >> 16)) & 0xFFFF
+
+def _source_address(target):
+    """Local address the kernel uses to reach a target (no packet is sent)"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.connect((target, 9))
+        return s.getsockname()[0]
+
+class RTTEstimator:
+    """
+    Smoothed round-trip time and variance of one target (RFC 6298)
+    
+    As in nmap, the probe timeout is srtt + 4 * rttvar, kept between
+    MIN_RTT_TIMEOUT and MAX_RTT_TIMEOUT and doubled for every
+    retransmission. Before the first sample the initial timeout is used.
+    """
+    
+    __slots__ = ('initial', 'srtt', 'rttvar', 'samples')
+    
+    def __init__(self, initial=DEFAULT_PROBE_TIMEOUT):
+        """
+        Args:
+            initial (float): Timeout in seconds before any RTT is measured
+        """
+        self.initial = initial
+        self.srtt = self.rttvar = None
+        self.samples = 0
+    
+    def update(self, rtt):
+        """
+        Add a round-trip time sample
+        
+        Only sample probes answered on their first transmission (Karn's
+        algorithm): a reply to a retransmitted probe is ambiguous.
+        
+        Args:
+            rtt (float): Measured round-trip time in seconds
+        """
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.samples += 1
+    
+    def timeout(self, tries=1):
+        """
+        Seconds to wait for a probe
+        
+        Args:
+            tries (int): Transmissions of the probe so far (1 for the first)
+        
+        Returns:
+            float: Timeout in seconds
+        """
+        if self.srtt is None:
+            base = self.initial
+        else:
+            base = min(max(self.srtt + 4 * self.rttvar, MIN_RTT_TIMEOUT), MAX_RTT_TIMEOUT)
+        return min(base * 2 ** (tries - 1), max(base, MAX_RTT_TIMEOUT))
+
+class RTTTable:
+    """
+    Per-target RTT estimates
+    
+    Targets that have not answered yet use the estimate over all
+    targets, as nmap does for a host group.
+    """
+    
+    def __init__(self, initial=DEFAULT_PROBE_TIMEOUT):
+        """
+        Args:
+            initial (float): Timeout in seconds before any RTT is measured
+        """
+        self.initial = initial
+        self.targets = {}
+        self.group = RTTEstimator(initial)
+    
+    def update(self, target, rtt):
+        """
+        Add a round-trip time sample for a target
+        
+        Args:
+            target (str): Target address
+            rtt (float): Measured round-trip time in seconds
+        """
+        estimator = self.targets.get(target)
+        if estimator is None:
+            estimator = self.targets[target] = RTTEstimator(self.initial)
+        estimator.update(rtt)
+        self.group.update(rtt)
+    
+    def timeout(self, target, tries=1):
+        """
+        Seconds to wait for a probe to a target
+        
+        Args:
+            target (str): Target address
+            tries (int): Transmissions of the probe so far
+        
+        Returns:
+            float: Timeout in seconds
+        """
+        return self.targets.get(target, self.group).timeout(tries)
+
+class _Probe:
+    """A probe awaiting its response"""
+    
+    __slots__ = ('sport', 'sent', 'deadline', 'tries')
+    
+    def __init__(self, sport):
+        self.sport = sport
+        self.sent = self.deadline = None
+        self.tries = 0
+
+class SynScanner:
+    """
+    Half-open (SYN) TCP scanner with many probes in flight
+    
+    SYN segments are built by hand and sent on a raw socket; responses
+    are read from the same socket (and a raw ICMP socket for
+    unreachables) and matched to their probe by (target, port, sequence
+    number). A SYN-ACK means open (the connection is reset right away),
+    a RST closed, and an ICMP unreachable or no answer after all
+    retransmissions filtered. Probe timeouts follow the measured RTT of
+    each target (see RTTTable). Requires root (CAP_NET_RAW).
+    """
+    
+    def __init__(self, rate=DEFAULT_SCAN_RATE, max_inflight=DEFAULT_MAX_INFLIGHT,
+                 timeout=DEFAULT_PROBE_TIMEOUT, retries=DEFAULT_RETRIES, rtt=None):
+        """
+        Open the raw sockets
+        
+        Args:
+            rate (float): Probes per second, retransmissions included
+                (None for no limit)
+            max_inflight (int): Maximum probes awaiting a response
+            timeout (float): Seconds to wait for a probe before the
+                target's RTT is known
+            retries (int): Retransmissions before a port is filtered
+            rtt (RTTTable): RTT estimates to use and update (default: new)
+        
+        Raises:
+            PermissionError: If raw sockets are not allowed
+        """
+        self.bucket = TokenBucket(rate)
+        self.max_inflight = max_inflight
+        self.timeout = timeout
+        self.retries = retries
+        self.rtt = rtt if rtt is not None else RTTTable(timeout)
+        self.tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP)
+        try:
+            self.icmp_socket = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        except OSError:
+            self.tcp_socket.close()
+            raise
+        for sock in (self.tcp_socket, self.icmp_socket):
+            sock.setblocking(False)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.sources = {}
+        self.pending = {}
+        self.results = {}
+        self.on_result = None
+    
+    def close(self):
+        """Close the raw sockets"""
+        self.tcp_socket.close()
+        self.icmp_socket.close()
+    
+    def _segment(self, src, dst, sport, dport, seq, ack, flags):
+        """Build a TCP segment with its checksum (the kernel adds the IP header)"""
+        header = struct.pack('!HHIIBBHHH', sport, dport, seq, ack, 5 << 4, flags, 65535, 0, 0)
+        pseudo = socket.inet_aton(src) + socket.inet_aton(dst) + struct.pack('!BBH', 0, 6, 20)
+        checksum = _checksum(pseudo + header)
+        return header[:16] + struct.pack('!H', checksum) + header[18:]
+    
+    def _send(self, key, probe):
+        dst, dport, seq = key
+        src = self.sources.get(dst)
+        if src is None:
+            src = self.sources[dst] = _source_address(dst)
+        try:
+            self.tcp_socket.sendto(self._segment(src, dst, probe.sport, dport, seq, 0, TCP_SYN),
+                                   (dst, 0))
+        except OSError as e:
+            # Send buffer full: handled like a lost probe
+            if not isinstance(e, BlockingIOError) and e.errno not in RESOURCE_ERRNOS:
+                raise
+        probe.tries += 1
+        probe.sent = time.monotonic()
+        probe.deadline = probe.sent + self.rtt.timeout(dst, probe.tries)
+    
+    def _finish(self, key, state, probe=None):
+        del self.pending[key]
+        host, port = key[0], key[1]
+        rtt = None
+        if probe is not None:
+            rtt = time.monotonic() - probe.sent
+            if probe.tries == 1:
+                self.rtt.update(host, rtt)
+        if self.on_result is not None:
+            self.on_result(host, port, state, rtt)
+        else:
+            self.results[(host, port)] = state
+    
+    def _on_tcp(self):
+        """Read every queued TCP segment and match it to a probe"""
+        while True:
+            try:
+                packet = self.tcp_socket.recv(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            ihl = (packet[0] & 0x0F) * 4
+            if len(packet) < ihl + 20:
+                continue
+            sport, dport, seq, ack, flags = struct.unpack_from('!HHIIxB', packet, ihl)
+            if not flags & (TCP_RST | TCP_ACK) or flags & TCP_SYN and not flags & TCP_ACK:
+                continue  # Our own SYNs (seen on loopback) and other traffic
+            src = socket.inet_ntoa(packet[12:16])
+            key = (src, sport, (ack - 1) & SEQ_MASK)
+            probe = self.pending.get(key)
+            if probe is None or probe.sport != dport:
+                continue
+            if flags & TCP_SYN:
+                # Open: reset the half-open connection right away
+                try:
+                    self.tcp_socket.sendto(self._segment(self.sources[src], src, dport, sport,
+                                                         ack, 0, TCP_RST), (src, 0))
+                except OSError:
+                    pass
+                self._finish(key, 'open', probe)
+            elif flags & TCP_RST:
+                self._finish(key, 'closed', probe)
+    
+    def _on_icmp(self):
+        """Read every queued ICMP message and match unreachables to a probe"""
+        while True:
+            try:
+                packet = self.icmp_socket.recv(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            ihl = (packet[0] & 0x0F) * 4
+            if len(packet) < ihl + 8 + 20 or packet[ihl] != 3:
+                continue
+            inner = ihl + 8
+            inner_ihl = (packet[inner] & 0x0F) * 4
+            if packet[inner + 9] != 6 or len(packet) < inner + inner_ihl + 8:
+                continue
+            sport, dport, seq = struct.unpack_from('!HHI', packet, inner + inner_ihl)
+            key = (socket.inet_ntoa(packet[inner + 16:inner + 20]), dport, seq)
+            probe = self.pending.get(key)
+            if probe is not None and probe.sport == sport and packet[ihl + 1] in ICMP_FILTERED_CODES:
+                self._finish(key, 'filtered', probe)
+    
+    async def scan(self, probes, on_result=None):
+        """
+        Probe (host, port) pairs
+        
+        Args:
+            probes: Iterable of (IPv4 address, port) pairs, probed in order
+            on_result (callable): Called as on_result(host, port, state,
+                rtt) as soon as each port's state is known (rtt is None for
+                ports that never answered), instead of collecting results
+        
+        Returns:
+            dict: 'open', 'closed' or 'filtered' per (host, port) (empty
+                when on_result is given)
+        """
+        loop = asyncio.get_running_loop()
+        self.results = {}
+        self.on_result = on_result
+        loop.add_reader(self.tcp_socket.fileno(), self._on_tcp)
+        loop.add_reader(self.icmp_socket.fileno(), self._on_icmp)
+        try:
+            await self._run(iter(probes))
+        finally:
+            loop.remove_reader(self.tcp_socket.fileno())
+            loop.remove_reader(self.icmp_socket.fileno())
+        return self.results
+    
+    async def _run(self, probes):
+        pending = self.pending
+        timeouts = []  # (deadline, key) heap; stale entries are skipped
+        retransmit = deque()
+        exhausted = False
+        while True:
+            now = time.monotonic()
+            while timeouts and timeouts[0][0] <= now:
+                deadline, key = heapq.heappop(timeouts)
+                probe = pending.get(key)
+                if probe is None or probe.deadline != deadline:
+                    continue  # Answered, or already retransmitted
+                if probe.tries > self.retries:
+                    self._finish(key, 'filtered')
+                else:
+                    retransmit.append(key)
+            
+            if retransmit:
+                key = retransmit.popleft()
+                if key not in pending:
+                    continue
+            elif not exhausted and len(pending) < self.max_inflight:
+                target = next(probes, None)
+                if target is None:
+                    exhausted = True
+                    continue
+                host, port = target
+                key = (host, port, random.getrandbits(32))
+                pending[key] = _Probe(random.randrange(1024, 65536))
+            elif pending:
+                await asyncio.sleep(max(0.0, min(timeouts[0][0] - now, 0.01)))
+                continue
+            else:
+                return
+            
+            await self.bucket.take()
+            probe = pending.get(key)
+            if probe is not None:
+                self._send(key, probe)
+                heapq.heappush(timeouts, (probe.deadline, key))
+
+class ConnectScanner:
+    """
+    TCP connect scanner on asyncio, for use without raw sockets
+    
+    Each probe is a full connection attempt through the operating
+    system: an accepted connection means open (it is closed right away),
+    a refusal closed, and a timeout after all retries filtered. Attempt
+    timeouts follow the measured RTT of each target (see RTTTable). Every
+    attempt holds a file descriptor, so concurrency is capped below the
+    descriptor limit; attempts that still run out of descriptors (or
+    local ports) wait and try again instead of counting as filtered.
+    """
+    
+    def __init__(self, rate=DEFAULT_SCAN_RATE, max_inflight=DEFAULT_MAX_INFLIGHT,
+                 timeout=DEFAULT_PROBE_TIMEOUT, retries=DEFAULT_RETRIES, rtt=None):
+        """
+        Args:
+            rate (float): Connection attempts per second (None for no limit)
+            max_inflight (int): Maximum concurrent connection attempts
+            timeout (float): Seconds before an attempt is abandoned, until
+                the target's RTT is known
+            retries (int): Further attempts before a port is filtered
+            rtt (RTTTable): RTT estimates to use and update (default: new)
+        """
+        self.bucket = TokenBucket(rate)
+        self.max_inflight = max(1, min(max_inflight, _descriptor_budget()))
+        self.timeout = timeout
+        self.retries = retries
+        self.rtt = rtt if rtt is not None else RTTTable(timeout)
+    
+    def close(self):
+        """Nothing to release (for symmetry with SynScanner)"""
+        pass
+    
+    async def _probe(self, host, port):
+        """Probe one port; returns (state, rtt)"""
+        attempts = 0
+        while attempts <= self.retries:
+            await self.bucket.take()
+            start = time.monotonic()
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host, port),
+                                                   self.rtt.timeout(host, attempts + 1))
+            except asyncio.TimeoutError:
+                attempts += 1
+                continue
+            except ConnectionRefusedError:
+                rtt = time.monotonic() - start
+                if attempts == 0:
+                    self.rtt.update(host, rtt)
+                return 'closed', rtt
+            except OSError as e:
+                if e.errno in RESOURCE_ERRNOS:
+                    # Out of descriptors or ports here, not an answer from the target
+                    await asyncio.sleep(RESOURCE_RETRY_DELAY)
+                    continue
+                if e.errno in UNREACHABLE_ERRNOS:
+                    return 'filtered', None
+                raise
+            rtt = time.monotonic() - start
+            if attempts == 0:
+                self.rtt.update(host, rtt)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return 'open', rtt
+        return 'filtered', None
+    
+    async def scan(self, probes, on_result=None):
+        """
+        Probe (host, port) pairs
+        
+        Args:
+            probes: Iterable of (host, port) pairs, probed in order
+            on_result (callable): Called as on_result(host, port, state,
+                rtt) as soon as each port's state is known, instead of
+                collecting results
+        
+        Returns:
+            dict: 'open', 'closed' or 'filtered' per (host, port) (empty
+                when on_result is given)
+        """
+        probes = iter(probes)
+        results = {}
+        
+        async def worker():
+            for host, port in probes:
+                state, rtt = await self._probe(host, port)
+                if on_result is not None:
+                    on_result(host, port, state, rtt)
+                else:
+                    results[(host, port)] = state
+        
+        await asyncio.gather(*(worker() for _ in range(self.max_inflight)))
+        return results
+
+def _descriptor_budget():
+    """File descriptors available for concurrent connections"""
+    if resource is None:
+        return DEFAULT_MAX_INFLIGHT
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return DEFAULT_MAX_INFLIGHT
+    return soft - FD_RESERVE
+
+def create_scanner(scan_type='syn', rate=DEFAULT_SCAN_RATE, max_inflight=DEFAULT_MAX_INFLIGHT,
+                   timeout=DEFAULT_PROBE_TIMEOUT, retries=DEFAULT_RETRIES, rtt=None):
+    """
+    Create a TCP scanner engine
+    
+    Args:
+        scan_type (str): 'syn' for a raw-socket SYN scan (falls back to a
+            connect scan without root), 'connect' for a connect scan
+        rate (float): Probes per second (None for no limit)
+        max_inflight (int): Maximum probes awaiting a response (connect
+            scans also stay below the open file limit)
+        timeout (float): Seconds to wait for each probe
+        retries (int): Retransmissions of unanswered probes
+        rtt (RTTTable): RTT estimates shared with other scans
+    
+    Returns:
+        SynScanner or ConnectScanner
+    """
+    if scan_type == 'syn':
+        try:
+            return SynScanner(rate, max_inflight, timeout, retries, rtt)
+        except PermissionError:
+            print("[-] Raw sockets need root privileges, using a connect scan")
+    return ConnectScanner(rate, max_inflight, timeout, retries, rtt)
+
+def parse_ports(value):
+    """
+    Parse a port list such as '22,80,8000-8100'
+    
+    Args:
+        value (str): Comma-separated ports and port ranges
+    
+    Returns:
+        list: Ports in the given order, without duplicates
+    """
+    ports = []
+    for part in value.split(','):
+        part = part.strip()
+        if '-' in part:
+            low, high = (int(p) for p in part.split('-', 1))
+            ports.extend(range(low, high + 1))
+        elif part:
+            ports.append(int(part))
+    if not all(0 < port < 65536 for port in ports):
+        raise ValueError(f"invalid port list: {value}")
+    return list(dict.fromkeys(ports))
+
+def parse_targets(value):
+    """
+    Parse a sweep target list such as '10.0.0.0/16,192.168.1.10-192.168.1.20'
+    
+    Items are IPv4 addresses, CIDR networks, address ranges, host names,
+    or @FILE to read one item per line ('#' starts a comment). The
+    network and broadcast addresses of CIDR networks larger than /31 are
+    left out; address ranges are taken exactly as given.
+    
+    Args:
+        value (str): Comma-separated targets
+    
+    Returns:
+        list: (first, last) inclusive integer address spans
+    """
+    spans = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if part.startswith('@'):
+            with open(part[1:]) as f:
+                lines = (line.split('#', 1)[0].strip() for line in f)
+                spans.extend(parse_targets(','.join(line for line in lines if line)))
+        elif '/' in part:
+            network = ipaddress.IPv4Network(part, strict=False)
+            first, last = int(network.network_address), int(network.broadcast_address)
+            if network.num_addresses > 2:
+                first, last = first + 1, last - 1  # Skip network and broadcast
+            spans.append((first, last))
+        elif '-' in part and part.replace('-', '').replace('.', '').isdigit():
+            first, last = (int(ipaddress.IPv4Address(a.strip())) for a in part.split('-', 1))
+            if last < first:
+                raise ValueError(f"invalid address range: {part}")
+            spans.append((first, last))
+        else:
+            address = int(ipaddress.IPv4Address(socket.gethostbyname(part)))
+            spans.append((address, address))
+    return spans
+
+class _HostIndex:
+    """Addresses of a list of address spans, numbered 0 to count - 1"""
+    
+    def __init__(self, spans):
+        self.starts = []
+        self.firsts = []
+        self.count = 0
+        for first, last in spans:
+            size = last - first + 1
+            self.starts.append(self.count)
+            self.firsts.append(first)
+            self.count += size
+    
+    def __getitem__(self, index):
+        i = bisect_right(self.starts, index) - 1
+        return str(ipaddress.IPv4Address(self.firsts[i] + index - self.starts[i]))
+
+def iter_sweep_probes(spans, ports, done=()):
+    """
+    Generate sweep probes interleaved across hosts
+    
+    Each port is probed on every host before the next port, and the hosts
+    are visited in a pseudo-random order (a stride coprime with the host
+    count), so consecutive probes rarely hit the same host or subnet and
+    no host sees more than one probe per pass. Memory stays constant
+    whatever the number of hosts.
+    
+    Args:
+        spans (list): Target address spans (see parse_targets)
+        ports (list): Ports to probe on every host
+        done (set): (host, port) pairs to skip, e.g. from a resumed sweep
+    
+    Yields:
+        tuple: (host, port)
+    """
+    hosts = _HostIndex(spans)
+    count = hosts.count
+    if count == 0:
+        return
+    stride = random.randrange(count // 2, count) | 1 if count > 2 else 1
+    while math.gcd(stride, count) != 1:
+        stride += 2
+    start = random.randrange(count)
+    for port in ports:
+        for i in range(count):
+            host = hosts[(start + i * stride) % count]
+            if (host, port) not in done:
+                yield host, port
+
+class ScanStore:
+    """
+    Resumable sweep results in a JSON Lines file
+    
+    Each result is appended as {"host", "port", "state", "rtt"} and
+    flushed at least every STORE_FLUSH_INTERVAL seconds. Reopening the file
+    loads the probes already done so that an interrupted sweep continues
+    where it stopped; a line cut short by a crash is ignored.
+    """
+    
+    def __init__(self, path):
+        """
+        Load previous results and open the file for appending
+        
+        Args:
+            path (str): Results file (None to keep results in memory only)
+        """
+        self.done = set()
+        self.states = Counter()
+        self.open_ports = {}
+        self.hosts_up = set()
+        self.loaded = 0
+        self.file = None
+        self.last_flush = time.monotonic()
+        if path is None:
+            return
+        try:
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self._record(record['host'], record['port'], record['state'])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except FileNotFoundError:
+            pass
+        self.loaded = len(self.done)
+        self.file = open(path, 'a+')
+        if self.file.tell() > 0:
+            self.file.seek(self.file.tell() - 1)
+            if self.file.read(1) != '\n':
+                self.file.write('\n')
+    
+    def _record(self, host, port, state):
+        self.done.add((host, port))
+        self.states[state] += 1
+        if state != 'filtered':
+            self.hosts_up.add(host)
+        if state == 'open':
+            self.open_ports.setdefault(host, []).append(port)
+    
+    def add(self, host, port, state, rtt=None):
+        """
+        Record the result of one probe
+        
+        Args:
+            host (str): Target address
+            port (int): Target port
+            state (str): 'open', 'closed' or 'filtered'
+            rtt (float): Round-trip time in seconds, if answered
+        """
+        self._record(host, port, state)
+        if self.file is not None:
+            self.file.write(json.dumps({
+                'host': host, 'port': port, 'state': state,
+                'rtt': None if rtt is None else round(rtt, 6)
+            }) + '\n')
+            now = time.monotonic()
+            if now - self.last_flush >= STORE_FLUSH_INTERVAL:
+                self.file.flush()
+                self.last_flush = now
+    
+    def close(self):
+        """Flush and close the results file"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+def sweep(targets, ports, results_file=None, scan_type='syn', rate=DEFAULT_SCAN_RATE,
+          max_inflight=DEFAULT_MAX_INFLIGHT, timeout=DEFAULT_PROBE_TIMEOUT,
+          retries=DEFAULT_RETRIES):
+    """
+    Scan ports across many hosts
+    
+    Probes are interleaved across hosts (see iter_sweep_probes) and share
+    one global rate limit; probe timeouts follow each host's measured RTT.
+    With a results file the sweep can be interrupted and resumed.
+    
+    Args:
+        targets (list): Target address spans (see parse_targets)
+        ports (list): Ports to scan on every host
+        results_file (str): JSON Lines file to store and resume results
+        scan_type (str): 'syn' (raw sockets, needs root) or 'connect'
+        rate (float): Probes per second across all hosts (None for no limit)
+        max_inflight (int): Maximum probes awaiting a response
+        timeout (float): Seconds to wait for a probe before a host's RTT
+            is known
+        retries (int): Retransmissions of unanswered probes
+    
+    Returns:
+        dict: Open ports per host
+    """
+    hosts = _HostIndex(targets).count
+    total = hosts * len(ports)
+    store = ScanStore(results_file)
+    print(f"[*] Sweeping {hosts} hosts x {len(ports)} ports ({total} probes)")
+    if store.loaded:
+        print(f"[*] Resuming: {store.loaded} probes already done in {results_file}")
+    scanner = create_scanner(scan_type, rate, max_inflight, timeout, retries, RTTTable(timeout))
+    kind = 'syn' if isinstance(scanner, SynScanner) else 'connect'
+    print(f"[*] {kind} scan, up to {scanner.max_inflight} in flight")
+    print()
+    
+    start = time.monotonic()
+    done = [0]
+    
+    def on_result(host, port, state, rtt):
+        store.add(host, port, state, rtt)
+        if state == 'open':
+            print(f"[+] {host}:{port} OPEN")
+        done[0] += 1
+        if done[0] % SWEEP_PROGRESS_INTERVAL == 0:
+            elapsed = time.monotonic() - start
+            print(f"[*] {len(store.done)}/{total} probes done, "
+                  f"{done[0] / elapsed:.0f} probes/s")
+    
+    try:
+        asyncio.run(scanner.scan(iter_sweep_probes(targets, ports, store.done), on_result))
+    except KeyboardInterrupt:
+        print()
+        print(f"[-] Interrupted after {len(store.done)}/{total} probes")
+        if results_file:
+            print(f"[*] Run the same command again to resume from {results_file}")
+    finally:
+        scanner.close()
+        store.close()
+    elapsed = time.monotonic() - start
+    
+    print()
+    print(f"[+] Sweep complete in {elapsed:.2f}s: {len(store.hosts_up)} hosts up, "
+          f"{store.states['open']} open ports "
+          f"({store.states['closed']} closed, {store.states['filtered']} filtered)")
+    for host in sorted(store.open_ports, key=ipaddress.IPv4Address):
+        ports_list = ', '.join(str(port) for port in sorted(store.open_ports[host]))
+        print(f"    {host}: {ports_list}")
+    return store.open_ports
+
+def arp_scan(network, timeout=DEFAULT_PROBE_TIMEOUT, retries=DEFAULT_RETRIES, rtt=None):
     """
     Perform ARP scan to discover hosts on the local network
     
+    The first round waits for the initial timeout; later rounds resend
+    only the unanswered requests and wait for a timeout derived from the
+    replies measured so far (see RTTEstimator).
+    
     Args:
         network (str): Network range in CIDR notation (e.g., '192.168.1.0/24')
+        timeout (float): Seconds to wait before any reply is measured
+        retries (int): Rounds of retransmission to unanswered addresses
+        rtt (RTTTable): RTT estimates to use and update (default: new)
     
     Returns:
         list: List of discovered hosts with IP and MAC addresses
     """
     print(f"[*] Scanning network: {network}")
     print("[*] Performing ARP scan...")
+    rtt = rtt if rtt is not None else RTTTable(timeout)
     
     # Create ARP request packet
     arp_request = ARP(pdst=network)
     broadcast = Ether(dst="ff:ff:ff:ff:ff:ff")
-    arp_request_broadcast = broadcast / arp_request
-    
-    # Send packet and receive responses
-    answered_list = srp(arp_request_broadcast, timeout=2, verbose=False)[0]
+    pending = broadcast / arp_request
     
+    # Send packets, then resend only the unanswered ones
     hosts = []
-    for sent, received in answered_list:
-        hosts.append({
-            'ip': received.psrc,
-            'mac': received.hwsrc
-        })
+    for tries in range(1, retries + 2):
+        answered_list, pending = srp(pending, timeout=rtt.group.timeout(tries), verbose=False)
+        for sent, received in answered_list:
+            if tries == 1:
+                rtt.update(received.psrc, received.time - sent.sent_time)
+            hosts.append({
+                'ip': received.psrc,
+                'mac': received.hwsrc
+            })
+        if not pending:
+            break
     
     print(f"[+] Found {len(hosts)} active hosts")
     print()
@@ -61,62 +894,89 @@ def arp_scan(network):
     
     return hosts
 
-def tcp_port_scan(target, ports):
+def tcp_port_scan(target, ports, scan_type='syn', rate=DEFAULT_SCAN_RATE,
+                  max_inflight=DEFAULT_MAX_INFLIGHT, timeout=DEFAULT_PROBE_TIMEOUT,
+                  retries=DEFAULT_RETRIES, rtt=None):
     """
     Perform TCP SYN scan on specified ports
     
+    All ports are probed concurrently (see SynScanner and ConnectScanner),
+    with timeouts adapted to the target's round-trip time.
+    
     Args:
-        target (str): Target IP address
+        target (str): Target IP address or host name
         ports (list): List of ports to scan
+        scan_type (str): 'syn' (raw sockets, needs root) or 'connect'
+        rate (float): Probes per second (None for no limit)
+        max_inflight (int): Maximum probes awaiting a response
+        timeout (float): Seconds to wait for a probe before the RTT is known
+        retries (int): Retransmissions of unanswered probes
+        rtt (RTTTable): RTT estimates to use and update (default: new)
     
     Returns:
-        dict: Dictionary of open ports and their states
+        list: Open ports
     """
     print(f"[*] Scanning {target} for open ports...")
-    print(f"[*] Ports to scan: {ports}")
+    address = socket.gethostbyname(target)
+    scanner = create_scanner(scan_type, rate, max_inflight, timeout, retries, rtt)
+    kind = 'syn' if isinstance(scanner, SynScanner) else 'connect'
+    print(f"[*] Ports to scan: {len(ports)} ({kind} scan, up to {scanner.max_inflight} in flight)")
     print()
     
-    open_ports = []
+    start = time.monotonic()
+    try:
+        results = asyncio.run(scanner.scan((address, port) for port in ports))
+    finally:
+        scanner.close()
+    elapsed = time.monotonic() - start
     
+    open_ports = []
+    filtered = 0
     for port in ports:
-        # Create SYN packet
-        syn_packet = IP(dst=target) / TCP(dport=port, flags="S")
-        
-        # Send packet and wait for response
-        response = sr1(syn_packet, timeout=1, verbose=False)
-        
-        if response is not None:
-            if response.haslayer(TCP):
-                if response[TCP].flags == 0x12:  # SYN-ACK
-                    open_ports.append(port)
-                    print(f"[+] Port {port}: OPEN")
-                    
-                    # Send RST to close connection
-                    rst_packet = IP(dst=target) / TCP(dport=port, flags="R")
-                    sr1(rst_packet, timeout=1, verbose=False)
-                elif response[TCP].flags == 0x14:  # RST-ACK
-                    print(f"[-] Port {port}: CLOSED")
+        state = results[(address, port)]
+        if state == 'open':
+            open_ports.append(port)
+            print(f"[+] Port {port}: OPEN")
+        elif state == 'closed':
+            print(f"[-] Port {port}: CLOSED")
         else:
-            print(f"[-] Port {port}: FILTERED/NO RESPONSE")
+            filtered += 1
+            if len(ports) <= 100:
+                print(f"[-] Port {port}: FILTERED/NO RESPONSE")
+    if filtered and len(ports) > 100:
+        print(f"[-] {filtered} ports FILTERED/NO RESPONSE")
     
     print()
-    print(f"[+] Scan complete. {len(open_ports)} open ports found.")
+    print(f"[+] Scan complete in {elapsed:.2f}s. {len(open_ports)} open ports found.")
     return open_ports
 
-def icmp_ping(target):
+def icmp_ping(target, timeout=DEFAULT_PROBE_TIMEOUT, retries=DEFAULT_RETRIES, rtt=None):
     """
     Perform ICMP ping to check if host is alive
     
+    An unanswered echo request is retransmitted with the timeout derived
+    from the target's RTT estimate, doubled on every retry.
+    
     Args:
         target (str): Target IP address
+        timeout (float): Seconds to wait before the target's RTT is known
+        retries (int): Retransmissions of an unanswered request
+        rtt (RTTTable): RTT estimates to use and update (default: new)
     
     Returns:
         bool: True if host is alive, False otherwise
     """
     print(f"[*] Pinging {target}...")
+    rtt = rtt if rtt is not None else RTTTable(timeout)
     
-    icmp_packet = IP(dst=target) / ICMP()
-    response = sr1(icmp_packet, timeout=2, verbose=False)
+    response = None
+    for tries in range(1, retries + 2):
+        icmp_packet = IP(dst=target) / ICMP(seq=tries)
+        response = sr1(icmp_packet, timeout=rtt.timeout(target, tries), verbose=False)
+        if response is not None:
+            if tries == 1:
+                rtt.update(target, response.time - icmp_packet.sent_time)
+            break
     
     if response is not None:
         print(f"[+] Host {target} is ALIVE")
@@ -125,38 +985,607 @@ def icmp_ping(target):
         print(f"[-] Host {target} is DOWN or not responding")
         return False
 
-def packet_sniffer(interface, count=10):
+class PingSweeper:
     """
-    Sniff packets on the specified interface
+    ICMP echo sweep over a raw socket on asyncio
+    
+    All echo requests are built before the first one is sent, then sent
+    in a burst paced by a token bucket while a single reader collects the
+    replies. Each host gets its own ICMP identifier and each request its
+    sequence number, so replies are matched by (address, id, seq). The
+    sweep then waits one timeout window (see RTTTable) rather than one
+    per host. Hosts that never replied get one more request per retry
+    round. Requires root (CAP_NET_RAW).
+    """
+    
+    def __init__(self, rate=DEFAULT_SCAN_RATE, timeout=DEFAULT_PROBE_TIMEOUT,
+                 retries=DEFAULT_RETRIES, rtt=None):
+        """
+        Open the raw socket
+        
+        Args:
+            rate (float): Echo requests per second (None for no limit)
+            timeout (float): Seconds to wait for replies before any RTT
+                is measured
+            retries (int): Extra rounds for hosts that never replied
+            rtt (RTTTable): RTT estimates to use and update (default: new)
+        
+        Raises:
+            PermissionError: If raw sockets are not allowed
+        """
+        self.bucket = TokenBucket(rate)
+        self.timeout = timeout
+        self.retries = retries
+        self.rtt = rtt if rtt is not None else RTTTable(timeout)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        self.socket.setblocking(False)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.ident = random.getrandbits(16)
+        self.pending = {}
+        self.rtts = {}
+        self.sent = {}
+    
+    def close(self):
+        """Close the raw socket"""
+        self.socket.close()
+    
+    def _request(self, ident, seq):
+        """Build an echo request with its checksum"""
+        payload = bytes(range(PING_PAYLOAD_SIZE))
+        header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+        return header[:2] + struct.pack('!H', _checksum(header + payload)) + header[4:] + payload
+    
+    def _on_reply(self):
+        """Read every queued ICMP message and match echo replies to a request"""
+        now = time.monotonic()
+        while True:
+            try:
+                packet = self.socket.recv(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            ihl = (packet[0] & 0x0F) * 4
+            # Our own requests also show up here on loopback: type 8
+            if len(packet) < ihl + 8 or packet[ihl] != ICMP_ECHO_REPLY:
+                continue
+            ident, seq = struct.unpack_from('!HH', packet, ihl + 4)
+            host = socket.inet_ntoa(packet[12:16])
+            request = self.pending.pop((host, ident, seq), None)
+            if request is None:
+                continue  # Duplicate, late, or another process's ping
+            sent, first = request
+            rtt = now - sent
+            self.rtts[host].append(rtt)
+            if first:
+                self.rtt.update(host, rtt)
+    
+    async def _send_round(self, requests):
+        """Send prebuilt (host, key, packet) requests and wait for replies"""
+        for host, key, packet in requests:
+            await self.bucket.take()
+            while True:
+                try:
+                    self.socket.sendto(packet, (host, 0))
+                except OSError as e:
+                    if isinstance(e, BlockingIOError) or e.errno in RESOURCE_ERRNOS:
+                        # Send buffer full here: wait instead of losing the request
+                        await asyncio.sleep(RESOURCE_RETRY_DELAY)
+                        continue
+                    if e.errno not in UNREACHABLE_ERRNOS:
+                        raise
+                break
+            self.pending[key] = (time.monotonic(), key[2] == 0)
+            self.sent[host] += 1
+        
+        # The window shrinks as replies arrive and the RTT estimate improves
+        last_sent = time.monotonic()
+        while self.pending:
+            remaining = last_sent + self.rtt.group.timeout() - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, 0.01))
+        self.pending.clear()
+    
+    async def sweep(self, hosts, count=DEFAULT_PING_COUNT):
+        """
+        Ping every host
+        
+        Args:
+            hosts (list): Host addresses
+            count (int): Echo requests per host
+        
+        Returns:
+            dict: Round-trip times in seconds per host (empty list for
+                hosts that never replied), and requests sent per host
+        """
+        hosts = list(dict.fromkeys(hosts))
+        idents = {host: (self.ident + i) & 0xFFFF for i, host in enumerate(hosts)}
+        for host in hosts:
+            self.rtts[host] = []
+            self.sent[host] = 0
+        
+        # Request seq of every host before seq + 1 of any, so that
+        # requests to one host are spread over the whole burst
+        requests = [(host, (host, idents[host], seq), self._request(idents[host], seq))
+                    for seq in range(count) for host in hosts]
+        
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self.socket.fileno(), self._on_reply)
+        try:
+            await self._send_round(requests)
+            for seq in range(count, count + self.retries):
+                silent = [host for host in hosts if not self.rtts[host]]
+                if not silent:
+                    break
+                await self._send_round([(host, (host, idents[host], seq), self._request(idents[host], seq))
+                                        for host in silent])
+        finally:
+            loop.remove_reader(self.socket.fileno())
+        return self.rtts, self.sent
+
+def ping_statistics(rtts, sent):
+    """
+    Summarise the replies of one host as ping does
     
     Args:
-        interface (str): Network interface to sniff on
-        count (int): Number of packets to capture
+        rtts (list): Round-trip times in seconds
+        sent (int): Echo requests sent
+    
+    Returns:
+        dict: sent, received, loss (percent), and min, avg, max and mdev
+            in milliseconds (None without replies)
     """
-    from scapy.all import sniff
+    stats = {'sent': sent, 'received': len(rtts),
+             'loss': 100.0 * (sent - len(rtts)) / sent if sent else 0.0,
+             'min': None, 'avg': None, 'max': None, 'mdev': None}
+    if rtts:
+        ms = [rtt * 1000 for rtt in rtts]
+        avg = sum(ms) / len(ms)
+        stats.update(min=min(ms), avg=avg, max=max(ms),
+                     mdev=math.sqrt(max(0.0, sum(x * x for x in ms) / len(ms) - avg * avg)))
+    return stats
+
+def ping_sweep(targets, count=DEFAULT_PING_COUNT, rate=DEFAULT_SCAN_RATE,
+               timeout=DEFAULT_PROBE_TIMEOUT, retries=DEFAULT_RETRIES, rtt=None):
+    """
+    Ping many hosts at once and report per-host RTT statistics
     
-    print(f"[*] Starting packet capture on {interface}")
-    print(f"[*] Capturing {count} packets...")
+    Args:
+        targets (list): Target address spans (see parse_targets)
+        count (int): Echo requests per host
+        rate (float): Echo requests per second (None for no limit)
+        timeout (float): Seconds to wait for replies before any RTT is measured
+        retries (int): Extra rounds for hosts that never replied
+        rtt (RTTTable): RTT estimates to use and update (default: new)
+    
+    Returns:
+        dict: ping_statistics() of every host that replied
+    """
+    index = _HostIndex(targets)
+    hosts = [index[i] for i in range(index.count)]
+    print(f"[*] Ping sweep of {len(hosts)} hosts, {count} echo requests each")
+    try:
+        sweeper = PingSweeper(rate, timeout, retries, rtt)
+    except PermissionError:
+        print("[-] Ping sweeps need root privileges for raw sockets")
+        return {}
+    
+    start = time.monotonic()
+    try:
+        rtts, sent = asyncio.run(sweeper.sweep(hosts, count))
+    finally:
+        sweeper.close()
+    elapsed = time.monotonic() - start
+    
+    alive = {host: ping_statistics(rtts[host], sent[host]) for host in hosts if rtts[host]}
     print()
+    if alive:
+        print("Host			Received	Loss	RTT min/avg/max/mdev (ms)")
+        print("-" * 80)
+    for host, stats in alive.items():
+        print(f"{host:<16}	{stats['received']}/{stats['sent']}		{stats['loss']:.0f}%	"
+              f"{stats['min']:.3f}/{stats['avg']:.3f}/{stats['max']:.3f}/{stats['mdev']:.3f}")
+    print()
+    print(f"[+] Ping sweep complete in {elapsed:.2f}s: {len(alive)}/{len(hosts)} hosts up")
+    return alive
+
+class FrameRing:
+    """
+    Preallocated single-producer, single-consumer ring of captured frames
+    
+    The capture thread receives each frame straight into the next free
+    slot and publishes it by advancing head; the decode thread reads
+    slots from tail and frees them by advancing tail. Nothing is
+    allocated per frame on the capture side. When every slot is in use
+    the frame is received into a scratch buffer and counted as dropped,
+    as a kernel ring would.
+    """
+    
+    def __init__(self, slots=DEFAULT_RING_SLOTS, snaplen=DEFAULT_SNIFF_SNAPLEN):
+        """
+        Args:
+            slots (int): Number of frames the ring holds
+            snaplen (int): Bytes kept per frame (longer frames are truncated)
+        """
+        self.slots = slots
+        self.snaplen = snaplen
+        self.buffer = bytearray(slots * snaplen)
+        view = memoryview(self.buffer)
+        self.slot_views = [view[i * snaplen:(i + 1) * snaplen] for i in range(slots)]
+        self.scratch = memoryview(bytearray(snaplen))
+        self.caplens = array('I', [0]) * slots
+        self.wirelens = array('I', [0]) * slots
+        self.timestamps = array('d', [0.0]) * slots
+        self.head = 0      # Frames written (only the capture thread changes it)
+        self.tail = 0      # Frames released (only the decode thread changes it)
+        self.dropped = 0   # Frames lost because the ring was full
+        self.closed = False
+        self.ready = threading.Event()
+    
+    def writable(self):
+        """
+        Buffer for the next frame (capture thread)
+        
+        Returns:
+            memoryview: Free slot, or None when the ring is full
+        """
+        if self.head - self.tail >= self.slots:
+            return None
+        return self.slot_views[self.head % self.slots]
+    
+    def commit(self, caplen, wirelen, timestamp):
+        """
+        Publish the frame written to the slot returned by writable()
+        
+        Args:
+            caplen (int): Bytes written to the slot
+            wirelen (int): Original length on the wire
+            timestamp (float): Capture timestamp
+        """
+        i = self.head % self.slots
+        self.caplens[i] = caplen
+        self.wirelens[i] = wirelen
+        self.timestamps[i] = timestamp
+        self.head += 1
+        if not self.ready.is_set():
+            self.ready.set()
+    
+    def close(self):
+        """Mark the end of the capture (capture thread)"""
+        self.closed = True
+        self.ready.set()
+    
+    def read(self, max_count, timeout=None):
+        """
+        Wait for published frames (decode thread)
+        
+        Args:
+            max_count (int): Maximum frames to return
+            timeout (float): Seconds to wait when the ring is empty
+        
+        Returns:
+            tuple: (first frame number, number of frames); the frames
+                stay valid until release()
+        """
+        if self.head == self.tail and not self.closed:
+            self.ready.clear()
+            if self.head == self.tail and not self.closed:
+                self.ready.wait(timeout)
+        return self.tail, min(self.head - self.tail, max_count)
+    
+    def frame(self, number):
+        """
+        Get a published frame
+        
+        Args:
+            number (int): Frame number from read()
+        
+        Returns:
+            tuple: (timestamp, wire length, frame view)
+        """
+        i = number % self.slots
+        return self.timestamps[i], self.wirelens[i], self.slot_views[i][:self.caplens[i]]
+    
+    def release(self, count):
+        """
+        Free frames returned by read() once they are decoded
+        
+        Args:
+            count (int): Number of frames to free
+        """
+        self.tail += count
+
+class InterfaceCapture:
+    """Live capture on a network interface through an AF_PACKET socket (Linux, root)"""
+    
+    def __init__(self, interface):
+        """
+        Open the capture socket
+        
+        Args:
+            interface (str): Network interface to capture on
+        
+        Raises:
+            PermissionError: If raw sockets are not allowed
+        """
+        from packet_analyzer import LINKTYPE_ETHERNET
+        self.name = interface
+        self.linktype = LINKTYPE_ETHERNET
+        self.socket = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        self.socket.bind((interface, 0))
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.socket.settimeout(SNIFF_POLL_INTERVAL)
+        self.kernel_dropped = 0
+    
+    def run(self, ring, count, stop):
+        """
+        Receive frames into the ring until stopped (capture thread)
+        
+        Args:
+            ring (FrameRing): Ring to fill
+            count (int): Frames to capture (0 for no limit)
+            stop (threading.Event): Set to stop the capture
+        """
+        recv_into = self.socket.recv_into
+        snaplen = ring.snaplen
+        try:
+            while not stop.is_set() and not (count and ring.head + ring.dropped >= count):
+                slot = ring.writable()
+                try:
+                    # MSG_TRUNC returns the full frame length even when truncated
+                    wirelen = recv_into(ring.scratch if slot is None else slot, snaplen,
+                                        socket.MSG_TRUNC)
+                except socket.timeout:
+                    continue
+                if slot is None:
+                    ring.dropped += 1
+                else:
+                    ring.commit(min(wirelen, snaplen), wirelen, time.time())
+        finally:
+            ring.close()
+    
+    def update_kernel_drops(self):
+        """
+        Add the frames the kernel dropped since the last call
+        
+        Returns:
+            int: Frames dropped by the kernel so far
+        """
+        _, drops = struct.unpack('II', self.socket.getsockopt(SOL_PACKET, PACKET_STATISTICS, 8))
+        self.kernel_dropped += drops
+        return self.kernel_dropped
+    
+    def close(self):
+        """Close the capture socket"""
+        self.socket.close()
+
+class PcapStreamCapture:
+    """
+    Capture replayed from a classic pcap file or stream
+    
+    Frames are read in capture order from a file, a pipe or standard
+    input, e.g. `packet_analyzer.py capture.pcap --replay | network_scanner.py
+    --sniff-pcap -`, which exercises the same ring and decode path as a
+    live interface.
+    """
+    
+    def __init__(self, source):
+        """
+        Open the stream and read its global header
+        
+        Args:
+            source (str): pcap file or FIFO, or '-' for standard input
+        
+        Raises:
+            ValueError: If the stream is not classic pcap
+        """
+        from packet_analyzer import PCAP_MAGIC
+        self.name = 'stdin' if source == '-' else source
+        # A reader of its own for stdin: the capture thread may still be
+        # blocked in it when the interpreter exits
+        self.file = open(sys.stdin.fileno() if source == '-' else source, 'rb',
+                         closefd=source != '-')
+        self.kernel_dropped = 0
+        header = self.file.read(24)
+        if len(header) < 24 or header[:4] not in PCAP_MAGIC:
+            self.close()
+            raise ValueError(f"Not a classic pcap stream: {source}")
+        endian, self.ts_scale = PCAP_MAGIC[header[:4]]
+        self.record_header = struct.Struct(endian + 'IIII')
+        self.linktype = struct.unpack_from(endian + 'I', header, 20)[0] & 0x0FFFFFFF
+    
+    def run(self, ring, count, stop):
+        """
+        Read records into the ring until the stream ends (capture thread)
+        
+        Args:
+            ring (FrameRing): Ring to fill
+            count (int): Frames to read (0 for all)
+            stop (threading.Event): Set to stop reading
+        """
+        readinto = self.file.readinto
+        header = bytearray(16)
+        unpack = self.record_header.unpack
+        ts_scale = self.ts_scale
+        snaplen = ring.snaplen
+        try:
+            while not stop.is_set() and not (count and ring.head + ring.dropped >= count):
+                if readinto(header) < 16:
+                    break
+                ts_sec, ts_frac, caplen, wirelen = unpack(header)
+                slot = ring.writable()
+                size = min(caplen, snaplen)
+                if readinto((ring.scratch if slot is None else slot)[:size]) < size:
+                    break  # Truncated final record
+                if caplen > size:
+                    self.file.read(caplen - size)
+                if slot is None:
+                    ring.dropped += 1
+                else:
+                    ring.commit(size, wirelen, ts_sec + ts_frac * ts_scale)
+        finally:
+            ring.close()
+    
+    def update_kernel_drops(self):
+        """Streams have no kernel buffer to overflow (for symmetry)"""
+        return 0
+    
+    def close(self):
+        """Close the stream"""
+        self.file.close()
+
+class SnifferStats:
+    """
+    Traffic summary built by the decode thread
+    
+    Frames are decoded from the ring in batches with packet_analyzer's
+    raw header decoder, and aggregated into bounded counters.
+    """
+    
+    def __init__(self, linktype, top=DEFAULT_SNIFF_TOP):
+        """
+        Args:
+            linktype (int): Link-layer header type of the capture
+            top (int): Talkers and conversations tracked (SpaceSaving capacity)
+        """
+        from packet_analyzer import SpaceSaving
+        self.linktype = linktype
+        self.top = top
+        self.packets = 0
+        self.bytes = 0
+        self.protocols = Counter()
+        self.talkers = SpaceSaving(top * 10)
+        self.conversations = SpaceSaving(top * 10)
+    
+    def process_batch(self, ring, start, count):
+        """
+        Decode and count a batch of frames from the ring
+        
+        Args:
+            ring (FrameRing): Ring holding the frames
+            start (int): First frame number
+            count (int): Number of frames
+        """
+        from packet_analyzer import decode_frame
+        protocols = self.protocols
+        for number in range(start, start + count):
+            timestamp, wirelen, frame = ring.frame(number)
+            info = decode_frame(self.linktype, frame, timestamp, wirelen)
+            self.bytes += wirelen
+            protocols[info.protocol or 'Other'] += 1
+            if info.src is not None:
+                self.talkers.add(info.src)
+                self.conversations.add((info.protocol or 'IP', info.src, info.sport or 0,
+                                        info.dst, info.dport or 0))
+        self.packets += count
+
+def _decode_frames(ring, stats, batch_size):
+    """Decode thread: drain the ring in batches until the capture ends"""
+    while True:
+        start, count = ring.read(batch_size, SNIFF_POLL_INTERVAL)
+        if count:
+            stats.process_batch(ring, start, count)
+            ring.release(count)
+        elif ring.closed and ring.head == ring.tail:
+            return
+
+def packet_sniffer(interface, count=10, timeout=SNIFF_TIMEOUT, pcap=None,
+                   slots=DEFAULT_RING_SLOTS, snaplen=DEFAULT_SNIFF_SNAPLEN,
+                   batch_size=SNIFF_BATCH_SIZE):
+    """
+    Sniff packets on the specified interface
+    
+    A capture thread only copies raw frames into a preallocated ring
+    (see FrameRing); a decode thread decodes and aggregates them in
+    batches. Progress and drop counters are printed periodically, and a
+    traffic summary at the end.
+    
+    Args:
+        interface (str): Network interface to sniff on (None with pcap)
+        count (int): Number of packets to capture (0 for no limit)
+        timeout (float): Seconds to capture for (None for no limit)
+        pcap (str): Read a classic pcap file or stream ('-' for standard
+            input) instead of an interface
+        slots (int): Frames the ring holds
+        snaplen (int): Bytes kept per frame
+        batch_size (int): Frames decoded per batch
+    
+    Returns:
+        dict: Counters: captured, decoded, ring_dropped, kernel_dropped,
+            bytes and protocols
+    """
+    if pcap is not None:
+        source = PcapStreamCapture(pcap)
+        print(f"[*] Reading packets from {source.name}")
+    else:
+        print(f"[*] Starting packet capture on {interface}")
+        try:
+            source = InterfaceCapture(interface)
+        except PermissionError:
+            print("[-] Packet capture needs root privileges")
+            return None
+    print(f"[*] Capturing {count or 'all'} packets "
+          f"(ring of {slots} x {snaplen} bytes, batches of {batch_size})...")
+    print()
+    
+    ring = FrameRing(slots, snaplen)
+    stats = SnifferStats(source.linktype)
+    stop = threading.Event()
+    capture = threading.Thread(target=source.run, args=(ring, count, stop), daemon=True)
+    decoder = threading.Thread(target=_decode_frames, args=(ring, stats, batch_size),
+                               daemon=True)
+    start = time.monotonic()
+    capture.start()
+    decoder.start()
+    try:
+        while decoder.is_alive():
+            decoder.join(SNIFF_REPORT_INTERVAL)
+            elapsed = time.monotonic() - start
+            if timeout is not None and elapsed >= timeout:
+                stop.set()
+            if decoder.is_alive():
+                print(f"[*] {elapsed:.0f}s: {ring.head + ring.dropped} captured, "
+                      f"{stats.packets} decoded, {ring.dropped} dropped (ring), "
+                      f"{source.update_kernel_drops()} dropped (kernel)")
+    except KeyboardInterrupt:
+        print()
+        print("[-] Interrupted")
+        stop.set()
+        decoder.join()
+    finally:
+        stop.set()
+        kernel_dropped = source.update_kernel_drops()
+        source.close()
+    elapsed = time.monotonic() - start
     
-    def packet_callback(packet):
-        if packet.haslayer(IP):
-            src_ip = packet[IP].src
-            dst_ip = packet[IP].dst
-            protocol = packet[IP].proto
-            
-            print(f"[+] Packet: {src_ip} -> {dst_ip} (Protocol: {protocol})")
-            
-            if packet.haslayer(TCP):
-                src_port = packet[TCP].sport
-                dst_port = packet[TCP].dport
-                print(f"    TCP: {src_port} -> {dst_port}")
-            elif packet.haslayer(ICMP):
-                print(f"    ICMP packet")
-    
-    packets = sniff(iface=interface, count=count, prn=packet_callback, timeout=30)
     print()
-    print(f"[+] Captured {len(packets)} packets")
+    print(f"[+] Captured {ring.head + ring.dropped} packets in {elapsed:.2f}s "
+          f"({stats.bytes} bytes decoded)")
+    print(f"[+] Dropped: {ring.dropped} (ring full), {kernel_dropped} (kernel)")
+    if stats.packets:
+        print()
+        print("Protocol\tPackets")
+        print("-" * 30)
+        for protocol, packets in stats.protocols.most_common():
+            print(f"{protocol}\t\t{packets}")
+        print()
+        print("Top talkers:")
+        for address, packets in stats.talkers.most_common(stats.top):
+            print(f"    {address}\t{packets} packets")
+        print("Top conversations:")
+        for (protocol, src, sport, dst, dport), packets in stats.conversations.most_common(stats.top):
+            if protocol not in ('TCP', 'UDP'):
+                print(f"    {protocol} {src} -> {dst}\t{packets} packets")
+            else:
+                print(f"    {protocol} {src}:{sport} -> {dst}:{dport}\t{packets} packets")
+    
+    return {
+        'captured': ring.head + ring.dropped,
+        'decoded': stats.packets,
+        'ring_dropped': ring.dropped,
+        'kernel_dropped': kernel_dropped,
+        'bytes': stats.bytes,
+        'protocols': dict(stats.protocols),
+    }
 
 def main():
     """Main function"""
@@ -171,11 +1600,26 @@ Examples:
   # TCP port scan
   python network_scanner.py --tcp-scan 192.168.1.1 --ports 80,443,22,21
   
+  # Fast SYN scan of the first 1024 ports, 5000 probes/s (requires root)
+  sudo python network_scanner.py --tcp-scan 192.168.1.1 --ports 1-1024 --rate 5000
+  
+  # Connect scan without raw sockets
+  python network_scanner.py --tcp-scan 127.0.0.1 --ports 1-65535 --scan-type connect
+  
+  # Resumable sweep of a /16 for a few ports (requires root)
+  sudo python network_scanner.py --sweep 10.0.0.0/16 --ports 22,80,443 --results sweep.jsonl
+  
   # ICMP ping
   python network_scanner.py --ping 192.168.1.1
   
+  # Ping sweep of a /24 in about one timeout window (requires root)
+  sudo python network_scanner.py --ping-sweep 192.168.1.0/24
+  
   # Packet sniffing (requires root/admin)
   sudo python network_scanner.py --sniff eth0 --count 20
+  
+  # Sniffer fed from a replayed capture instead of an interface
+  python packet_analyzer.py capture.pcap --replay | python network_scanner.py --sniff-pcap -
         """
     )
     
@@ -183,14 +1627,43 @@ Examples:
                        help='Perform ARP scan on network (e.g., 192.168.1.0/24)')
     parser.add_argument('--tcp-scan', metavar='TARGET', 
                        help='Perform TCP port scan on target IP')
+    parser.add_argument('--sweep', metavar='TARGETS',
+                       help='Scan many hosts: comma-separated addresses, CIDR networks, '
+                            'ranges (a.b.c.d-e.f.g.h), host names or @FILE')
+    parser.add_argument('--results', metavar='FILE',
+                       help='JSON Lines file storing sweep results; an interrupted '
+                            'sweep resumes from it')
     parser.add_argument('--ports', metavar='PORTS', default='80,443,22,21,25,53',
-                       help='Comma-separated list of ports to scan (default: 80,443,22,21,25,53)')
+                       help='Comma-separated list of ports and ranges to scan '
+                            '(default: 80,443,22,21,25,53)')
+    parser.add_argument('--scan-type', choices=['syn', 'connect'], default='syn',
+                       help='TCP scan type; syn needs root and falls back to connect '
+                            '(default: syn)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_SCAN_RATE,
+                       help=f'Probes per second, 0 for no limit (default: {DEFAULT_SCAN_RATE})')
+    parser.add_argument('--max-inflight', type=int, default=DEFAULT_MAX_INFLIGHT,
+                       help=f'Maximum probes awaiting a response (default: {DEFAULT_MAX_INFLIGHT})')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_PROBE_TIMEOUT,
+                       help='Seconds to wait for a probe until the target\'s round-trip '
+                            'time is measured; later timeouts adapt to it '
+                            f'(default: {DEFAULT_PROBE_TIMEOUT:g})')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                       help=f'Retransmissions of unanswered probes (default: {DEFAULT_RETRIES})')
     parser.add_argument('--ping', metavar='TARGET', 
                        help='Perform ICMP ping on target IP')
+    parser.add_argument('--ping-sweep', metavar='TARGETS',
+                       help='Ping many hosts at once (same target syntax as --sweep)')
+    parser.add_argument('--ping-count', type=int, default=DEFAULT_PING_COUNT,
+                       help=f'Echo requests per host in a ping sweep (default: {DEFAULT_PING_COUNT})')
     parser.add_argument('--sniff', metavar='INTERFACE', 
                        help='Sniff packets on specified interface')
-    parser.add_argument('--count', type=int, default=10, 
-                       help='Number of packets to capture (default: 10)')
+    parser.add_argument('--sniff-pcap', metavar='FILE',
+                       help='Run the sniffer on a classic pcap file or stream (- for stdin)')
+    parser.add_argument('--count', type=int, 
+                       help='Number of packets to capture, 0 for no limit '
+                            '(default: 10 with --sniff, all with --sniff-pcap)')
+    parser.add_argument('--ring-slots', type=int, default=DEFAULT_RING_SLOTS,
+                       help=f'Frames buffered between capture and decoding (default: {DEFAULT_RING_SLOTS})')
     
     args = parser.parse_args()
     
@@ -199,17 +1672,47 @@ Examples:
     print()
     
     if args.arp_scan:
-        arp_scan(args.arp_scan)
+        arp_scan(args.arp_scan, args.timeout, args.retries)
     
     elif args.tcp_scan:
-        ports = [int(p.strip()) for p in args.ports.split(',')]
-        tcp_port_scan(args.tcp_scan, ports)
+        try:
+            ports = parse_ports(args.ports)
+        except ValueError:
+            parser.error(f"invalid --ports: {args.ports}")
+        tcp_port_scan(args.tcp_scan, ports, args.scan_type, args.rate or None,
+                      args.max_inflight, args.timeout, args.retries)
+    
+    elif args.sweep:
+        try:
+            ports = parse_ports(args.ports)
+        except ValueError:
+            parser.error(f"invalid --ports: {args.ports}")
+        try:
+            targets = parse_targets(args.sweep)
+        except (ValueError, OSError) as e:
+            parser.error(f"invalid --sweep: {e}")
+        sweep(targets, ports, args.results, args.scan_type, args.rate or None,
+              args.max_inflight, args.timeout, args.retries)
     
     elif args.ping:
-        icmp_ping(args.ping)
+        icmp_ping(args.ping, args.timeout, args.retries)
+    
+    elif args.ping_sweep:
+        try:
+            targets = parse_targets(args.ping_sweep)
+        except (ValueError, OSError) as e:
+            parser.error(f"invalid --ping-sweep: {e}")
+        ping_sweep(targets, args.ping_count, args.rate or None, args.timeout, args.retries)
     
     elif args.sniff:
-        packet_sniffer(args.sniff, args.count)
+        packet_sniffer(args.sniff, 10 if args.count is None else args.count,
+                       slots=args.ring_slots)
+    
+    elif args.sniff_pcap:
+        try:
+            packet_sniffer(None, args.count or 0, None, args.sniff_pcap, args.ring_slots)
+        except (OSError, ValueError) as e:
+            parser.error(f"invalid --sniff-pcap: {e}")
     
     else:
         parser.print_help()
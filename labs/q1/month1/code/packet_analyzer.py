@@ -9,162 +9,3801 @@ Author: Manus AI
 Date: January 2026
 """
 
-from scapy.all import rdpcap, IP, TCP, UDP, ICMP, DNS, ARP
+import numpy as np
+from scapy.all import (rdpcap, PcapReader, RawPcapNgReader, conf,
+                       IP, IPv6, TCP, UDP, ICMP, DNS, ARP)
 import argparse
-from collections import Counter
+from datetime import datetime, timezone
+from bisect import bisect_left
+from collections import Counter, OrderedDict, deque
+from multiprocessing import Pool
+from operator import itemgetter
+from socket import AF_INET6, inet_aton, inet_ntoa, inet_ntop
+import hashlib
+import heapq
+import io
+import ipaddress
 import json
+import math
+import mmap
+import os
+import re
+import select
+import sqlite3
+import struct
+import sys
+import time
 
-def analyze_pcap(pcap_file):
+# Link-layer header types (see https://www.tcpdump.org/linktypes.html)
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+
+ETH_P_IP = 0x0800
+ETH_P_ARP = 0x0806
+ETH_P_IPV6 = 0x86DD
+VLAN_ETHERTYPES = (0x8100, 0x88A8)
+
+# Payloads that Scapy dissects further into IP/TCP/UDP (IP-in-IP, 6in4,
+# GRE, AH) and UDP ports it decodes as tunnels (GRE, L2TP, VXLAN). Frames
+# carrying them are handed to Scapy so the counters match its dissection.
+TUNNEL_IP_PROTOS = frozenset([4, 41, 47, 51])
+TUNNEL_UDP_PORTS = frozenset([1701, 4754, 4789, 4790, 6633, 8472, 48879])
+IPV6_EXTENSION_HEADERS = frozenset([0, 43, 44, 60])
+ICMP_FIXED_HEADER_TYPES = frozenset([0, 3, 4, 5, 8, 11, 12])
+
+PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e-6),
+    b'\xa1\xb2\xc3\xd4': ('>', 1e-6),
+    b'\x4d\x3c\xb2\xa1': ('<', 1e-9),
+    b'\xa1\xb2\x3c\x4d': ('>', 1e-9),
+}
+PCAPNG_MAGIC = b'\x0a\x0d\x0d\x0a'
+PCAPNG_BYTE_ORDER = {b'\x4d\x3c\x2b\x1a': '<', b'\x1a\x2b\x3c\x4d': '>'}
+PCAPNG_BLOCK_IDB = 1
+PCAPNG_BLOCK_PB = 2
+PCAPNG_BLOCK_SPB = 3
+PCAPNG_BLOCK_EPB = 6
+PCAPNG_OPTION_TSRESOL = 9
+PCAP_DEFAULT_SNAPLEN = 262144
+
+# Capture filters: IP protocol names, and protocols whose first four
+# header bytes are the source and destination ports
+FILTER_PROTOCOLS = {'icmp': 1, 'tcp': 6, 'udp': 17, 'icmp6': 58, 'sctp': 132}
+FILTER_PORT_PROTOCOLS = frozenset([6, 17, 132])
+
+# Parallel analysis: shard size and how many consecutive valid record
+# headers must follow an offset before it is accepted as a record boundary
+DEFAULT_CHUNK_SIZE = 256 * 1024 * 1024
+BOUNDARY_CHAIN_LENGTH = 16
+
+# TCP reassembly
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+SEQ_MASK = 0xFFFFFFFF
+SEQ_HALF = 0x80000000
+DEFAULT_MAX_FLOWS = 100000
+DEFAULT_FLOW_IDLE_TIMEOUT = 120.0
+DEFAULT_MAX_PENDING_BYTES = 256 * 1024
+
+# Flow records: long-lived flows are exported every active timeout (s);
+# without an output file only the largest records are kept in memory
+DEFAULT_FLOW_ACTIVE_TIMEOUT = 1800.0
+DEFAULT_MAX_FLOW_RECORDS = 1000
+
+# HTTP/1.x stream parsing
+HTTP_METHODS = (b'GET', b'POST', b'PUT', b'DELETE', b'HEAD', b'OPTIONS',
+                b'PATCH', b'CONNECT', b'TRACE')
+HTTP_START_TOKENS = tuple(method + b' ' for method in HTTP_METHODS) + (b'HTTP/1.',)
+HTTP_DETECT_BYTES = max(len(token) for token in HTTP_START_TOKENS)
+HTTP_MAX_HEADER_SIZE = 64 * 1024
+HTTP_HEAD_END = re.compile(b'\r\n\r\n')
+HTTP_LINE_END = re.compile(b'\r\n')
+HTTP_MAX_PENDING_REQUESTS = 100
+
+# DNS analytics: queries awaiting a response (bounded), seconds before a
+# query counts as unanswered, latency histogram bucket bounds (ms), and
+# labels long enough to have their Shannon entropy measured
+DNS_PORT = 53
+DEFAULT_DNS_MAX_PENDING = 100000
+DEFAULT_DNS_TIMEOUT = 5.0
+DNS_LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+DNS_LONG_LABEL = 16
+DNS_RCODES = {0: 'NOERROR', 1: 'FORMERR', 2: 'SERVFAIL', 3: 'NXDOMAIN',
+              4: 'NOTIMP', 5: 'REFUSED'}
+DNS_NXDOMAIN = 3
+
+# Sidecar index: bytes hashed at each end of the file, rows per insert batch
+INDEX_SUFFIX = '.idx'
+INDEX_HASH_BYTES = 1024 * 1024
+INDEX_BATCH_SIZE = 10000
+INDEX_SCHEMA_VERSION = 1
+
+# NumPy engine: frames decoded per batch
+DEFAULT_FRAME_BATCH_SIZE = 65536
+BATCH_PROTOCOLS = (None, 'TCP', 'UDP', 'ICMP', 'ARP')
+
+# Columnar export: rows per Parquet row group / Arrow record batch
+DEFAULT_EXPORT_BATCH_SIZE = 65536
+
+# Approximate mode: counters per top-N table and HyperLogLog index bits
+DEFAULT_SKETCH_CAPACITY = 1000
+DEFAULT_HLL_PRECISION = 14
+
+# Live mode: sliding window, bucket and snapshot periods (seconds), how
+# often an idle source is polled for new records, and bytes per read
+DEFAULT_WINDOW = 60.0
+DEFAULT_BUCKET = 5.0
+DEFAULT_SNAPSHOT_INTERVAL = 10.0
+DEFAULT_POLL_INTERVAL = 0.5
+FOLLOW_READ_SIZE = 64 * 1024
+
+class FrameInfo:
+    """Header fields decoded from a single captured frame"""
+    
+    __slots__ = ('timestamp', 'length', 'protocol', 'ip_src', 'ip_dst',
+                 'src', 'dst', 'sport', 'dport', 'seq', 'tcp_flags',
+                 'frame', 'payload_offset', 'payload_end')
+    
+    def __init__(self, timestamp=0.0, length=0):
+        self.timestamp = timestamp
+        self.length = length
+        self.protocol = None  # 'TCP', 'UDP', 'ICMP', 'ARP' or None
+        self.ip_src = None    # IPv4 source address
+        self.ip_dst = None    # IPv4 destination address
+        self.src = None       # IPv4 or IPv6 source address
+        self.dst = None       # IPv4 or IPv6 destination address
+        self.sport = None
+        self.dport = None
+        self.seq = None       # TCP sequence number
+        self.tcp_flags = 0
+        self.frame = None     # Buffer (bytes or memoryview) holding the transport payload
+        self.payload_offset = 0
+        self.payload_end = 0
+    
+    @property
+    def payload(self):
+        """TCP/UDP payload bytes, a view when frame is one (empty for other frames)"""
+        if self.frame is None:
+            return b''
+        return self.frame[self.payload_offset:self.payload_end]
+
+def _read_pcap_header(f, pcap_file):
+    """
+    Parse the global header of a classic pcap file
+    
+    Args:
+        f: File object positioned at the start of the file
+        pcap_file (str): Path to PCAP file (for error messages)
+    
+    Returns:
+        tuple: (record header Struct, timestamp scale, snaplen, link type)
+    """
+    header = f.read(24)
+    if len(header) < 24 or header[:4] not in PCAP_MAGIC:
+        raise ValueError(f"Not a pcap file: {pcap_file}")
+    endian, ts_scale = PCAP_MAGIC[header[:4]]
+    snaplen, linktype = struct.unpack(endian + 'II', header[16:24])
+    return struct.Struct(endian + 'IIII'), ts_scale, snaplen, linktype & 0x0FFFFFFF
+
+def iter_pcap_records(pcap_file, start=None, end=None):
+    """
+    Iterate over the raw records of a capture file without dissecting them
+    
+    Classic pcap files are parsed directly with struct. pcapng files are
+    read with Scapy's raw pcapng reader, which also returns undissected
+    bytes.
+    
+    Args:
+        pcap_file (str): Path to PCAP or PCAPNG file
+        start (int): Byte offset of the first record to read (pcap only,
+            must be a record boundary)
+        end (int): Stop before the record starting at or after this offset
+    
+    Yields:
+        tuple: (timestamp, wire length, link type, frame bytes)
+    """
+    with open(pcap_file, 'rb') as f:
+        if f.read(4) == PCAPNG_MAGIC:
+            f.seek(0)
+            for data, meta in RawPcapNgReader(f):
+                if meta.tshigh is None:
+                    timestamp = 0.0  # Simple packet blocks have no timestamp
+                else:
+                    timestamp = ((meta.tshigh << 32) | meta.tslow) / meta.tsresol
+                yield timestamp, meta.wirelen, meta.linktype, data
+            return
+        
+        f.seek(0)
+        record_header, ts_scale, _, linktype = _read_pcap_header(f, pcap_file)
+        offset = 24
+        if start is not None:
+            f.seek(start)
+            offset = start
+        if end is None:
+            end = float('inf')
+        
+        read = f.read
+        unpack = record_header.unpack
+        while offset < end:
+            data = read(16)
+            if len(data) < 16:
+                break
+            ts_sec, ts_frac, caplen, wirelen = unpack(data)
+            frame = read(caplen)
+            if len(frame) < caplen:
+                break  # Truncated final record
+            offset += 16 + caplen
+            yield ts_sec + ts_frac * ts_scale, wirelen, linktype, frame
+
+def iter_mapped_records(pcap_file, start=None, end=None):
+    """
+    Iterate over the records of a capture file through a memory map
+    
+    Same records as iter_pcap_records, but every frame is a memoryview
+    slice of the mapped file rather than a copy, so header decoding and
+    payload matching run directly on the page cache without allocating
+    a buffer per packet. pcap and pcapng are both parsed here. Frames
+    stay valid after iteration; the mapping is released with the last
+    view. Copy a frame (bytes(frame)) to keep it without the mapping.
+    
+    Args:
+        pcap_file (str): Path to PCAP or PCAPNG file (a regular file)
+        start (int): Byte offset of the first record to read (pcap only,
+            must be a record boundary)
+        end (int): Stop before the record starting at or after this offset
+    
+    Yields:
+        tuple: (timestamp, wire length, link type, frame memoryview)
+    """
+    with open(pcap_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < 24:
+            raise ValueError(f"Not a pcap file: {pcap_file}")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    size = len(view)
+    try:
+        if view[:4] == PCAPNG_MAGIC:
+            yield from _iter_mapped_pcapng(view, pcap_file)
+            return
+        
+        record_header, ts_scale, _, linktype = _read_pcap_header(io.BytesIO(view[:24]), pcap_file)
+        unpack_from = record_header.unpack_from
+        offset = 24 if start is None else start
+        end = size if end is None else min(end, size)
+        while offset < end and offset + 16 <= size:
+            ts_sec, ts_frac, caplen, wirelen = unpack_from(view, offset)
+            offset += 16
+            if offset + caplen > size:
+                break  # Truncated final record
+            yield ts_sec + ts_frac * ts_scale, wirelen, linktype, view[offset:offset + caplen]
+            offset += caplen
+    finally:
+        view.release()
+        try:
+            mapped.close()
+        except BufferError:
+            pass  # Frames are still referenced; closed when they are freed
+
+def _iter_mapped_pcapng(view, pcap_file):
+    """Parse pcapng blocks from a mapped file (timestamps as in RawPcapNgReader)"""
+    size = len(view)
+    unpack_from = struct.unpack_from
+    endian = '<'
+    interfaces = []  # (link type, snaplen, timestamp units per second)
+    offset = 0
+    while offset + 12 <= size:
+        if view[offset:offset + 4] == PCAPNG_MAGIC:
+            # Section header: sets the byte order and starts a new interface list
+            endian = PCAPNG_BYTE_ORDER.get(bytes(view[offset + 8:offset + 12]))
+            if endian is None:
+                raise ValueError(f"Bad pcapng byte-order magic: {pcap_file}")
+            interfaces = []
+        block_type, block_length = unpack_from(endian + 'II', view, offset)
+        block_end = offset + block_length - 4
+        if block_length < 12 or offset + block_length > size:
+            break  # Truncated or corrupt final block
+        body = offset + 8
+        
+        if block_type == PCAPNG_BLOCK_IDB and body + 8 <= block_end:
+            linktype, snaplen = unpack_from(endian + 'HxxI', view, body)
+            tsresol = 1000000
+            option = body + 8
+            while option + 4 <= block_end:
+                code, length = unpack_from(endian + 'HH', view, option)
+                if code == 0:
+                    break
+                if code == PCAPNG_OPTION_TSRESOL and length == 1:
+                    value = view[option + 4]
+                    tsresol = (2 if value & 0x80 else 10) ** (value & 0x7F)
+                option += 4 + length + (-length % 4)
+            interfaces.append((linktype, snaplen, tsresol))
+        elif block_type in (PCAPNG_BLOCK_EPB, PCAPNG_BLOCK_PB) and body + 20 <= block_end:
+            if block_type == PCAPNG_BLOCK_EPB:
+                intid, tshigh, tslow, caplen, wirelen = unpack_from(endian + '5I', view, body)
+            else:
+                intid, _, tshigh, tslow, caplen, wirelen = unpack_from(endian + 'HH4I', view, body)
+            if intid < len(interfaces):
+                linktype, _, tsresol = interfaces[intid]
+                data = body + 20
+                yield (((tshigh << 32) | tslow) / tsresol, wirelen, linktype,
+                       view[data:min(data + caplen, block_end)])
+        elif block_type == PCAPNG_BLOCK_SPB and body + 4 <= block_end and interfaces:
+            # Simple packets have no timestamp and belong to the first interface
+            wirelen, = unpack_from(endian + 'I', view, body)
+            linktype, snaplen, _ = interfaces[0]
+            caplen = min(wirelen, snaplen or wirelen, block_end - body - 4)
+            yield 0.0, wirelen, linktype, view[body + 4:body + 4 + caplen]
+        offset += block_length
+
+def split_pcap(pcap_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Split a capture file into byte ranges aligned to record boundaries
+    
+    Boundaries are found by seeking to each nominal split point and
+    scanning forward for an offset followed by a chain of plausible
+    record headers, so the file never has to be read sequentially.
+    run_analyzers_parallel() re-checks every boundary against where the
+    previous shard actually stopped. pcapng files are returned as a
+    single range.
+    
+    Args:
+        pcap_file (str): Path to PCAP or PCAPNG file
+        chunk_size (int): Approximate size of each range in bytes
+    
+    Returns:
+        list: (start, end) byte offsets; end is None for the last range
+    """
+    size = os.path.getsize(pcap_file)
+    with open(pcap_file, 'rb') as f:
+        if f.read(4) == PCAPNG_MAGIC:
+            return [(None, None)]
+        f.seek(0)
+        record_header, ts_scale, snaplen, _ = _read_pcap_header(f, pcap_file)
+        snaplen = snaplen or PCAP_DEFAULT_SNAPLEN
+        frac_limit = round(1 / ts_scale)
+        first_record = f.read(16)
+        if len(first_record) < 16:
+            return [(24, None)]
+        # Records a day older than the first one are treated as implausible
+        min_ts = record_header.unpack(first_record)[0] - 86400
+        
+        boundaries = [24]
+        target = 24 + chunk_size
+        while target < size:
+            offset = _find_record_boundary(f, target, size, record_header,
+                                           snaplen, frac_limit, min_ts)
+            if offset is None:
+                break
+            boundaries.append(offset)
+            target = offset + chunk_size
+    
+    ends = boundaries[1:] + [None]
+    return list(zip(boundaries, ends))
+
+def _find_record_boundary(f, target, size, record_header, snaplen, frac_limit, min_ts):
+    """Find the first record boundary at or after a byte offset"""
+    window = (BOUNDARY_CHAIN_LENGTH + 1) * (snaplen + 16)
+    f.seek(target)
+    buf = f.read(window)
+    at_eof = target + len(buf) >= size
+    unpack_from = record_header.unpack_from
+    
+    for candidate in range(min(len(buf), snaplen + 16)):
+        offset = candidate
+        prev_ts = None
+        valid = True
+        for _ in range(BOUNDARY_CHAIN_LENGTH):
+            if offset + 16 > len(buf):
+                # Running into the end of the file must land exactly on it
+                valid = not at_eof or offset == len(buf)
+                break
+            ts_sec, ts_frac, caplen, wirelen = unpack_from(buf, offset)
+            if (caplen > snaplen or caplen > wirelen or ts_frac >= frac_limit
+                    or ts_sec < min_ts
+                    or (prev_ts is not None and abs(ts_sec - prev_ts) > 86400)):
+                valid = False
+                break
+            prev_ts = ts_sec
+            offset += 16 + caplen
+        if valid:
+            return target + candidate
+    return None
+
+def follow_pcap_records(source, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Iterate over the records of a classic pcap stream as they are written
+    
+    A regular file is followed like `tail -f`: at the end of the file the
+    reader waits for the writer (e.g. `tcpdump -w`) to append more
+    records, until interrupted. A pipe or FIFO is read until the writer
+    closes it. While no complete record arrives, None is yielded every
+    poll_interval so the caller can keep time.
+    
+    Args:
+        source (str): Growing pcap file, FIFO, or '-' for standard input
+        poll_interval (float): Seconds to wait for more data
+    
+    Yields:
+        tuple: (timestamp, wire length, link type, frame bytes), or None
+            when the source is idle
+    """
+    if source == '-':
+        fd = sys.stdin.fileno()
+        follow = False
+    else:
+        fd = os.open(source, os.O_RDONLY)
+        follow = os.path.isfile(source)
+    
+    buf = bytearray()
+    record_header = None
+    try:
+        while True:
+            data = b''
+            if follow or select.select([fd], [], [], poll_interval)[0]:
+                data = os.read(fd, FOLLOW_READ_SIZE)
+                if not data and not follow:
+                    break  # The writer closed the pipe
+            if not data:
+                if follow:
+                    time.sleep(poll_interval)
+                yield None
+                continue
+            buf += data
+            
+            if record_header is None:
+                if len(buf) < 24:
+                    continue
+                if buf[:4] == PCAPNG_MAGIC:
+                    raise ValueError(f"Live input must be classic pcap (e.g. tcpdump -w): {source}")
+                record_header, ts_scale, _, linktype = _read_pcap_header(io.BytesIO(buf[:24]), source)
+                unpack_from = record_header.unpack_from
+                del buf[:24]
+            
+            pos, size = 0, len(buf)
+            while size - pos >= 16:
+                ts_sec, ts_frac, caplen, wirelen = unpack_from(buf, pos)
+                if size - pos - 16 < caplen:
+                    break
+                pos += 16
+                yield ts_sec + ts_frac * ts_scale, wirelen, linktype, bytes(buf[pos:pos + caplen])
+                pos += caplen
+            del buf[:pos]
+    finally:
+        if source != '-':
+            os.close(fd)
+
+def iter_interface_records(interface, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Iterate over the frames captured live on a network interface
+    
+    Requires root privileges.
+    
+    Args:
+        interface (str): Network interface to capture on
+        poll_interval (float): Seconds without frames before None is
+            yielded, so the caller can keep time
+    
+    Yields:
+        tuple: (timestamp, wire length, link type, frame bytes), or None
+            when the interface is idle
+    """
+    sock = conf.L2listen(iface=interface)
+    try:
+        while True:
+            if not select.select([sock], [], [], poll_interval)[0]:
+                yield None
+                continue
+            cls, frame, timestamp = sock.recv_raw()
+            if frame is None:
+                continue
+            linktype = conf.l2types.layer2num.get(cls, LINKTYPE_ETHERNET)
+            yield timestamp or time.time(), len(frame), linktype, frame
+    finally:
+        sock.close()
+
+def replay_pcap(pcap_file, output, rate=None, speed=None):
+    """
+    Write a capture to a stream as classic pcap at a controlled rate
+    
+    Used to test live mode by piping a known capture into it, e.g.
+    `packet_analyzer.py capture.pcap --replay --rate 1000 |
+    packet_analyzer.py - --follow`.
+    
+    Args:
+        pcap_file (str): Path to PCAP or PCAPNG file
+        output: Binary file object (e.g. a pipe)
+        rate (float): Packets per second (default: as fast as possible)
+        speed (float): Replay at this multiple of the original timing
+            instead (1.0 = real time)
+    
+    Returns:
+        int: Number of packets written
+    """
+    count = 0
+    start = time.monotonic()
+    first = None
+    for timestamp, length, linktype, frame in iter_mapped_records(pcap_file):
+        if first is None:
+            first = timestamp
+            output.write(struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0,
+                                     PCAP_DEFAULT_SNAPLEN, linktype))
+        if rate:
+            delay = count / rate
+        elif speed:
+            delay = (timestamp - first) / speed
+        else:
+            delay = 0
+        wait = start + delay - time.monotonic()
+        if wait > 0:
+            output.flush()
+            time.sleep(wait)
+        
+        ts_sec = int(timestamp)
+        ts_usec = min(round((timestamp - ts_sec) * 1e6), 999999)
+        output.write(struct.pack('<IIII', ts_sec, ts_usec, len(frame), length))
+        output.write(frame)
+        count += 1
+    output.flush()
+    return count
+
+def decode_frame(linktype, frame, timestamp=0.0, length=None):
+    """
+    Decode link, network and transport headers straight from raw bytes
+    
+    Handles Ethernet (with VLAN tags), Linux cooked and raw IP link types
+    carrying IPv4, IPv6, TCP, UDP, ICMP and ARP. Anything else (tunnels,
+    IPv6 extension headers, truncated headers, unknown link types) is
+    dissected with Scapy so the decoded fields always match the Scapy path.
+    
+    Args:
+        linktype (int): Link-layer header type of the capture
+        frame (bytes): Captured frame (or a memoryview of it, which the
+            returned payload then also refers to)
+        timestamp (float): Capture timestamp
+        length (int): Original length on the wire
+    
+    Returns:
+        FrameInfo: Decoded header fields
+    """
+    info = FrameInfo(timestamp, len(frame) if length is None else length)
+    size = len(frame)
+    
+    if linktype == LINKTYPE_ETHERNET or linktype == LINKTYPE_LINUX_SLL:
+        offset = 14 if linktype == LINKTYPE_ETHERNET else 16
+        if size < offset:
+            return _decode_with_scapy(linktype, frame, info)
+        ethertype = (frame[offset - 2] << 8) | frame[offset - 1]
+        while ethertype in VLAN_ETHERTYPES:
+            if size < offset + 4:
+                return _decode_with_scapy(linktype, frame, info)
+            ethertype = (frame[offset + 2] << 8) | frame[offset + 3]
+            offset += 4
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        if not size:
+            return _decode_with_scapy(linktype, frame, info)
+        offset = 0
+        version = frame[0] >> 4
+        if linktype == LINKTYPE_RAW and version not in (4, 6):
+            return _decode_with_scapy(linktype, frame, info)
+        ethertype = ETH_P_IPV6 if version == 6 and linktype != LINKTYPE_IPV4 else ETH_P_IP
+    else:
+        return _decode_with_scapy(linktype, frame, info)
+    
+    if ethertype == ETH_P_IP:
+        if size < offset + 20 or frame[offset] >> 4 != 4:
+            return _decode_with_scapy(linktype, frame, info)
+        ihl = (frame[offset] & 0x0F) * 4
+        if ihl < 20 or size < offset + ihl:
+            return _decode_with_scapy(linktype, frame, info)
+        total_length, frag = struct.unpack_from('!H2xH', frame, offset + 2)
+        proto = frame[offset + 9]
+        if proto in TUNNEL_IP_PROTOS:
+            return _decode_with_scapy(linktype, frame, info)
+        info.ip_src = info.src = inet_ntoa(frame[offset + 12:offset + 16])
+        info.ip_dst = info.dst = inet_ntoa(frame[offset + 16:offset + 20])
+        if frag & 0x1FFF:
+            return info  # Non-first fragments carry no transport header
+        end = offset + total_length if total_length >= ihl else size
+        offset += ihl
+    elif ethertype == ETH_P_IPV6:
+        if size < offset + 40 or frame[offset] >> 4 != 6:
+            return _decode_with_scapy(linktype, frame, info)
+        payload_length = (frame[offset + 4] << 8) | frame[offset + 5]
+        proto = frame[offset + 6]
+        if (not payload_length or proto in TUNNEL_IP_PROTOS
+                or proto in IPV6_EXTENSION_HEADERS):
+            return _decode_with_scapy(linktype, frame, info)
+        info.src = inet_ntop(AF_INET6, frame[offset + 8:offset + 24])
+        info.dst = inet_ntop(AF_INET6, frame[offset + 24:offset + 40])
+        offset += 40
+        end = offset + payload_length
+    elif ethertype == ETH_P_ARP:
+        # Only Ethernet/IPv4 ARP has a fixed layout
+        if size < offset + 28 or frame[offset + 4:offset + 6] != b'\x06\x04':
+            return _decode_with_scapy(linktype, frame, info)
+        info.protocol = 'ARP'
+        return info
+    else:
+        return _decode_with_scapy(linktype, frame, info)
+    
+    available = min(end, size) - offset
+    if proto == 6:
+        if available < 20:
+            return _decode_with_scapy(linktype, frame, info)
+        info.protocol = 'TCP'
+        info.sport, info.dport, info.seq = struct.unpack_from('!HHI', frame, offset)
+        # Nine flag bits (NS lives in the data offset byte), as in Scapy
+        info.tcp_flags = ((frame[offset + 12] & 1) << 8) | frame[offset + 13]
+        info.frame = frame
+        info.payload_offset = offset + max(20, (frame[offset + 12] >> 4) * 4)
+        info.payload_end = min(end, size)
+    elif proto == 17:
+        if available < 8:
+            return _decode_with_scapy(linktype, frame, info)
+        sport, dport, udp_length = struct.unpack_from('!HHH', frame, offset)
+        if (sport in TUNNEL_UDP_PORTS or dport in TUNNEL_UDP_PORTS
+                or udp_length < 8):
+            return _decode_with_scapy(linktype, frame, info)
+        info.protocol = 'UDP'
+        info.sport, info.dport = sport, dport
+        info.frame = frame
+        info.payload_offset = offset + 8
+        info.payload_end = min(end, size, offset + udp_length)
+    elif proto == 1 and ethertype == ETH_P_IP:
+        # Other ICMP types have type-specific header lengths
+        if available < 8 or frame[offset] not in ICMP_FIXED_HEADER_TYPES:
+            return _decode_with_scapy(linktype, frame, info)
+        info.protocol = 'ICMP'
+    return info
+
+def _decode_with_scapy(linktype, frame, info):
+    """Fill a FrameInfo by dissecting the frame with Scapy"""
+    frame = bytes(frame)
+    try:
+        packet = conf.l2types.get(linktype, conf.raw_layer)(frame)
+    except Exception:
+        # Same fallback as Scapy's pcap readers for undecodable frames
+        packet = conf.raw_layer(frame)
+    info.ip_src = info.ip_dst = info.sport = info.dport = info.protocol = None
+    info.src = info.dst = info.seq = info.frame = None
+    info.tcp_flags = 0
+    return _fill_frame_info(info, packet)
+
+def _fill_frame_info(info, packet):
+    """Fill a FrameInfo from a dissected Scapy packet"""
+    transport = None
+    if packet.haslayer(TCP):
+        info.protocol = 'TCP'
+        transport = packet[TCP]
+    elif packet.haslayer(UDP):
+        info.protocol = 'UDP'
+        transport = packet[UDP]
+    elif packet.haslayer(ICMP):
+        info.protocol = 'ICMP'
+    elif packet.haslayer(ARP):
+        info.protocol = 'ARP'
+    
+    if transport is not None:
+        info.sport = transport.sport
+        info.dport = transport.dport
+        info.frame = bytes(transport.payload)
+        info.payload_offset = 0
+        info.payload_end = len(info.frame)
+        padding = transport.getlayer(conf.padding_layer)
+        if padding is not None:
+            info.payload_end -= len(padding.load)
+        if info.protocol == 'TCP':
+            info.seq = transport.seq
+            info.tcp_flags = int(transport.flags)
+    
+    if packet.haslayer(IP):
+        info.ip_src = info.src = packet[IP].src
+        info.ip_dst = info.dst = packet[IP].dst
+    elif packet.haslayer(IPv6):
+        info.src = packet[IPv6].src
+        info.dst = packet[IPv6].dst
+    return info
+
+def summarize_packet(packet):
+    """
+    Build a FrameInfo from a Scapy packet
+    
+    Args:
+        packet: Scapy packet
+    
+    Returns:
+        FrameInfo: Decoded header fields
+    """
+    info = FrameInfo(float(packet.time), packet.wirelen or len(packet))
+    return _fill_frame_info(info, packet)
+
+class FrameBatch:
+    """
+    Header fields of a batch of frames as NumPy arrays
+    
+    Row i describes the i-th frame of the batch: protocol is an index
+    into BATCH_PROTOCOLS, sport/dport are -1 without a TCP/UDP header,
+    and ip_src/ip_dst hold IPv4 addresses as uint32 where has_ip is set
+    (IPv6 addresses are not aggregated, as in PacketStats).
+    """
+    
+    def __init__(self, timestamps, lengths, linktypes, starts, sizes, data):
+        """
+        Args:
+            timestamps, lengths, linktypes: Per-frame record fields
+            starts, sizes: Position and captured length of each frame in data
+            data: Buffer holding the frames (the mapped capture file, or
+                the frames joined together)
+        """
+        self.size = len(timestamps)
+        self.timestamps = timestamps
+        self.lengths = lengths
+        self.linktypes = linktypes
+        self.starts = starts
+        self.sizes = sizes
+        self.data = data
+        self.protocol = np.zeros(self.size, np.int8)
+        self.sport = np.full(self.size, -1, np.int32)
+        self.dport = np.full(self.size, -1, np.int32)
+        self.has_ip = np.zeros(self.size, bool)
+        self.ip_src = np.zeros(self.size, np.uint32)
+        self.ip_dst = np.zeros(self.size, np.uint32)
+        self.end_offset = None  # File offset after the last record read (classic pcap)
+    
+    def __len__(self):
+        return self.size
+    
+    def frame(self, i):
+        """Captured bytes of row i (a view of the batch buffer)"""
+        start = int(self.starts[i])
+        return memoryview(self.data)[start:start + int(self.sizes[i])]
+    
+    def frames(self):
+        """
+        Decode every row with the scalar path, for per-frame analyzers
+        
+        Yields:
+            FrameInfo: Decoded header fields in capture order
+        """
+        for i in range(self.size):
+            yield decode_frame(int(self.linktypes[i]), self.frame(i),
+                               float(self.timestamps[i]), int(self.lengths[i]))
+    
+    def counts(self, field):
+        """
+        Count the values of a field, in order of first appearance
+        
+        Counting in that order keeps Counter tie order (and so
+        most_common()) identical to per-frame processing.
+        
+        Args:
+            field (str): 'protocol', 'sport', 'dport', 'ip_src' or 'ip_dst'
+        
+        Returns:
+            list: (value, count) pairs, with values as in FrameInfo
+        """
+        if field == 'protocol':
+            mask = self.protocol != 0
+        elif field in ('sport', 'dport'):
+            mask = self.sport >= 0
+        else:
+            mask = self.has_ip
+        values, first, counts = np.unique(getattr(self, field)[mask],
+                                          return_index=True, return_counts=True)
+        order = np.argsort(first, kind='stable')
+        values, counts = values[order].tolist(), counts[order].tolist()
+        if field == 'protocol':
+            values = [BATCH_PROTOCOLS[value] for value in values]
+        elif field in ('ip_src', 'ip_dst'):
+            values = [inet_ntoa(struct.pack('!I', value)) for value in values]
+        return list(zip(values, counts))
+
+def decode_batch(records):
+    """
+    Decode the headers of a batch of records with array operations
+    
+    Args:
+        records (list): (timestamp, wire length, link type, frame) tuples
+    
+    Returns:
+        FrameBatch: Decoded header fields
+    """
+    count = len(records)
+    timestamps = np.fromiter((record[0] for record in records), np.float64, count)
+    lengths = np.fromiter((record[1] for record in records), np.int64, count)
+    linktypes = np.fromiter((record[2] for record in records), np.int64, count)
+    sizes = np.fromiter((len(record[3]) for record in records), np.int64, count)
+    starts = np.zeros(count, np.int64)
+    np.cumsum(sizes[:-1], out=starts[1:])
+    data = b''.join([record[3] for record in records])
+    batch = FrameBatch(timestamps, lengths, linktypes, starts, sizes, data)
+    _classify_batch(batch, np.frombuffer(data, np.uint8))
+    return batch
+
+def _gather_uint(buf, pos, width, little_endian):
+    """Read unsigned integers of width bytes at every position of pos"""
+    value = np.zeros(len(pos), np.int64)
+    for i in (range(width - 1, -1, -1) if little_endian else range(width)):
+        value = (value << 8) | buf[pos + i]
+    return value
+
+def _classify_batch(batch, buf):
+    """
+    Fill the header fields of a FrameBatch
+    
+    The common layouts handled by decode_frame (Ethernet, Linux cooked
+    and raw IP carrying IPv4/IPv6 with TCP, UDP, ICMP or ARP) are decoded
+    for the whole batch at once. Rows that decode_frame would hand to
+    Scapy, or that need per-frame logic (VLAN tags), are decoded one at
+    a time with decode_frame, so every row matches the scalar path.
+    
+    Args:
+        batch (FrameBatch): Batch with its record fields set
+        buf (numpy.ndarray): batch.data as uint8
+    """
+    if not batch.size or not len(buf):
+        return
+    linktypes, starts, sizes = batch.linktypes, batch.starts, batch.sizes
+    last = len(buf) - 1
+    
+    def u8(pos):
+        return buf[np.minimum(pos, last)].astype(np.int64)
+    
+    def u16(pos):
+        return (u8(pos) << 8) | u8(pos + 1)
+    
+    def u32(pos):
+        return ((u16(pos) << 16) | u16(pos + 2)).astype(np.uint32)
+    
+    # Link layer. Positions are clamped to the frame so that reads for
+    # rows that fail a length check stay inside the buffer.
+    end_of_frame = starts + sizes
+    
+    def at(pos):
+        return np.minimum(pos, end_of_frame)
+    
+    ethernet = linktypes == LINKTYPE_ETHERNET
+    cooked = linktypes == LINKTYPE_LINUX_SLL
+    raw = np.isin(linktypes, (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6))
+    link = ethernet | cooked
+    fallback = ~(link | raw)
+    header = np.where(ethernet, 14, np.where(cooked, 16, 0))
+    fallback |= link & (sizes < header)
+    offset = at(starts + header)
+    ethertype = u16(np.maximum(offset - 2, 0))
+    fallback |= link & np.isin(ethertype, VLAN_ETHERTYPES)
+    version = u8(offset) >> 4
+    fallback |= raw & (sizes == 0)
+    fallback |= (linktypes == LINKTYPE_RAW) & ~np.isin(version, (4, 6))
+    raw_ethertype = np.where((version == 6) & (linktypes != LINKTYPE_IPV4), ETH_P_IPV6, ETH_P_IP)
+    ethertype = np.where(raw, raw_ethertype, ethertype)
+    available = end_of_frame - offset
+    
+    # IPv4
+    ipv4 = (ethertype == ETH_P_IP) & ~fallback
+    ihl = (u8(offset) & 0x0F) * 4
+    proto4 = u8(at(offset + 9))
+    fallback |= ipv4 & ((available < 20) | (version != 4) | (ihl < 20) | (available < ihl)
+                        | np.isin(proto4, list(TUNNEL_IP_PROTOS)))
+    ipv4 &= ~fallback
+    total_length = u16(at(offset + 2))
+    fragment = (u16(at(offset + 6)) & 0x1FFF) != 0
+    batch.has_ip = ipv4
+    batch.ip_src = np.where(ipv4, u32(at(offset + 12)), 0).astype(np.uint32)
+    batch.ip_dst = np.where(ipv4, u32(at(offset + 16)), 0).astype(np.uint32)
+    end4 = np.where(total_length >= ihl, offset + total_length, end_of_frame)
+    
+    # IPv6 (extension headers go to the scalar path)
+    ipv6 = (ethertype == ETH_P_IPV6) & ~fallback
+    payload_length = u16(at(offset + 4))
+    proto6 = u8(at(offset + 6))
+    fallback |= ipv6 & ((available < 40) | (version != 6) | (payload_length == 0)
+                        | np.isin(proto6, list(TUNNEL_IP_PROTOS | IPV6_EXTENSION_HEADERS)))
+    ipv6 &= ~fallback
+    
+    # ARP
+    arp = (ethertype == ETH_P_ARP) & ~fallback
+    fallback |= arp & ((available < 28) | (u8(at(offset + 4)) != 6) | (u8(at(offset + 5)) != 4))
+    arp &= ~fallback
+    fallback |= ~(ipv4 | ipv6 | arp | fallback)
+    
+    # Transport
+    transport = (ipv4 & ~fragment) | ipv6
+    proto = np.where(ipv4, proto4, proto6)
+    offset = at(np.where(ipv4, offset + ihl, offset + 40))
+    end = np.minimum(np.where(ipv4, end4, offset + payload_length), end_of_frame)
+    available = end - offset
+    tcp = transport & (proto == 6)
+    udp = transport & (proto == 17)
+    icmp = ipv4 & ~fragment & (proto == 1)
+    sport = u16(offset)
+    dport = u16(at(offset + 2))
+    fallback |= tcp & (available < 20)
+    fallback |= udp & ((available < 8) | np.isin(sport, list(TUNNEL_UDP_PORTS))
+                       | np.isin(dport, list(TUNNEL_UDP_PORTS)) | (u16(at(offset + 4)) < 8))
+    fallback |= icmp & ((available < 8) | ~np.isin(u8(offset), list(ICMP_FIXED_HEADER_TYPES)))
+    
+    protocol = np.select([tcp, udp, icmp, arp], [1, 2, 3, 4], 0).astype(np.int8)
+    ports = tcp | udp
+    batch.protocol = np.where(fallback, 0, protocol).astype(np.int8)
+    batch.sport = np.where(ports & ~fallback, sport, -1).astype(np.int32)
+    batch.dport = np.where(ports & ~fallback, dport, -1).astype(np.int32)
+    batch.has_ip &= ~fallback
+    
+    # Everything else goes through the scalar decoder
+    codes = {name: code for code, name in enumerate(BATCH_PROTOCOLS)}
+    for i in np.flatnonzero(fallback).tolist():
+        info = decode_frame(int(linktypes[i]), batch.frame(i))
+        batch.protocol[i] = codes[info.protocol]
+        if info.sport is not None:
+            batch.sport[i] = info.sport
+            batch.dport[i] = info.dport
+        if info.ip_src is not None:
+            batch.has_ip[i] = True
+            batch.ip_src[i], = struct.unpack('!I', inet_aton(info.ip_src))
+            batch.ip_dst[i], = struct.unpack('!I', inet_aton(info.ip_dst))
+
+def iter_frame_batches(pcap_file, start=None, end=None, batch_size=DEFAULT_FRAME_BATCH_SIZE,
+                       packet_filter=None):
+    """
+    Iterate over a capture file in decoded batches
+    
+    For classic pcap only the record offsets are collected in Python;
+    record fields and headers are then read straight from the mapped
+    file with array operations, without a per-frame copy.
+    
+    Args:
+        pcap_file (str): Path to PCAP or PCAPNG file
+        start (int): Byte offset of the first record (pcap only)
+        end (int): Stop before the record starting at or after this offset
+        batch_size (int): Frames per batch
+        packet_filter (PacketFilter): Only batch the matching frames
+    
+    Yields:
+        FrameBatch: Decoded header fields of consecutive (matching) frames
+    """
+    with open(pcap_file, 'rb') as f:
+        magic = f.read(4)
+    if magic == PCAPNG_MAGIC:
+        records = []
+        for record in filter_records(iter_mapped_records(pcap_file), packet_filter):
+            records.append(record)
+            if len(records) >= batch_size:
+                yield decode_batch(records)
+                records = []
+        if records:
+            yield decode_batch(records)
+        return
+    
+    with open(pcap_file, 'rb') as f:
+        record_header, ts_scale, _, linktype = _read_pcap_header(f, pcap_file)
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    little_endian = record_header.format.startswith('<')
+    caplen_at = struct.Struct(record_header.format[0] + 'I').unpack_from
+    size = len(mapped)
+    buf = np.frombuffer(mapped, np.uint8)
+    view = memoryview(mapped)
+    match = packet_filter.match if packet_filter is not None else None
+    
+    # buf is passed in rather than closed over, so that `del buf` below
+    # drops the last reference to the export of the mapping
+    def make_batch(buf, offsets, end_offset):
+        records = np.array(offsets, np.int64)
+        ts_sec = _gather_uint(buf, records, 4, little_endian)
+        ts_frac = _gather_uint(buf, records + 4, 4, little_endian)
+        batch = FrameBatch(ts_sec + ts_frac * ts_scale,
+                           _gather_uint(buf, records + 12, 4, little_endian),
+                           np.full(len(records), linktype, np.int64), records + 16,
+                           _gather_uint(buf, records + 8, 4, little_endian), mapped)
+        batch.end_offset = end_offset
+        _classify_batch(batch, buf)
+        return batch
+    
+    try:
+        offset = 24 if start is None else start
+        end = size if end is None else min(end, size)
+        offsets = []
+        reported = offset
+        while offset < end and offset + 16 <= size:
+            caplen, = caplen_at(mapped, offset + 8)
+            if offset + 16 + caplen > size:
+                break  # Truncated final record
+            if match is None or match(linktype, view[offset + 16:offset + 16 + caplen]):
+                offsets.append(offset)
+            offset += 16 + caplen
+            if len(offsets) >= batch_size:
+                yield make_batch(buf, offsets, offset)
+                offsets = []
+                reported = offset
+        if offsets or offset != reported:
+            # A final (possibly empty) batch reports where reading stopped
+            yield make_batch(buf, offsets, offset)
+    finally:
+        view.release()
+        del buf
+        try:
+            mapped.close()
+        except BufferError:
+            pass  # Batches are still referenced; closed when they are freed
+
+def _filter_fields(linktype, frame):
+    """
+    Outer header fields tested by compiled filters
+    
+    Only the fixed headers are located (no address formatting, no
+    FrameInfo), so rejecting a frame costs far less than decoding it.
+    
+    Returns:
+        tuple: (ethertype, src, dst, ip protocol, sport, dport); addresses
+            are integers (IPv4/IPv6, or the ARP sender/target IPv4
+            address) and missing fields are -1
+    """
+    size = len(frame)
+    if linktype == LINKTYPE_ETHERNET or linktype == LINKTYPE_LINUX_SLL:
+        offset = 14 if linktype == LINKTYPE_ETHERNET else 16
+        if size < offset:
+            return -1, -1, -1, -1, -1, -1
+        ethertype = (frame[offset - 2] << 8) | frame[offset - 1]
+        while ethertype in VLAN_ETHERTYPES and size >= offset + 4:
+            ethertype = (frame[offset + 2] << 8) | frame[offset + 3]
+            offset += 4
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6) and size:
+        offset = 0
+        version = frame[0] >> 4
+        if linktype == LINKTYPE_IPV4 or (linktype == LINKTYPE_RAW and version == 4):
+            ethertype = ETH_P_IP
+        elif version == 6:
+            ethertype = ETH_P_IPV6
+        else:
+            return -1, -1, -1, -1, -1, -1
+    else:
+        return -1, -1, -1, -1, -1, -1
+    
+    if ethertype == ETH_P_IP:
+        if size < offset + 20:
+            return ethertype, -1, -1, -1, -1, -1
+        proto = frame[offset + 9]
+        frag, src, dst = struct.unpack_from('!H4xII', frame, offset + 6)
+        if frag & 0x1FFF:
+            return ethertype, src, dst, proto, -1, -1  # No transport header
+        offset += (frame[offset] & 0x0F) * 4
+    elif ethertype == ETH_P_IPV6:
+        if size < offset + 40:
+            return ethertype, -1, -1, -1, -1, -1
+        proto = frame[offset + 6]
+        src = int.from_bytes(frame[offset + 8:offset + 24], 'big')
+        dst = int.from_bytes(frame[offset + 24:offset + 40], 'big')
+        offset += 40
+    elif ethertype == ETH_P_ARP:
+        if size < offset + 28 or frame[offset + 4:offset + 6] != b'\x06\x04':
+            return ethertype, -1, -1, -1, -1, -1
+        src, = struct.unpack_from('!I', frame, offset + 14)
+        dst, = struct.unpack_from('!I', frame, offset + 24)
+        return ethertype, src, dst, -1, -1, -1
+    else:
+        return ethertype, -1, -1, -1, -1, -1
+    
+    if proto in FILTER_PORT_PROTOCOLS and size >= offset + 4:
+        sport, dport = struct.unpack_from('!HH', frame, offset)
+        return ethertype, src, dst, proto, sport, dport
+    return ethertype, src, dst, proto, -1, -1
+
+class PacketFilter:
+    """
+    Capture filter with BPF-like syntax, compiled to a Python predicate
+    
+    Supported primitives: [src|dst] host ADDR, [src|dst] net CIDR,
+    [src|dst] port N, [src|dst] portrange N-M, proto NAME|N, the
+    protocols ip, ip6, arp, tcp, udp, icmp, icmp6 and sctp, and
+    '<protocol> port N'. They combine with and/&&, or/||, not/! and
+    parentheses; as in tcpdump, 'and' and 'or' have equal precedence
+    and group left to right. Only outer headers are tested: VLAN tags
+    are skipped and tunnelled packets are matched on the tunnel headers.
+    
+    The expression is translated once into the source of a function
+    over the raw header fields (see _filter_fields), so testing a frame
+    costs one header walk and a few integer comparisons.
+    """
+    
+    def __init__(self, expression):
+        """
+        Compile a filter expression
+        
+        Args:
+            expression (str): Filter expression, e.g. 'tcp port 80 and
+                net 10.0.0.0/8'
+        
+        Raises:
+            ValueError: If the expression is invalid
+        """
+        self.expression = expression
+        self._tokens = re.findall(r'\(|\)|&&|\|\||!|[^\s()!]+', expression)
+        self._pos = 0
+        if not self._tokens:
+            raise ValueError("empty filter expression")
+        condition = self._parse_expression()
+        if self._pos < len(self._tokens):
+            raise ValueError(f"unexpected '{self._tokens[self._pos]}' in filter")
+        del self._tokens, self._pos
+        self.source = (
+            "def match(linktype, frame):\n"
+            "    ethertype, src, dst, proto, sport, dport = _filter_fields(linktype, frame)\n"
+            f"    return {condition}\n"
+        )
+        namespace = {'_filter_fields': _filter_fields}
+        exec(compile(self.source, '<filter>', 'exec'), namespace)
+        self.match = namespace['match']
+    
+    def __call__(self, linktype, frame):
+        """
+        Test a captured frame
+        
+        Args:
+            linktype (int): Link-layer header type of the capture
+            frame (bytes): Captured frame (or a memoryview of it)
+        
+        Returns:
+            bool: True if the frame matches the filter
+        """
+        return self.match(linktype, frame)
+    
+    def __reduce__(self):
+        # Compiled functions do not pickle; worker processes recompile
+        return PacketFilter, (self.expression,)
+    
+    def _peek(self):
+        return self._tokens[self._pos].lower() if self._pos < len(self._tokens) else None
+    
+    def _next(self, what):
+        if self._pos >= len(self._tokens):
+            raise ValueError(f"filter ends where {what} was expected")
+        self._pos += 1
+        return self._tokens[self._pos - 1]
+    
+    def _parse_expression(self):
+        condition = self._parse_unary()
+        while self._peek() in ('and', '&&', 'or', '||'):
+            operator = 'and' if self._next('an operator').lower() in ('and', '&&') else 'or'
+            condition = f"({condition} {operator} {self._parse_unary()})"
+        return condition
+    
+    def _parse_unary(self):
+        token = self._peek()
+        if token in ('not', '!'):
+            self._pos += 1
+            return f"(not {self._parse_unary()})"
+        if token == '(':
+            self._pos += 1
+            condition = self._parse_expression()
+            if self._next("')'") != ')':
+                raise ValueError("missing ')' in filter")
+            return condition
+        return self._parse_primitive()
+    
+    def _parse_primitive(self):
+        token = self._next('a primitive').lower()
+        direction = None
+        if token in ('src', 'dst'):
+            direction = token
+            token = self._next(f"a primitive after '{direction}'").lower()
+            if token not in ('host', 'net', 'port', 'portrange'):
+                raise ValueError(f"'{direction}' must be followed by host, net, port or portrange")
+        
+        if token in ('host', 'net'):
+            return self._address(token, self._next(f"an address after '{token}'"), direction)
+        if token in ('port', 'portrange'):
+            return self._port(token, self._next(f"a port after '{token}'"), direction)
+        if token == 'proto':
+            return self._proto(self._next("a protocol after 'proto'"))
+        if token in FILTER_PROTOCOLS:
+            number = FILTER_PROTOCOLS[token]
+            condition = f"proto == {number}"
+            if token == 'icmp':
+                condition = f"(ethertype == {ETH_P_IP} and {condition})"
+            if self._peek() in ('port', 'portrange') and number in FILTER_PORT_PROTOCOLS:
+                kind = self._next('port').lower()
+                port = self._port(kind, self._next(f"a port after '{kind}'"), None)
+                return f"({condition} and {port})"
+            return condition
+        if token in ('ip', 'ip6'):
+            ethertype = ETH_P_IP if token == 'ip' else ETH_P_IPV6
+            if self._peek() == 'proto':
+                self._pos += 1
+                proto = self._proto(self._next("a protocol after 'proto'"))
+                return f"(ethertype == {ethertype} and {proto})"
+            return f"ethertype == {ethertype}"
+        if token == 'arp':
+            return f"ethertype == {ETH_P_ARP}"
+        raise ValueError(f"unknown filter primitive '{token}'")
+    
+    def _address(self, kind, value, direction):
+        try:
+            network = ipaddress.ip_network(value, strict=False)
+        except ValueError:
+            raise ValueError(f"invalid {kind} address '{value}'") from None
+        if kind == 'host' and network.num_addresses != 1:
+            raise ValueError(f"'host' takes a single address, use 'net {value}'")
+        if network.version == 4:
+            family = f"(ethertype == {ETH_P_IP} or ethertype == {ETH_P_ARP})"
+        else:
+            family = f"ethertype == {ETH_P_IPV6}"
+        address, mask = int(network.network_address), int(network.netmask)
+        fields = [direction] if direction else ['src', 'dst']
+        if kind == 'host':
+            tests = [f"{field} == {address}" for field in fields]
+        else:
+            tests = [f"({field} & {mask}) == {address}" for field in fields]
+        return f"({family} and ({' or '.join(tests)}))"
+    
+    def _port(self, kind, value, direction):
+        try:
+            if kind == 'port':
+                low = high = int(value)
+            else:
+                low, high = (int(part) for part in value.split('-'))
+        except ValueError:
+            raise ValueError(f"invalid {kind} '{value}'") from None
+        if not 0 <= low <= high <= 65535:
+            raise ValueError(f"invalid {kind} '{value}'")
+        fields = ['sport', 'dport'] if direction is None else [direction[0] + 'port']
+        if low == high:
+            tests = [f"{field} == {low}" for field in fields]
+        else:
+            tests = [f"{low} <= {field} <= {high}" for field in fields]
+        return f"({' or '.join(tests)})"
+    
+    def _proto(self, value):
+        number = FILTER_PROTOCOLS.get(value.lower())
+        if number is None:
+            try:
+                number = int(value)
+            except ValueError:
+                raise ValueError(f"unknown protocol '{value}'") from None
+        if not 0 <= number <= 255:
+            raise ValueError(f"invalid protocol number '{value}'")
+        return f"proto == {number}"
+
+def filter_records(records, packet_filter):
+    """
+    Drop the records that do not match a filter
+    
+    Args:
+        records: (timestamp, wire length, link type, frame) tuples
+        packet_filter (PacketFilter): Filter to apply (None keeps all)
+    
+    Returns:
+        Iterator over the matching records
+    """
+    if packet_filter is None:
+        return iter(records)
+    match = packet_filter.match
+    return (record for record in records if match(record[2], record[3]))
+
+def _hash64(key):
+    """Stable 64-bit hash of a key (the same in every process)"""
+    if not isinstance(key, bytes):
+        key = str(key).encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big')
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter summary with a fixed number of counters
+    
+    Counts are never underestimated. Each count overestimates the true
+    count by at most its recorded error, and every error is at most
+    total / capacity. Summaries built on different inputs can be merged
+    with the same guarantee.
+    """
+    
+    def __init__(self, capacity=1000):
+        """
+        Initialize an empty summary
+        
+        Args:
+            capacity (int): Number of counters kept (memory budget)
+        """
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        self._heap = []  # (count, key) entries, possibly stale
+    
+    def add(self, key, count=1):
+        """
+        Count an occurrence of a key
+        
+        Args:
+            key: Item to count
+            count (int): Number of occurrences
+        
+        Returns:
+            The key that was evicted to make room, or None
+        """
+        self.total += count
+        counts = self.counts
+        if key in counts:
+            counts[key] += count
+        elif len(counts) < self.capacity:
+            counts[key] = count
+            self.errors[key] = 0
+            heapq.heappush(self._heap, (count, key))
+        else:
+            min_key, min_count = self._pop_min()
+            del counts[min_key]
+            del self.errors[min_key]
+            counts[key] = min_count + count
+            self.errors[key] = min_count
+            heapq.heappush(self._heap, (min_count + count, key))
+            return min_key
+        return None
+    
+    def _pop_min(self):
+        """Remove and return the monitored key with the smallest count"""
+        heap = self._heap
+        counts = self.counts
+        while True:
+            count, key = heap[0]
+            actual = counts.get(key)
+            if actual == count:
+                heapq.heappop(heap)
+                return key, count
+            if actual is None:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (actual, key))
+    
+    def min_count(self):
+        """Smallest monitored count (0 while the summary is not full)"""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+    
+    def error_bound(self):
+        """Maximum overestimation of any reported count"""
+        return self.total // self.capacity
+    
+    def most_common(self, n=None):
+        """
+        Get the keys with the highest estimated counts
+        
+        Args:
+            n (int): Number of keys to return (all if None)
+        
+        Returns:
+            list: (key, estimated count) pairs, highest first
+        """
+        if n is None:
+            return sorted(self.counts.items(), key=itemgetter(1), reverse=True)
+        return heapq.nlargest(n, self.counts.items(), key=itemgetter(1))
+    
+    def merge(self, other):
+        """
+        Merge another summary into this one
+        
+        Args:
+            other (SpaceSaving): Summary of a different part of the input
+        """
+        own_min, other_min = self.min_count(), other.min_count()
+        counts, errors = {}, {}
+        for key in list(self.counts) + [k for k in other.counts if k not in self.counts]:
+            counts[key] = self.counts.get(key, own_min) + other.counts.get(key, other_min)
+            errors[key] = self.errors.get(key, own_min) + other.errors.get(key, other_min)
+        
+        kept = heapq.nlargest(self.capacity, counts.items(), key=itemgetter(1))
+        self.counts = dict(kept)
+        self.errors = {key: errors[key] for key in self.counts}
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+        self.total += other.total
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count estimator
+    
+    Uses 2**precision one-byte registers; the relative standard error of
+    the estimate is about 1.04 / sqrt(2**precision).
+    """
+    
+    def __init__(self, precision=14):
+        """
+        Initialize an empty estimator
+        
+        Args:
+            precision (int): Number of index bits (4-18)
+        """
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+    
+    def add(self, key):
+        """
+        Add a key to the set
+        
+        Args:
+            key: Item to count
+        """
+        value = _hash64(key)
+        width = 64 - self.precision
+        index = value >> width
+        rank = width - (value & ((1 << width) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def count(self):
+        """
+        Estimate the number of distinct keys added
+        
+        Returns:
+            int: Estimated distinct count
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+    
+    def standard_error(self):
+        """Relative standard error of count()"""
+        return 1.04 / math.sqrt(len(self.registers))
+    
+    def merge(self, other):
+        """
+        Merge another estimator with the same precision into this one
+        
+        Args:
+            other (HyperLogLog): Estimator of a different part of the input
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+class PacketAnalyzer:
+    """Base class for analyzers fed by a single pass over a capture"""
+    
+    name = None
+    bounded = False  # Memory does not grow with the capture (live mode)
+    
+    def process(self, info):
+        """
+        Process the decoded headers of a single frame
+        
+        Args:
+            info (FrameInfo): Decoded header fields
+        """
+        raise NotImplementedError("Subclasses must implement process()")
+    
+    def process_batch(self, batch):
+        """
+        Process a FrameBatch (NumPy engine); by default frame by frame
+        
+        Args:
+            batch (FrameBatch): Decoded header fields of several frames
+        """
+        process = self.process
+        for info in batch.frames():
+            process(info)
+    
+    def tick(self, idle):
+        """
+        Called by live mode while no frames arrive
+        
+        Args:
+            idle (float): Seconds since the last frame was processed
+        """
+        pass
+    
+    def finish(self):
+        """Called once after the last frame has been processed"""
+        pass
+    
+    def print_results(self):
+        """Print the analysis results"""
+        pass
+    
+    def results(self):
+        """
+        Get the analysis results
+        
+        Returns:
+            dict: Analysis results
+        """
+        return {}
+    
+    def merge(self, other):
+        """
+        Merge the partial results of another analyzer of the same type
+        
+        Used to reduce per-shard results in parallel mode; shards are
+        merged in capture order.
+        
+        Args:
+            other (PacketAnalyzer): Analyzer that processed a later shard
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot be merged")
+
+ANALYZERS = {}
+
+def register_analyzer(cls):
+    """
+    Register a PacketAnalyzer subclass under its name
+    
+    Args:
+        cls: PacketAnalyzer subclass
+    
+    Returns:
+        The registered class (so this can be used as a decorator)
+    """
+    ANALYZERS[cls.name] = cls
+    return cls
+
+@register_analyzer
+class PacketStats(PacketAnalyzer):
+    """Incremental protocol, IP address and port counters for a capture"""
+    
+    name = 'stats'
+    
+    def __init__(self):
+        """Initialize empty counters"""
+        self.total_packets = 0
+        self.protocol_count = Counter()
+        self.src_ips = Counter()
+        self.dst_ips = Counter()
+        self.src_ports = Counter()
+        self.dst_ports = Counter()
+    
+    def add_packet(self, packet):
+        """
+        Update the counters with a single Scapy packet
+        
+        Args:
+            packet: Scapy packet
+        """
+        self.add_frame(summarize_packet(packet))
+    
+    def add_frame(self, info):
+        """
+        Update the counters with the decoded headers of a single frame
+        
+        Args:
+            info (FrameInfo): Decoded header fields
+        """
+        self.total_packets += 1
+        
+        # Protocol analysis
+        protocol = info.protocol
+        if protocol is not None:
+            self.protocol_count[protocol] += 1
+            if info.sport is not None:
+                self.src_ports[info.sport] += 1
+                self.dst_ports[info.dport] += 1
+        
+        # IP address analysis
+        if info.ip_src is not None:
+            self.src_ips[info.ip_src] += 1
+            self.dst_ips[info.ip_dst] += 1
+    
+    process = add_frame
+    
+    def process_batch(self, batch):
+        """
+        Update the counters with a whole FrameBatch at once
+        
+        Args:
+            batch (FrameBatch): Decoded header fields of several frames
+        """
+        self.total_packets += len(batch)
+        for counter, field in ((self.protocol_count, 'protocol'),
+                               (self.src_ports, 'sport'), (self.dst_ports, 'dport'),
+                               (self.src_ips, 'ip_src'), (self.dst_ips, 'ip_dst')):
+            for value, count in batch.counts(field):
+                counter[value] += count
+    
+    def merge(self, other):
+        """
+        Add the counters of another PacketStats
+        
+        Args:
+            other (PacketStats): Counters from a later shard
+        """
+        self.total_packets += other.total_packets
+        self.protocol_count.update(other.protocol_count)
+        self.src_ips.update(other.src_ips)
+        self.dst_ips.update(other.dst_ips)
+        self.src_ports.update(other.src_ports)
+        self.dst_ports.update(other.dst_ports)
+    
+    def print_results(self):
+        """Print the analysis results"""
+        print("=" * 60)
+        print("PACKET ANALYSIS RESULTS")
+        print("=" * 60)
+        print()
+        
+        print("Protocol Distribution:")
+        print("-" * 30)
+        for protocol, count in self.protocol_count.most_common():
+            percentage = (count / self.total_packets) * 100
+            print(f"{protocol}: {count} packets ({percentage:.2f}%)")
+        print()
+        
+        print("Top 10 Source IP Addresses:")
+        print("-" * 30)
+        for ip, count in self.src_ips.most_common(10):
+            print(f"{ip}: {count} packets")
+        print()
+        
+        print("Top 10 Destination IP Addresses:")
+        print("-" * 30)
+        for ip, count in self.dst_ips.most_common(10):
+            print(f"{ip}: {count} packets")
+        print()
+        
+        print("Top 10 Source Ports:")
+        print("-" * 30)
+        for port, count in self.src_ports.most_common(10):
+            print(f"Port {port}: {count} packets")
+        print()
+        
+        print("Top 10 Destination Ports:")
+        print("-" * 30)
+        for port, count in self.dst_ports.most_common(10):
+            service = get_service_name(port)
+            print(f"Port {port} ({service}): {count} packets")
+        print()
+    
+    def results(self):
+        """
+        Get the analysis results
+        
+        Returns:
+            dict: Analysis results
+        """
+        return {
+            'total_packets': self.total_packets,
+            'protocols': dict(self.protocol_count),
+            'top_src_ips': dict(self.src_ips.most_common(10)),
+            'top_dst_ips': dict(self.dst_ips.most_common(10)),
+            'top_src_ports': dict(self.src_ports.most_common(10)),
+            'top_dst_ports': dict(self.dst_ports.most_common(10))
+        }
+
+def _parse_time(value):
+    """
+    Parse a time bound given as epoch seconds or an ISO 8601 date
+    
+    Args:
+        value (str): e.g. '1700000000.5' or '2023-11-14T22:13:20' (UTC
+            unless an offset is given)
+    
+    Returns:
+        float: Epoch seconds
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid time: {value}")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+class PcapIndex:
+    """
+    Sidecar SQLite index of the records in a classic pcap file
+    
+    The index stores the byte offset and timestamp of every record and a
+    posting list of records per 5-tuple, so repeat questions about an IP,
+    port or time window seek straight to the matching records instead of
+    scanning the whole capture. It is keyed by the capture's size, mtime
+    and a hash of its first and last megabyte, and rebuilt when any of
+    them change. A sidecar that is not a readable database is replaced.
+    """
+    
+    def __init__(self, pcap_file, index_file=None):
+        """
+        Open (or create) the index of a capture file
+        
+        Args:
+            pcap_file (str): Path to PCAP file
+            index_file (str): Index path (default: pcap_file + '.idx')
+        """
+        self.pcap_file = pcap_file
+        with open(pcap_file, 'rb') as f:
+            if f.read(4) not in PCAP_MAGIC:
+                raise ValueError(f"Indexing requires a classic pcap file: {pcap_file}")
+        self.index_file = index_file or pcap_file + INDEX_SUFFIX
+        self.conn = sqlite3.connect(self.index_file)
+        try:
+            self._create_tables()
+        except sqlite3.DatabaseError:
+            print(f"[-] Index {self.index_file} is unreadable, rebuilding it")
+            self.conn.close()
+            os.remove(self.index_file)
+            self.conn = sqlite3.connect(self.index_file)
+            self._create_tables()
+    
+    def _create_tables(self):
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS flows (
+                flow_id INTEGER PRIMARY KEY,
+                protocol TEXT,
+                src TEXT,
+                dst TEXT,
+                sport INTEGER,
+                dport INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                record INTEGER PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                timestamp REAL NOT NULL,
+                flow_id INTEGER
+            );
+        """)
+    
+    def fingerprint(self):
+        """
+        Identify the current contents of the capture file
+        
+        Returns:
+            str: Size, mtime and a hash of the first and last megabyte
+        """
+        stat = os.stat(self.pcap_file)
+        digest = hashlib.blake2b(digest_size=16)
+        with open(self.pcap_file, 'rb') as f:
+            digest.update(f.read(INDEX_HASH_BYTES))
+            if stat.st_size > INDEX_HASH_BYTES:
+                f.seek(max(INDEX_HASH_BYTES, stat.st_size - INDEX_HASH_BYTES))
+                digest.update(f.read(INDEX_HASH_BYTES))
+        return f"{INDEX_SCHEMA_VERSION}:{stat.st_size}:{stat.st_mtime_ns}:{digest.hexdigest()}"
+    
+    def is_current(self):
+        """Check whether the index is complete and matches the capture file"""
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        return row is not None and row[0] == self.fingerprint()
+    
+    def build_frames(self):
+        """
+        Rebuild the index while decoding the capture
+        
+        The index is only marked complete once every record has been
+        read, so an interrupted pass is rebuilt next time.
+        
+        Yields:
+            FrameInfo: Decoded header fields in capture order
+        """
+        fingerprint = self.fingerprint()
+        conn = self.conn
+        with conn:
+            conn.execute("DELETE FROM meta")
+            conn.execute("DROP INDEX IF EXISTS records_flow")
+            conn.execute("DROP INDEX IF EXISTS records_timestamp")
+            conn.execute("DELETE FROM records")
+            conn.execute("DELETE FROM flows")
+        
+        flows = {}
+        rows = []
+        offset = 24
+        for record, (timestamp, length, linktype, frame) in enumerate(
+                iter_mapped_records(self.pcap_file)):
+            info = decode_frame(linktype, frame, timestamp, length)
+            flow_id = None
+            if info.src is not None:
+                key = (info.protocol, info.src, info.dst, info.sport, info.dport)
+                flow_id = flows.get(key)
+                if flow_id is None:
+                    flow_id = flows[key] = len(flows) + 1
+            rows.append((record, offset, timestamp, flow_id))
+            if len(rows) >= INDEX_BATCH_SIZE:
+                conn.executemany("INSERT INTO records VALUES (?, ?, ?, ?)", rows)
+                rows = []
+            offset += 16 + len(frame)
+            yield info
+        
+        with conn:
+            conn.executemany("INSERT INTO records VALUES (?, ?, ?, ?)", rows)
+            conn.executemany("INSERT INTO flows VALUES (?, ?, ?, ?, ?, ?)",
+                             ((flow_id,) + key for key, flow_id in flows.items()))
+            conn.executescript("""
+                CREATE INDEX IF NOT EXISTS records_flow ON records(flow_id, record);
+                CREATE INDEX IF NOT EXISTS records_timestamp ON records(timestamp);
+                CREATE INDEX IF NOT EXISTS flows_src ON flows(src);
+                CREATE INDEX IF NOT EXISTS flows_dst ON flows(dst);
+                CREATE INDEX IF NOT EXISTS flows_sport ON flows(sport);
+                CREATE INDEX IF NOT EXISTS flows_dport ON flows(dport);
+            """)
+            conn.execute("INSERT INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+    
+    def build(self):
+        """
+        Rebuild the index if it is missing or stale
+        
+        Returns:
+            int: Number of indexed records (0 if the index was current)
+        """
+        if self.is_current():
+            return 0
+        return sum(1 for _ in self.build_frames())
+    
+    def query(self, host=None, port=None, start_time=None, end_time=None):
+        """
+        Find the records matching every given condition
+        
+        Args:
+            host (str): Source or destination IP address
+            port (int): Source or destination port
+            start_time (float): Earliest timestamp (epoch seconds)
+            end_time (float): Latest timestamp (epoch seconds)
+        
+        Returns:
+            list: Byte offsets of the matching records, in capture order
+        """
+        self.build()
+        
+        flow_conditions = []
+        params = []
+        if host is not None:
+            flow_conditions.append("(src = ? OR dst = ?)")
+            params += [host, host]
+        if port is not None:
+            flow_conditions.append("(sport = ? OR dport = ?)")
+            params += [port, port]
+        
+        conditions = []
+        if flow_conditions:
+            conditions.append("flow_id IN (SELECT flow_id FROM flows WHERE "
+                              + " AND ".join(flow_conditions) + ")")
+        if start_time is not None:
+            conditions.append("timestamp >= ?")
+            params.append(start_time)
+        if end_time is not None:
+            conditions.append("timestamp <= ?")
+            params.append(end_time)
+        
+        sql = "SELECT offset FROM records"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY record"
+        return [row[0] for row in self.conn.execute(sql, params)]
+    
+    def iter_records(self, offsets):
+        """
+        Read the records at the given byte offsets
+        
+        Args:
+            offsets (list): Record offsets (e.g. from query())
+        
+        Yields:
+            tuple: (timestamp, wire length, link type, frame bytes)
+        """
+        with open(self.pcap_file, 'rb') as f:
+            record_header, ts_scale, _, linktype = _read_pcap_header(f, self.pcap_file)
+            unpack = record_header.unpack
+            for offset in offsets:
+                f.seek(offset)
+                ts_sec, ts_frac, caplen, wirelen = unpack(f.read(16))
+                yield ts_sec + ts_frac * ts_scale, wirelen, linktype, f.read(caplen)
+    
+    def close(self):
+        """Close the index database"""
+        self.conn.close()
+
+def open_index(pcap_file, index=False, query=None, index_file=None):
+    """
+    Open the sidecar index of a capture if it is requested or needed
+    
+    Args:
+        pcap_file (str): Path to PCAP file
+        index (bool): Build or reuse the index during the pass
+        query (dict): PcapIndex.query() arguments (implies index)
+        index_file (str): Index path (default: pcap_file + '.idx')
+    
+    Returns:
+        PcapIndex: The index, or None if neither index nor query is set
+    """
+    if not (index or query):
+        return None
+    return PcapIndex(pcap_file, index_file)
+
+def iter_packets(pcap_file, stream=False):
+    """
+    Iterate over the packets of a PCAP file
+    
+    In streaming mode packets are read and dissected one at a time with
+    PcapReader, so memory use does not depend on the size of the capture.
+    Otherwise the whole file is loaded with rdpcap first.
+    
+    Args:
+        pcap_file (str): Path to PCAP file
+        stream (bool): Read packets one at a time instead of loading the file
+    
+    Yields:
+        Scapy packets in capture order
+    """
+    if stream:
+        with PcapReader(pcap_file) as reader:
+            for packet in reader:
+                yield packet
+    else:
+        packets = rdpcap(pcap_file)
+        print(f"[+] Loaded {len(packets)} packets")
+        print()
+        for packet in packets:
+            yield packet
+
+def iter_frames(pcap_file, engine='fast', stream=False, index=None, query=None,
+                packet_filter=None):
+    """
+    Iterate over the decoded headers of every frame in a PCAP file
+    
+    Args:
+        pcap_file (str): Path to PCAP file
+        engine (str): 'fast' to decode raw headers directly, 'scapy' to
+            dissect every packet with Scapy ('numpy' decodes frame by frame
+            here like 'fast'; see iter_frame_batches)
+        stream (bool): Stream packets with the Scapy engine (the fast
+            engine always reads the file one record at a time)
+        index (PcapIndex): Sidecar index; a missing or stale index is
+            rebuilt during this pass
+        query (dict): Only read the records matching these PcapIndex.query()
+            arguments, using the index
+        packet_filter (PacketFilter): Only decode the frames matching this
+            filter; the others are dropped before any decoding (with the
+            Scapy engine, before a Scapy packet is built)
+    
+    Yields:
+        FrameInfo: Decoded header fields in capture order
+    """
+    if engine not in ('fast', 'scapy', 'numpy'):
+        raise ValueError(f"Unknown engine: {engine}")
+    use_index = index is not None and (query or not index.is_current())
+    if engine == 'scapy' and not use_index and packet_filter is None:
+        for packet in iter_packets(pcap_file, stream):
+            yield summarize_packet(packet)
+        return
+    
+    if use_index:
+        if query:
+            records = index.iter_records(index.query(**query))
+        elif engine != 'scapy' and packet_filter is None:
+            yield from index.build_frames()
+            return
+        else:
+            index.build()
+            records = iter_mapped_records(pcap_file)
+    else:
+        records = iter_mapped_records(pcap_file)
+    for timestamp, length, linktype, frame in filter_records(records, packet_filter):
+        if engine == 'scapy':
+            yield _decode_with_scapy(linktype, frame, FrameInfo(timestamp, length))
+        else:
+            yield decode_frame(linktype, frame, timestamp, length)
+
+def run_analyzers(pcap_file, analyzers, engine='fast', stream=False, index=None, query=None,
+                  packet_filter=None):
+    """
+    Feed every frame of a PCAP file to several analyzers in a single pass
+    
+    The capture is read and decoded once; each analyzer only adds its own
+    per-frame work. The NumPy engine hands each analyzer whole batches
+    instead (see PacketAnalyzer.process_batch).
+    
+    Args:
+        pcap_file (str): Path to PCAP file
+        analyzers (list): PacketAnalyzer instances
+        engine (str): Packet decoding engine ('fast', 'scapy' or 'numpy')
+        stream (bool): Stream packets instead of loading the whole file
+        index (PcapIndex): Sidecar index to build or use
+        query (dict): Only process the records matching these
+            PcapIndex.query() arguments
+        packet_filter (PacketFilter): Only process the matching frames
+    
+    Returns:
+        int: Number of frames processed
+    """
+    count = 0
+    if engine == 'numpy' and index is None:
+        process = [analyzer.process_batch for analyzer in analyzers]
+        for batch in iter_frame_batches(pcap_file, packet_filter=packet_filter):
+            count += len(batch)
+            for handler in process:
+                handler(batch)
+    else:
+        process = [analyzer.process for analyzer in analyzers]
+        for info in iter_frames(pcap_file, engine, stream, index, query, packet_filter):
+            count += 1
+            for handler in process:
+                handler(info)
+    for analyzer in analyzers:
+        analyzer.finish()
+    return count
+
+def list_capture_files(path):
+    """
+    List the capture files to analyze for a file or directory path
+    
+    A directory (e.g. of rotated captures) yields every pcap/pcapng file
+    in it, in natural name order so capture.pcap10 follows capture.pcap9.
+    
+    Args:
+        path (str): Capture file or directory
+    
+    Returns:
+        list: Capture file paths
+    """
+    if not os.path.isdir(path):
+        return [path]
+    
+    def natural_key(name):
+        return [int(part) if part.isdigit() else part
+                for part in re.split(r'(\d+)', name)]
+    
+    files = []
+    for name in sorted(os.listdir(path), key=natural_key):
+        file_path = os.path.join(path, name)
+        if os.path.isfile(file_path):
+            with open(file_path, 'rb') as f:
+                magic = f.read(4)
+            if magic in PCAP_MAGIC or magic == PCAPNG_MAGIC:
+                files.append(file_path)
+    return files
+
+def _run_shard(task):
+    """Run fresh analyzers over one byte range; also return where it stopped"""
+    pcap_file, start, end, names, options, engine, packet_filter = task
+    analyzers = [ANALYZERS[name](**options.get(name, {})) for name in names]
+    offset = start
+    if engine == 'numpy':
+        process = [analyzer.process_batch for analyzer in analyzers]
+        for batch in iter_frame_batches(pcap_file, start, end, packet_filter=packet_filter):
+            for handler in process:
+                handler(batch)
+            if offset is not None:
+                offset = batch.end_offset
+        for analyzer in analyzers:
+            analyzer.finish()
+        return analyzers, offset
+    
+    process = [analyzer.process for analyzer in analyzers]
+    match = packet_filter.match if packet_filter is not None else None
+    for timestamp, length, linktype, frame in iter_mapped_records(pcap_file, start, end):
+        if offset is not None:
+            offset += 16 + len(frame)
+        if match is not None and not match(linktype, frame):
+            continue
+        if engine == 'scapy':
+            info = _decode_with_scapy(linktype, frame, FrameInfo(timestamp, length))
+        else:
+            info = decode_frame(linktype, frame, timestamp, length)
+        for handler in process:
+            handler(info)
+    for analyzer in analyzers:
+        analyzer.finish()
+    return analyzers, offset
+
+def run_analyzers_parallel(path, names, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                           engine='fast', options=None, packet_filter=None):
+    """
+    Run registered analyzers over a capture file or directory in parallel
+    
+    Each capture is split into record-aligned byte ranges that are
+    processed by a pool of worker processes. Every worker builds its own
+    analyzers, and the partial results are merged in capture order, so
+    the merged results match a sequential run.
+    
+    Args:
+        path (str): Capture file or directory of rotated captures
+        names (list): Names of registered analyzers to run
+        workers (int): Number of worker processes (default: CPU count)
+        chunk_size (int): Approximate bytes per shard
+        engine (str): Packet decoding engine ('fast', 'scapy' or 'numpy')
+        options (dict): Constructor keyword arguments per analyzer name
+        packet_filter (PacketFilter): Only analyze the matching frames
+    
+    Returns:
+        list: Merged analyzers, in the order of names
+    """
+    options = options or {}
+    tasks = []
+    for pcap_file in list_capture_files(path):
+        for start, end in split_pcap(pcap_file, chunk_size):
+            tasks.append((pcap_file, start, end, names, options, engine, packet_filter))
+    print(f"[*] Analyzing {len(tasks)} shards with {workers or os.cpu_count()} workers")
+    
+    merged = [ANALYZERS[name](**options.get(name, {})) for name in names]
+    stop = None
+    with Pool(workers) as pool:
+        for task, (partial, offset) in zip(tasks, pool.imap(_run_shard, tasks)):
+            pcap_file, start, end = task[:3]
+            if start not in (None, 24) and start != stop:
+                # The boundary guess was wrong: the previous shard's last
+                # record ran past it. Redo this range from the true offset.
+                partial, offset = _run_shard((pcap_file, stop, end, names, options, engine,
+                                              packet_filter))
+            for analyzer, other in zip(merged, partial):
+                analyzer.merge(other)
+            stop = offset
+    return merged
+
+def analyze_pcap(pcap_file, stream=False, engine='fast', workers=1, approximate=False,
+                 capacity=DEFAULT_SKETCH_CAPACITY, precision=DEFAULT_HLL_PRECISION,
+                 index=False, query=None, packet_filter=None):
+    """
+    Analyze a PCAP file and extract statistics
+    
+    Args:
+        pcap_file (str): Path to PCAP file, or a directory of rotated
+            captures when running in parallel
+        stream (bool): Stream packets instead of loading the whole file
+        engine (str): Packet decoding engine ('fast', 'scapy' or 'numpy')
+        workers (int): Number of worker processes (1 for a single process)
+        approximate (bool): Use bounded-memory sketches instead of exact
+            counters (see SketchPacketStats)
+        capacity (int): Counters per top-N table in approximate mode
+        precision (int): HyperLogLog index bits in approximate mode
+        index (bool): Build (or reuse) a sidecar index of the capture
+        query (dict): Only analyze the records matching these
+            PcapIndex.query() arguments (host, port, start_time, end_time)
+        packet_filter (PacketFilter): Only analyze the matching frames
+    
+    Returns:
+        dict: Analysis results
+    """
+    print(f"[*] Reading PCAP file: {pcap_file}")
+    
+    name = 'sketch' if approximate else 'stats'
+    options = {'sketch': {'capacity': capacity, 'precision': precision}}
+    pcap_index = open_index(pcap_file, index, query)
+    if workers != 1 or os.path.isdir(pcap_file):
+        if pcap_index is not None:
+            raise ValueError("Indexed analysis runs in a single process")
+        stats, = run_analyzers_parallel(pcap_file, [name], workers or None, engine=engine,
+                                        options=options, packet_filter=packet_filter)
+    else:
+        stats = ANALYZERS[name](**options.get(name, {}))
+        run_analyzers(pcap_file, [stats], engine, stream, pcap_index, query, packet_filter)
+        if pcap_index is not None:
+            pcap_index.close()
+    
+    if (stream or engine != 'scapy' or workers != 1 or pcap_index is not None
+            or packet_filter is not None):
+        print(f"[+] Processed {stats.total_packets} packets")
+        print()
+    
+    # Print results
+    stats.print_results()
+    
+    # Return results as dictionary
+    return stats.results()
+
+@register_analyzer
+class SketchPacketStats(PacketStats):
+    """
+    Bounded-memory approximate version of PacketStats
+    
+    IP address and port counters are Space-Saving summaries with a fixed
+    number of counters, so memory does not grow with the number of
+    distinct keys. HyperLogLog estimators count unique IPs and ports.
+    """
+    
+    name = 'sketch'
+    bounded = True
+    
+    def __init__(self, capacity=DEFAULT_SKETCH_CAPACITY, precision=DEFAULT_HLL_PRECISION):
+        """
+        Initialize empty sketches
+        
+        Args:
+            capacity (int): Counters per top-N table
+            precision (int): HyperLogLog index bits
+        """
+        super().__init__()
+        self.src_ips = SpaceSaving(capacity)
+        self.dst_ips = SpaceSaving(capacity)
+        self.src_ports = SpaceSaving(capacity)
+        self.dst_ports = SpaceSaving(capacity)
+        self.unique_ips = HyperLogLog(precision)
+        self.unique_ports = HyperLogLog(precision)
+    
+    def add_frame(self, info):
+        """
+        Update the sketches with the decoded headers of a single frame
+        
+        Args:
+            info (FrameInfo): Decoded header fields
+        """
+        self.total_packets += 1
+        
+        protocol = info.protocol
+        if protocol is not None:
+            self.protocol_count[protocol] += 1
+            if info.sport is not None:
+                self.src_ports.add(info.sport)
+                self.dst_ports.add(info.dport)
+                self.unique_ports.add(info.sport)
+                self.unique_ports.add(info.dport)
+        
+        if info.ip_src is not None:
+            self.src_ips.add(info.ip_src)
+            self.dst_ips.add(info.ip_dst)
+            self.unique_ips.add(info.ip_src)
+            self.unique_ips.add(info.ip_dst)
+    
+    process = add_frame
+    
+    def process_batch(self, batch):
+        """
+        Update the sketches with a whole FrameBatch at once
+        
+        Each distinct key is added once with its count in the batch, so
+        top-N estimates can differ slightly from per-frame updates
+        (within the same error bounds); distinct counts are identical.
+        
+        Args:
+            batch (FrameBatch): Decoded header fields of several frames
+        """
+        self.total_packets += len(batch)
+        for value, count in batch.counts('protocol'):
+            self.protocol_count[value] += count
+        for sketch, unique, field in ((self.src_ports, self.unique_ports, 'sport'),
+                                      (self.dst_ports, self.unique_ports, 'dport'),
+                                      (self.src_ips, self.unique_ips, 'ip_src'),
+                                      (self.dst_ips, self.unique_ips, 'ip_dst')):
+            for value, count in batch.counts(field):
+                sketch.add(value, count)
+                unique.add(value)
+    
+    def merge(self, other):
+        """
+        Merge the sketches of another SketchPacketStats
+        
+        Args:
+            other (SketchPacketStats): Sketches from another shard or file
+        """
+        self.total_packets += other.total_packets
+        self.protocol_count.update(other.protocol_count)
+        for field in ('src_ips', 'dst_ips', 'src_ports', 'dst_ports',
+                      'unique_ips', 'unique_ports'):
+            getattr(self, field).merge(getattr(other, field))
+    
+    def print_results(self):
+        """Print the approximate analysis results"""
+        super().print_results()
+        
+        print("Approximate Distinct Counts:")
+        print("-" * 30)
+        error = self.unique_ips.standard_error() * 100
+        print(f"Unique IP addresses: ~{self.unique_ips.count()} (±{error:.2f}%)")
+        print(f"Unique ports: ~{self.unique_ports.count()} (±{error:.2f}%)")
+        print(f"Top-N counts overestimate by at most: "
+              f"{self.src_ips.error_bound()} (IPs), {self.src_ports.error_bound()} (ports)")
+        print()
+    
+    def results(self):
+        """
+        Get the approximate analysis results
+        
+        Returns:
+            dict: Analysis results with the same keys as PacketStats plus
+                distinct counts and error bounds
+        """
+        results = super().results()
+        results['approximate'] = {
+            'unique_ips': self.unique_ips.count(),
+            'unique_ports': self.unique_ports.count(),
+            'distinct_std_error': self.unique_ips.standard_error(),
+            'max_count_error': {
+                'src_ips': self.src_ips.error_bound(),
+                'dst_ips': self.dst_ips.error_bound(),
+                'src_ports': self.src_ports.error_bound(),
+                'dst_ports': self.dst_ports.error_bound()
+            }
+        }
+        return results
+
+class RollingStats(PacketAnalyzer):
+    """
+    Sliding-window statistics for live captures
+    
+    The window is a ring of time buckets, each holding bounded sketches
+    (a SketchPacketStats), so memory depends only on the number of
+    buckets and the sketch capacity however long the capture runs. Every
+    snapshot interval the buckets still inside the window are merged
+    into a snapshot. Buckets and snapshots follow capture timestamps,
+    so a replayed pcap yields the same snapshots at any replay rate;
+    while the source is idle, capture time is extrapolated from the wall
+    clock (see tick()).
+    """
+    
+    name = 'rolling'
+    bounded = True
+    
+    def __init__(self, window=DEFAULT_WINDOW, bucket=DEFAULT_BUCKET,
+                 interval=DEFAULT_SNAPSHOT_INTERVAL, capacity=DEFAULT_SKETCH_CAPACITY,
+                 precision=DEFAULT_HLL_PRECISION, on_snapshot=None):
+        """
+        Initialize an empty window
+        
+        Args:
+            window (float): Seconds of traffic covered by each snapshot
+            bucket (float): Seconds per bucket (the window granularity)
+            interval (float): Seconds between snapshots
+            capacity (int): Counters per top-N table in each bucket
+            precision (int): HyperLogLog index bits in each bucket
+            on_snapshot (callable): Called with each snapshot dict
+                (default: print it)
+        """
+        self.window = window
+        self.bucket = bucket
+        self.interval = interval
+        self.capacity = capacity
+        self.precision = precision
+        self.on_snapshot = on_snapshot or self.print_snapshot
+        self.buckets = deque(maxlen=max(1, math.ceil(window / bucket)))
+        self.next_snapshot = None
+        self.last_timestamp = None
+        self.total_packets = 0
+        self.snapshots = 0
+        self.last_snapshot = None
+    
+    def process(self, info):
+        """
+        Add a single frame to the current bucket
+        
+        Args:
+            info (FrameInfo): Decoded header fields
+        """
+        timestamp = info.timestamp
+        self._advance(timestamp)
+        index = int(timestamp // self.bucket)
+        buckets = self.buckets
+        if not buckets or index > buckets[-1][0]:
+            buckets.append((index, SketchPacketStats(self.capacity, self.precision)))
+        buckets[-1][1].add_frame(info)
+        self.total_packets += 1
+        self.last_timestamp = timestamp
+    
+    def tick(self, idle):
+        """
+        Emit the snapshots that fall due while no frames arrive
+        
+        Capture time is taken to advance with the wall clock from the
+        last frame, so snapshots keep coming (showing traffic leaving
+        the window) on a quiet link.
+        
+        Args:
+            idle (float): Seconds since the last frame was processed
+        """
+        if self.last_timestamp is not None:
+            self._advance(self.last_timestamp + idle)
+    
+    def _advance(self, now):
+        """Emit a snapshot if capture time now has passed the next one"""
+        if self.next_snapshot is None:
+            self.next_snapshot = now + self.interval
+        elif now >= self.next_snapshot:
+            # After an idle period only the latest window is reported
+            self.snapshot(self.next_snapshot)
+            skipped = (now - self.next_snapshot) // self.interval
+            self.next_snapshot += (skipped + 1) * self.interval
+    
+    def snapshot(self, now):
+        """
+        Merge the buckets inside the window ending at now and emit them
+        
+        Args:
+            now (float): End of the window (capture time)
+        
+        Returns:
+            dict: PacketStats-style results plus window_start, window_end
+                and packets_per_second
+        """
+        merged = SketchPacketStats(self.capacity, self.precision)
+        oldest = (now - self.window) // self.bucket
+        for index, stats in self.buckets:
+            if index >= oldest:
+                merged.merge(stats)
+        
+        snapshot = merged.results()
+        snapshot['window_start'] = now - self.window
+        snapshot['window_end'] = now
+        snapshot['packets_per_second'] = merged.total_packets / self.window
+        self.snapshots += 1
+        self.last_snapshot = snapshot
+        self.on_snapshot(snapshot)
+        return snapshot
+    
+    def finish(self):
+        """Emit a final snapshot ending at the last packet"""
+        if self.last_timestamp is not None:
+            self.snapshot(self.last_timestamp)
+    
+    @staticmethod
+    def print_snapshot(snapshot):
+        """
+        Print a one-screen summary of a snapshot
+        
+        Args:
+            snapshot (dict): Snapshot from snapshot()
+        """
+        start = datetime.fromtimestamp(snapshot['window_start'], timezone.utc)
+        end = datetime.fromtimestamp(snapshot['window_end'], timezone.utc)
+        print(f"[+] {start:%Y-%m-%d %H:%M:%S} - {end:%H:%M:%S} UTC: "
+              f"{snapshot['total_packets']} packets ({snapshot['packets_per_second']:.1f} pps)")
+        protocols = sorted(snapshot['protocols'].items(), key=itemgetter(1), reverse=True)
+        print("    Protocols: " + ", ".join(f"{name} {count}" for name, count in protocols))
+        print("    Top sources: " + ", ".join(
+            f"{ip} {count}" for ip, count in list(snapshot['top_src_ips'].items())[:5]))
+        print("    Top destination ports: " + ", ".join(
+            f"{port} ({get_service_name(port)}) {count}"
+            for port, count in list(snapshot['top_dst_ports'].items())[:5]))
+        print(f"    Unique IPs: ~{snapshot['approximate']['unique_ips']}")
+    
+    def print_results(self):
+        """Print a summary of the live run"""
+        print(f"[+] Emitted {self.snapshots} snapshots over {self.total_packets} packets")
+        print()
+    
+    def results(self):
+        """
+        Get the most recent snapshot
+        
+        Returns:
+            dict: Last snapshot (None before the first one)
+        """
+        return self.last_snapshot
+
+def run_live(records, analyzers, engine='fast', packet_filter=None):
+    """
+    Feed frames from a live source to analyzers until it ends
+    
+    Stops when the source is exhausted or on Ctrl+C; either way each
+    analyzer's finish() is called. While the source is idle each
+    analyzer's tick() is called instead.
+    
+    Args:
+        records: Iterator of (timestamp, wire length, link type, frame),
+            or None while idle, e.g. from follow_pcap_records() or
+            iter_interface_records()
+        analyzers (list): PacketAnalyzer instances
+        engine (str): Packet decoding engine ('fast', 'scapy' or 'numpy')
+        packet_filter (PacketFilter): Only process matching frames
+    
+    Returns:
+        int: Number of frames processed
+    """
+    process = [analyzer.process for analyzer in analyzers]
+    tick = [analyzer.tick for analyzer in analyzers]
+    match = packet_filter.match if packet_filter is not None else None
+    count = 0
+    last_frame = time.monotonic()
+    try:
+        for record in records:
+            if record is None:
+                idle = time.monotonic() - last_frame
+                for handler in tick:
+                    handler(idle)
+                continue
+            timestamp, length, linktype, frame = record
+            if match is not None and not match(linktype, frame):
+                continue
+            if engine == 'scapy':
+                info = _decode_with_scapy(linktype, frame, FrameInfo(timestamp, length))
+            else:
+                info = decode_frame(linktype, frame, timestamp, length)
+            count += 1
+            last_frame = time.monotonic()
+            for handler in process:
+                handler(info)
+    except KeyboardInterrupt:
+        print("\n[*] Live capture stopped by user")
+    for analyzer in analyzers:
+        analyzer.finish()
+    return count
+
+def get_service_name(port):
+    """
+    Get common service name for a port number
+    
+    Args:
+        port (int): Port number
+    
+    Returns:
+        str: Service name
+    """
+    common_ports = {
+        20: 'FTP-DATA',
+        21: 'FTP',
+        22: 'SSH',
+        23: 'TELNET',
+        25: 'SMTP',
+        53: 'DNS',
+        80: 'HTTP',
+        110: 'POP3',
+        143: 'IMAP',
+        443: 'HTTPS',
+        445: 'SMB',
+        3306: 'MySQL',
+        3389: 'RDP',
+        5432: 'PostgreSQL',
+        8080: 'HTTP-ALT'
+    }
+    return common_ports.get(port, 'UNKNOWN')
+
+class FlowTable:
+    """
+    Bounded table of per-flow state
+    
+    Flows are kept in least-recently-seen order. The table never holds
+    more than max_flows entries (the least recently seen flow is evicted
+    first), and expire() evicts flows idle for longer than idle_timeout.
+    State objects must have a last_seen attribute.
+    """
+    
+    def __init__(self, max_flows=DEFAULT_MAX_FLOWS, idle_timeout=DEFAULT_FLOW_IDLE_TIMEOUT,
+                 on_evict=None):
+        """
+        Initialize an empty table
+        
+        Args:
+            max_flows (int): Maximum number of flows kept
+            idle_timeout (float): Seconds without packets before a flow expires
+            on_evict (callable): Called as on_evict(key, state, reason) for
+                every flow removed by the table ('lru', 'idle' or 'flush')
+        """
+        self.max_flows = max_flows
+        self.idle_timeout = idle_timeout
+        self.on_evict = on_evict
+        self.flows = OrderedDict()
+        self.evicted = Counter()
+    
+    def __len__(self):
+        return len(self.flows)
+    
+    def lookup(self, key, timestamp, factory):
+        """
+        Get the state of a flow, creating it if needed
+        
+        Args:
+            key: Flow key
+            timestamp (float): Time of the current packet
+            factory (callable): Creates the state of a new flow
+        
+        Returns:
+            Flow state
+        """
+        flows = self.flows
+        state = flows.get(key)
+        if state is None:
+            state = factory()
+            flows[key] = state
+            if len(flows) > self.max_flows:
+                old_key, old_state = flows.popitem(last=False)
+                self._evict(old_key, old_state, 'lru')
+        else:
+            flows.move_to_end(key)
+        state.last_seen = timestamp
+        return state
+    
+    def remove(self, key):
+        """Remove a flow without calling on_evict"""
+        return self.flows.pop(key, None)
+    
+    def expire(self, now):
+        """
+        Evict flows that have been idle for longer than the idle timeout
+        
+        Args:
+            now (float): Current time
+        """
+        flows = self.flows
+        while flows:
+            key, state = next(iter(flows.items()))
+            if now - state.last_seen <= self.idle_timeout:
+                break
+            del flows[key]
+            self._evict(key, state, 'idle')
+    
+    def flush(self):
+        """Evict every remaining flow"""
+        while self.flows:
+            key, state = self.flows.popitem(last=False)
+            self._evict(key, state, 'flush')
+    
+    def _evict(self, key, state, reason):
+        self.evicted[reason] += 1
+        if self.on_evict is not None:
+            self.on_evict(key, state, reason)
+
+class TCPStream:
+    """
+    One direction of a TCP connection
+    
+    Delivers payload bytes to a consumer strictly in sequence order.
+    Out-of-order segments are held until the gap before them is filled,
+    up to max_pending bytes; beyond that the gap is skipped and the
+    consumer is told about it.
+    """
+    
+    __slots__ = ('consumer', 'next_seq', 'pending', 'pending_bytes', 'fin')
+    
+    def __init__(self, consumer):
+        """
+        Args:
+            consumer: Object with feed(data, timestamp) and gap() methods
+        """
+        self.consumer = consumer
+        self.next_seq = None
+        self.pending = {}
+        self.pending_bytes = 0
+        self.fin = False
+    
+    def add_segment(self, seq, flags, payload, timestamp, max_pending):
+        """
+        Add a TCP segment sent in this direction
+        
+        Args:
+            seq (int): Sequence number
+            flags (int): TCP flags
+            payload (bytes): Segment payload (bytes or memoryview)
+            timestamp (float): Capture time
+            max_pending (int): Maximum out-of-order bytes held
+        """
+        if flags & TCP_SYN:
+            self.next_seq = (seq + 1) & SEQ_MASK
+            seq = self.next_seq
+        elif self.next_seq is None:
+            # Joined mid-stream: earlier bytes were never seen
+            self.next_seq = seq
+            self.consumer.gap()
+        if flags & TCP_FIN:
+            self.fin = True
+        if not payload:
+            return
+        
+        offset = (self.next_seq - seq) & SEQ_MASK
+        if offset >= SEQ_HALF:
+            # Segment starts after a gap: hold it until the gap is filled
+            held = self.pending.get(seq, b'')
+            if len(payload) > len(held):
+                self.pending_bytes += len(payload) - len(held)
+                self.pending[seq] = bytes(payload)  # May be a view of the capture
+            if self.pending_bytes > max_pending:
+                self.consumer.gap()
+                next_seq = self.next_seq
+                self.next_seq = min(self.pending, key=lambda s: (s - next_seq) & SEQ_MASK)
+                self._drain(timestamp)
+            return
+        if offset < len(payload):
+            self._deliver(payload[offset:], timestamp)
+            self._drain(timestamp)
+    
+    def _deliver(self, data, timestamp):
+        self.consumer.feed(data, timestamp)
+        self.next_seq = (self.next_seq + len(data)) & SEQ_MASK
+    
+    def _drain(self, timestamp):
+        """Deliver held segments that are now in sequence"""
+        pending = self.pending
+        while pending:
+            data = pending.pop(self.next_seq, None)
+            if data is not None:
+                self.pending_bytes -= len(data)
+                self._deliver(data, timestamp)
+                continue
+            # Segments overlapping data that was already delivered
+            for seq in list(pending):
+                offset = (self.next_seq - seq) & SEQ_MASK
+                if offset < SEQ_HALF:
+                    data = pending.pop(seq)
+                    self.pending_bytes -= len(data)
+                    if offset < len(data):
+                        self._deliver(data[offset:], timestamp)
+                    break
+            else:
+                return
+
+class TCPConnection:
+    """Reassembly state of both directions of a TCP connection"""
+    
+    __slots__ = ('streams', 'context', 'last_seen')
+    
+    def __init__(self):
+        self.streams = {}     # (src, sport) of the sender -> TCPStream
+        self.context = None   # Free for use by the stream consumers
+        self.last_seen = 0.0
+
+class TCPReassembler:
     """
-    Analyze a PCAP file and extract statistics
+    Flow-table based TCP stream reassembly
     
-    Args:
-        pcap_file (str): Path to PCAP file
+    Connections are keyed by their (unordered) pair of endpoints. Each
+    direction gets its own consumer from stream_factory, which receives
+    the payload in order. Memory is bounded by the flow table size and
+    the out-of-order budget per direction; idle connections are evicted.
+    """
     
-    Returns:
-        dict: Analysis results
+    def __init__(self, stream_factory, max_flows=DEFAULT_MAX_FLOWS,
+                 idle_timeout=DEFAULT_FLOW_IDLE_TIMEOUT, max_pending=DEFAULT_MAX_PENDING_BYTES):
+        """
+        Initialize the reassembler
+        
+        Args:
+            stream_factory (callable): Called as stream_factory(connection,
+                (src, sport), (dst, dport)) for each new direction; returns a
+                consumer with feed(data, timestamp), gap() and close() methods
+            max_flows (int): Maximum number of connections tracked
+            idle_timeout (float): Seconds of inactivity before eviction
+            max_pending (int): Out-of-order bytes held per direction
+        """
+        self.stream_factory = stream_factory
+        self.max_pending = max_pending
+        self.table = FlowTable(max_flows, idle_timeout, self._on_evict)
+        self._next_expire = None
+    
+    def process(self, info):
+        """
+        Add a decoded TCP segment
+        
+        Args:
+            info (FrameInfo): Decoded header fields
+        """
+        if info.protocol != 'TCP' or info.src is None:
+            return
+        timestamp = info.timestamp
+        if self._next_expire is None or timestamp >= self._next_expire:
+            self.table.expire(timestamp)
+            self._next_expire = timestamp + 1.0
+        
+        sender = (info.src, info.sport)
+        receiver = (info.dst, info.dport)
+        key = (sender, receiver) if sender <= receiver else (receiver, sender)
+        connection = self.table.lookup(key, timestamp, TCPConnection)
+        
+        stream = connection.streams.get(sender)
+        if stream is None:
+            stream = TCPStream(self.stream_factory(connection, sender, receiver))
+            connection.streams[sender] = stream
+        
+        flags = info.tcp_flags
+        stream.add_segment(info.seq, flags, info.payload, timestamp, self.max_pending)
+        
+        if flags & TCP_RST or (stream.fin and all(s.fin for s in connection.streams.values())
+                               and len(connection.streams) == 2):
+            self.table.remove(key)
+            self._close(connection)
+    
+    def flush(self):
+        """Close every connection that is still open"""
+        self.table.flush()
+    
+    def _on_evict(self, key, connection, reason):
+        self._close(connection)
+    
+    def _close(self, connection):
+        for stream in connection.streams.values():
+            stream.consumer.close()
+
+class HTTPStreamParser:
     """
-    print(f"[*] Reading PCAP file: {pcap_file}")
-    packets = rdpcap(pcap_file)
-    print(f"[+] Loaded {len(packets)} packets")
-    print()
+    Incremental HTTP/1.x parser for one direction of a TCP stream
     
-    # Initialize counters
-    protocol_count = Counter()
-    src_ips = Counter()
-    dst_ips = Counter()
-    src_ports = Counter()
-    dst_ports = Counter()
+    Detects requests and responses from the first bytes of the stream,
+    so HTTP is found on any port; streams that start with anything else
+    are ignored. After lost bytes the parser waits for a segment that
+    starts a new message. Heads and chunk-size lines are parsed straight
+    from each segment; only one that continues into a later segment is
+    buffered (up to max_header_size). Bodies are skipped on the incoming
+    bytes using Content-Length or chunked framing, so they are never
+    copied.
+    """
     
-    # Analyze packets
-    for packet in packets:
-        # Protocol analysis
-        if packet.haslayer(TCP):
-            protocol_count['TCP'] += 1
-            src_ports[packet[TCP].sport] += 1
-            dst_ports[packet[TCP].dport] += 1
-        elif packet.haslayer(UDP):
-            protocol_count['UDP'] += 1
-            src_ports[packet[UDP].sport] += 1
-            dst_ports[packet[UDP].dport] += 1
-        elif packet.haslayer(ICMP):
-            protocol_count['ICMP'] += 1
-        elif packet.haslayer(ARP):
-            protocol_count['ARP'] += 1
+    def __init__(self, on_request, on_response, max_header_size=HTTP_MAX_HEADER_SIZE):
+        """
+        Initialize the parser
         
-        # IP address analysis
-        if packet.haslayer(IP):
-            src_ips[packet[IP].src] += 1
-            dst_ips[packet[IP].dst] += 1
+        Args:
+            on_request (callable): Called as on_request(method, uri, version,
+                headers, timestamp) for each request head
+            on_response (callable): Called as on_response(version, status,
+                reason, headers, timestamp) for each response head; returns
+                the method of the matching request, if known
+            max_header_size (int): Maximum size of a message head
+        """
+        self.on_request = on_request
+        self.on_response = on_response
+        self.max_header_size = max_header_size
+        self.buffer = bytearray()
+        self.body_remaining = 0
+        self.chunked = False
+        self.chunk_trailer = False
+        self.until_close = False
+        self.ignore = False
+        self.resync = False
     
-    # Print results
-    print("=" * 60)
-    print("PACKET ANALYSIS RESULTS")
-    print("=" * 60)
-    print()
+    def feed(self, data, timestamp):
+        """
+        Parse the next in-order bytes of the stream
+        
+        Args:
+            data (bytes): Stream bytes (bytes or memoryview)
+            timestamp (float): Capture time of the segment
+        """
+        if self.ignore or self.until_close:
+            return
+        if self.resync:
+            if not _looks_like_http(data):
+                return
+            self.resync = False
+        buf = self.buffer
+        view = memoryview(data)
+        pos, size = 0, len(view)
+        while pos < size and not self.ignore:
+            if self.body_remaining:
+                skip = min(self.body_remaining, size - pos)
+                pos += skip
+                self.body_remaining -= skip
+            elif self.until_close:
+                return
+            elif buf:
+                # Complete the head or line started in an earlier segment,
+                # buffering only this segment's part of it
+                end = _find_end(buf, view, pos, HTTP_LINE_END if self.chunked else HTTP_HEAD_END)
+                buf += view[pos:end]
+                pos = end
+                consumed = self._parse(buf, 0, timestamp)
+                if consumed is None:
+                    break
+                del buf[:consumed]
+            else:
+                end = self._parse(view, pos, timestamp)
+                if end is None:
+                    if not self.ignore:
+                        buf += view[pos:]  # Incomplete: continued in the next segment
+                    break
+                pos = end
+        if self.ignore:
+            buf.clear()
     
-    print("Protocol Distribution:")
-    print("-" * 30)
-    for protocol, count in protocol_count.most_common():
-        percentage = (count / len(packets)) * 100
-        print(f"{protocol}: {count} packets ({percentage:.2f}%)")
-    print()
+    def _parse(self, data, pos, timestamp):
+        """Parse a chunk-size line or message head at data[pos:]; returns its end, or None"""
+        if self.chunked:
+            return self._parse_chunk_line(data, pos)
+        return self._parse_head(data, pos, timestamp)
     
-    print("Top 10 Source IP Addresses:")
-    print("-" * 30)
-    for ip, count in src_ips.most_common(10):
-        print(f"{ip}: {count} packets")
-    print()
+    def gap(self):
+        """Stream bytes were lost; resynchronise on the next message"""
+        self.buffer.clear()
+        self.body_remaining = 0
+        self.chunked = self.chunk_trailer = self.until_close = False
+        self.resync = not self.ignore
     
-    print("Top 10 Destination IP Addresses:")
-    print("-" * 30)
-    for ip, count in dst_ips.most_common(10):
-        print(f"{ip}: {count} packets")
-    print()
+    def close(self):
+        """The connection was closed or evicted"""
+        self.buffer = bytearray()
     
-    print("Top 10 Source Ports:")
-    print("-" * 30)
-    for port, count in src_ports.most_common(10):
-        print(f"Port {port}: {count} packets")
-    print()
+    def _parse_chunk_line(self, data, pos):
+        match = HTTP_LINE_END.search(data, pos, pos + self.max_header_size + 2)
+        if match is None:
+            if len(data) - pos > self.max_header_size:
+                self.ignore = True
+            return None
+        line = bytes(data[pos:match.start()])
+        if self.chunk_trailer:
+            if not line:
+                self.chunked = self.chunk_trailer = False
+            return match.end()
+        try:
+            size = int(line.split(b';', 1)[0], 16)
+        except ValueError:
+            self.ignore = True
+            return None
+        if size:
+            self.body_remaining = size + 2  # Chunk data and its CRLF
+        else:
+            self.chunk_trailer = True
+        return match.end()
     
-    print("Top 10 Destination Ports:")
-    print("-" * 30)
-    for port, count in dst_ports.most_common(10):
-        service = get_service_name(port)
-        print(f"Port {port} ({service}): {count} packets")
-    print()
+    def _parse_head(self, data, pos, timestamp):
+        start = data[pos:pos + HTTP_DETECT_BYTES]
+        if not _looks_like_http(start):
+            if len(start) >= HTTP_DETECT_BYTES or not _may_become_http(start):
+                self.ignore = True
+            return None
+        match = HTTP_HEAD_END.search(data, pos, pos + self.max_header_size + 4)
+        if match is None:
+            if len(data) - pos > self.max_header_size:
+                self.ignore = True
+            return None
+        lines = bytes(data[pos:match.start()]).decode('latin-1').split('\r\n')
+        
+        start_line = lines[0].split(' ', 2)
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        
+        if start_line[0].startswith('HTTP/'):
+            try:
+                status = int(start_line[1])
+            except (IndexError, ValueError):
+                self.ignore = True
+                return None
+            reason = start_line[2] if len(start_line) > 2 else ''
+            method = self.on_response(start_line[0], status, reason, headers, timestamp)
+            if status < 200 or status in (204, 304) or method == 'HEAD':
+                return match.end()
+            self._set_body(headers, until_close=True)
+        else:
+            uri = start_line[1] if len(start_line) > 1 else 'N/A'
+            version = start_line[2] if len(start_line) > 2 else ''
+            self.on_request(start_line[0], uri, version, headers, timestamp)
+            self._set_body(headers, until_close=False)
+        return match.end()
     
-    # Return results as dictionary
-    return {
-        'total_packets': len(packets),
-        'protocols': dict(protocol_count),
-        'top_src_ips': dict(src_ips.most_common(10)),
-        'top_dst_ips': dict(dst_ips.most_common(10)),
-        'top_src_ports': dict(src_ports.most_common(10)),
-        'top_dst_ports': dict(dst_ports.most_common(10))
-    }
+    def _set_body(self, headers, until_close):
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            self.chunked = True
+        elif 'content-length' in headers:
+            try:
+                self.body_remaining = max(0, int(headers['content-length']))
+            except ValueError:
+                self.ignore = True
+        elif until_close:
+            self.until_close = True
 
-def get_service_name(port):
+def _find_end(buf, data, pos, pattern):
     """
-    Get common service name for a port number
+    End of the first match of a terminator in buf + data[pos:], as an
+    offset into data (len(data) if there is none)
     
-    Args:
-        port (int): Port number
+    Only the last bytes of buf are searched: it holds no complete match.
+    """
+    tail = bytes(buf[-(len(pattern.pattern) - 1):])
+    match = pattern.search(tail + bytes(data[pos:pos + len(pattern.pattern) - 1]))
+    if match is not None:
+        return pos + match.end() - len(tail)
+    match = pattern.search(data, pos)
+    return len(data) if match is None else match.end()
+
+def _looks_like_http(buf):
+    """True if a buffer starts with an HTTP request or response line"""
+    return bytes(buf[:HTTP_DETECT_BYTES]).startswith(HTTP_START_TOKENS)
+
+def _may_become_http(buf):
+    """True if a short buffer is a prefix of an HTTP start token"""
+    return any(token.startswith(bytes(buf)) for token in HTTP_START_TOKENS)
+
+@register_analyzer
+class HTTPRequestExtractor(PacketAnalyzer):
+    """
+    Extract HTTP/1.x requests from reassembled TCP streams on any port
+    
+    Requests split across segments or sent out of order are recovered,
+    and each request is paired with the status of its response. In
+    parallel mode connections that span two shards are only seen
+    partially.
+    """
+    
+    name = 'http'
+    
+    def __init__(self, max_flows=DEFAULT_MAX_FLOWS, idle_timeout=DEFAULT_FLOW_IDLE_TIMEOUT,
+                 max_pending=DEFAULT_MAX_PENDING_BYTES):
+        """
+        Initialize an empty request list
+        
+        Args:
+            max_flows (int): Maximum number of TCP connections tracked
+            idle_timeout (float): Seconds of inactivity before a connection
+                is evicted
+            max_pending (int): Out-of-order bytes held per direction
+        """
+        self.http_requests = []
+        self.reassembler = TCPReassembler(self._new_stream, max_flows,
+                                          idle_timeout, max_pending)
+    
+    def __getstate__(self):
+        # Open connections are not sent back from worker processes
+        state = self.__dict__.copy()
+        state['reassembler'] = None
+        return state
+    
+    def process(self, info):
+        """
+        Feed a TCP segment to the reassembler
+        
+        Args:
+            info (FrameInfo): Decoded header fields
+        """
+        if info.protocol == 'TCP':
+            self.reassembler.process(info)
+    
+    def finish(self):
+        """Close the connections that are still open"""
+        self.reassembler.flush()
+    
+    def _new_stream(self, connection, sender, receiver):
+        """Create the HTTP parser for one direction of a connection"""
+        if connection.context is None:
+            # Requests waiting for their response, shared by both directions
+            connection.context = deque(maxlen=HTTP_MAX_PENDING_REQUESTS)
+        waiting = connection.context
+        
+        def on_request(method, uri, version, headers, timestamp):
+            request = {
+                'src': sender[0],
+                'dst': receiver[0],
+                'sport': sender[1],
+                'dport': receiver[1],
+                'method': method,
+                'uri': uri,
+                'version': version,
+                'host': headers.get('host'),
+                'user_agent': headers.get('user-agent'),
+                'timestamp': timestamp,
+                'status': None
+            }
+            self.http_requests.append(request)
+            waiting.append(request)
+        
+        def on_response(version, status, reason, headers, timestamp):
+            if not waiting:
+                return None
+            if status < 200:
+                return waiting[0]['method']  # Interim response
+            request = waiting.popleft()
+            request['status'] = status
+            return request['method']
+        
+        return HTTPStreamParser(on_request, on_response)
+    
+    def print_results(self):
+        """Print the first extracted requests"""
+        print(f"[+] Found {len(self.http_requests)} HTTP requests")
+        print()
+        
+        for i, req in enumerate(self.http_requests[:10], 1):
+            print(f"{i}. {req['method']} {req['uri']}")
+            print(f"   {req['src']} -> {req['dst']}")
+            print()
+    
+    def results(self):
+        """
+        Get the extracted requests
+        
+        Returns:
+            dict: Extracted HTTP requests
+        """
+        return {'http_requests': self.http_requests}
+    
+    def merge(self, other):
+        """
+        Append the requests found by another extractor
+        
+        Args:
+            other (HTTPRequestExtractor): Extractor from a later shard
+        """
+        self.http_requests.extend(other.http_requests)
+
+def _shannon_entropy(text):
+    """Shannon entropy of a string in bits per character"""
+    length = len(text)
+    return -sum(count / length * math.log2(count / length)
+                for count in Counter(text).values())
+
+def _parse_dns_name(buf, offset, end):
+    """
+    Read an uncompressed domain name (as found in the question section)
     
     Returns:
-        str: Service name
+        tuple: (lowercase name without the trailing dot, list of labels),
+            or None for compressed or truncated names
     """
-    common_ports = {
-        20: 'FTP-DATA',
-        21: 'FTP',
-        22: 'SSH',
-        23: 'TELNET',
-        25: 'SMTP',
-        53: 'DNS',
-        80: 'HTTP',
-        110: 'POP3',
-        143: 'IMAP',
-        443: 'HTTPS',
-        445: 'SMB',
-        3306: 'MySQL',
-        3389: 'RDP',
-        5432: 'PostgreSQL',
-        8080: 'HTTP-ALT'
-    }
-    return common_ports.get(port, 'UNKNOWN')
+    labels = []
+    while offset < end:
+        length = buf[offset]
+        if not length:
+            name = '.'.join(labels).lower()
+            return name, labels
+        if length & 0xC0:
+            return None
+        offset += 1
+        if offset + length > end:
+            return None
+        labels.append(bytes(buf[offset:offset + length]).decode('latin-1'))
+        offset += length
+    return None
+
+@register_analyzer
+class DNSAnalyzer(PacketAnalyzer):
+    """
+    DNS query/response analytics
+    
+    Queries and responses on port 53 (UDP, and TCP messages that fit in
+    one segment) are parsed straight from the payload and matched by
+    client, server and transaction ID in a bounded table. The analyzer
+    counts queries per domain, response codes per domain (NXDOMAIN
+    bursts point at DGAs), response latency, and the entropy of long
+    labels per registered domain (the last two labels), which is high
+    for data tunnelled through DNS names. Per-domain counts are
+    Space-Saving summaries and entropy is only kept for the domains
+    they monitor, so memory stays bounded however many names are seen.
+    In parallel mode transactions that span two shards count as
+    unanswered.
+    """
+    
+    name = 'dns'
+    bounded = True
+    
+    def __init__(self, max_pending=DEFAULT_DNS_MAX_PENDING, timeout=DEFAULT_DNS_TIMEOUT,
+                 capacity=DEFAULT_SKETCH_CAPACITY):
+        """
+        Initialize empty counters
+        
+        Args:
+            max_pending (int): Maximum queries awaiting a response
+            timeout (float): Seconds after which a query is unanswered
+            capacity (int): Domains tracked per top-N table
+        """
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = OrderedDict()
+        self.queries = 0
+        self.responses = 0
+        self.answered = 0
+        self.unanswered = 0
+        self.evicted = 0
+        self.unmatched_responses = 0
+        self.malformed = 0
+        self.domain_queries = SpaceSaving(capacity)
+        self.domain_nxdomain = SpaceSaving(capacity)
+        self.rcodes = Counter()
+        self.latency_histogram = [0] * (len(DNS_LATENCY_BUCKETS_MS) + 1)
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.long_labels = SpaceSaving(capacity)
+        self.entropy = {}  # Monitored domain -> [labels, entropy total, max]
+    
+    def __getstate__(self):
+        # Outstanding queries are counted as unanswered by finish()
+        state = self.__dict__.copy()
+        state['pending'] = None
+        return state
+    
+    def process(self, info):
+        """
+        Parse a DNS message carried by a single frame
+        
+        Args:
+            info (FrameInfo): Decoded header fields
+        """
+        if info.sport != DNS_PORT and info.dport != DNS_PORT:
+            return
+        frame, start, end = info.frame, info.payload_offset, info.payload_end
+        if info.protocol == 'TCP':
+            if end - start < 2:
+                return  # Handshake, teardown and bare ACKs
+            if (frame[start] << 8) | frame[start + 1] != end - start - 2:
+                return  # Message split across segments (or several per segment)
+            start += 2
+        if end - start < 12:
+            self.malformed += 1
+            return
+        ident, flags, qdcount = struct.unpack_from('!HHH', frame, start)
+        question = None
+        if qdcount:
+            question = _parse_dns_name(frame, start + 12, end)
+            if question is None:
+                question = self._parse_with_scapy(frame[start:end])
+                if question is None:
+                    self.malformed += 1
+                    return
+        
+        timestamp = info.timestamp
+        if flags & 0x8000:
+            self._response(info, ident, flags & 0x0F, question, timestamp)
+        else:
+            self._query(info, ident, question, timestamp)
+    
+    def process_batch(self, batch):
+        """
+        Decode and parse only the rows of a FrameBatch on port 53
+        
+        Args:
+            batch (FrameBatch): Decoded header fields of several frames
+        """
+        process = self.process
+        for i in np.flatnonzero((batch.sport == DNS_PORT) | (batch.dport == DNS_PORT)).tolist():
+            process(decode_frame(int(batch.linktypes[i]), batch.frame(i),
+                                 float(batch.timestamps[i]), int(batch.lengths[i])))
+    
+    @staticmethod
+    def _parse_with_scapy(message):
+        """Question name of a message the fast parser cannot read"""
+        try:
+            qname = DNS(bytes(message)).qd[0].qname
+        except Exception:
+            return None
+        labels = qname.decode('latin-1').rstrip('.').split('.')
+        return '.'.join(labels).lower(), labels
+    
+    def _query(self, info, ident, question, timestamp):
+        self.queries += 1
+        if question is not None:
+            name, labels = question
+            self.domain_queries.add(name)
+            for label in labels:
+                if len(label) >= DNS_LONG_LABEL:
+                    self._add_long_label(name, label)
+        
+        pending = self.pending
+        if pending and timestamp - next(iter(pending.values())) > self.timeout:
+            self._expire(timestamp)
+        key = (info.src, info.sport, info.dst, ident)
+        if key in pending:
+            del pending[key]  # Retransmission: time the latest attempt
+        elif len(pending) >= self.max_pending:
+            pending.popitem(last=False)
+            self.unanswered += 1
+            self.evicted += 1
+        pending[key] = timestamp
+    
+    def _response(self, info, ident, rcode, question, timestamp):
+        self.responses += 1
+        self.rcodes[DNS_RCODES.get(rcode, str(rcode))] += 1
+        if rcode == DNS_NXDOMAIN and question is not None:
+            self.domain_nxdomain.add(question[0])
+        
+        sent = self.pending.pop((info.dst, info.dport, info.src, ident), None)
+        if sent is None:
+            self.unmatched_responses += 1
+            return
+        self.answered += 1
+        latency = max(timestamp - sent, 0.0) * 1000
+        self.latency_histogram[bisect_left(DNS_LATENCY_BUCKETS_MS, latency)] += 1
+        self.latency_total += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+    
+    def _add_long_label(self, name, label):
+        domain = '.'.join(name.rsplit('.', 2)[-2:])
+        entropy = _shannon_entropy(label.lower())
+        evicted = self.long_labels.add(domain)
+        if evicted is not None:
+            del self.entropy[evicted]
+        stats = self.entropy.get(domain)
+        if stats is None:
+            self.entropy[domain] = [1, entropy, entropy]
+        else:
+            stats[0] += 1
+            stats[1] += entropy
+            if entropy > stats[2]:
+                stats[2] = entropy
+    
+    def _expire(self, now):
+        """Count queries older than the timeout as unanswered"""
+        pending = self.pending
+        cutoff = now - self.timeout
+        while pending:
+            key, sent = next(iter(pending.items()))
+            if sent >= cutoff:
+                break
+            del pending[key]
+            self.unanswered += 1
+    
+    def finish(self):
+        """Count the queries still waiting for a response as unanswered"""
+        self.unanswered += len(self.pending)
+        self.pending.clear()
+    
+    def nxdomain_rate(self):
+        """Share of responses that were NXDOMAIN"""
+        if not self.responses:
+            return 0.0
+        return self.rcodes['NXDOMAIN'] / self.responses
+    
+    def latency_buckets(self):
+        """
+        Response latency histogram
+        
+        Returns:
+            dict: Answered queries per bucket, keyed by upper bound in ms
+        """
+        labels = [f"<={bound}ms" for bound in DNS_LATENCY_BUCKETS_MS]
+        labels.append(f">{DNS_LATENCY_BUCKETS_MS[-1]}ms")
+        return dict(zip(labels, self.latency_histogram))
+    
+    def entropy_by_domain(self, limit=10):
+        """
+        Domains with the most random-looking long labels
+        
+        Args:
+            limit (int): Number of domains to return
+        
+        Returns:
+            dict: Long label count (since the domain was last admitted to
+                the summary), mean and max entropy (bits per character)
+                per domain, highest mean entropy first
+        """
+        top = heapq.nlargest(limit, self.entropy.items(),
+                             key=lambda item: item[1][1] / item[1][0])
+        return {domain: {'long_labels': labels,
+                         'mean_entropy': round(total / labels, 3),
+                         'max_entropy': round(maximum, 3)}
+                for domain, (labels, total, maximum) in top}
+    
+    def print_results(self):
+        """Print the DNS analysis results"""
+        print("DNS Analysis:")
+        print("-" * 30)
+        print(f"Queries: {self.queries}, responses: {self.responses}, "
+              f"answered: {self.answered}, unanswered: {self.unanswered}")
+        print(f"NXDOMAIN rate: {self.nxdomain_rate() * 100:.2f}%")
+        if self.answered:
+            print(f"Response latency: mean {self.latency_total / self.answered:.2f} ms, "
+                  f"max {self.latency_max:.2f} ms")
+        print()
+        
+        print("Top 10 Queried Domains:")
+        print("-" * 30)
+        for domain, count in self.domain_queries.most_common(10):
+            print(f"{domain}: {count} queries")
+        print()
+        
+        if self.domain_nxdomain.counts:
+            print("Top 10 NXDOMAIN Domains:")
+            print("-" * 30)
+            for domain, count in self.domain_nxdomain.most_common(10):
+                print(f"{domain}: {count} NXDOMAIN responses")
+            print()
+        
+        if self.answered:
+            print("Response Latency:")
+            print("-" * 30)
+            for bucket, count in self.latency_buckets().items():
+                print(f"{bucket}: {count}")
+            print()
+        
+        if self.entropy:
+            print(f"Long Labels (>= {DNS_LONG_LABEL} chars) by Entropy:")
+            print("-" * 30)
+            for domain, entry in self.entropy_by_domain().items():
+                print(f"{domain}: {entry['long_labels']} labels, "
+                      f"mean {entry['mean_entropy']:.2f} bits/char")
+            print()
+    
+    def results(self):
+        """
+        Get the DNS analysis results
+        
+        Returns:
+            dict: Query/response counts, response codes, top domains,
+                latency histogram and long label entropy
+        """
+        return {
+            'queries': self.queries,
+            'responses': self.responses,
+            'answered': self.answered,
+            'unanswered': self.unanswered,
+            'evicted': self.evicted,
+            'unmatched_responses': self.unmatched_responses,
+            'malformed': self.malformed,
+            'rcodes': dict(self.rcodes),
+            'nxdomain_rate': self.nxdomain_rate(),
+            'top_domains': dict(self.domain_queries.most_common(10)),
+            'top_nxdomain_domains': dict(self.domain_nxdomain.most_common(10)),
+            'latency_ms': {
+                'mean': self.latency_total / self.answered if self.answered else None,
+                'max': self.latency_max if self.answered else None,
+                'histogram': self.latency_buckets()
+            },
+            'long_label_entropy': self.entropy_by_domain()
+        }
+    
+    def merge(self, other):
+        """
+        Add the counters of another DNSAnalyzer
+        
+        Args:
+            other (DNSAnalyzer): Analyzer from a later shard
+        """
+        for field in ('queries', 'responses', 'answered', 'unanswered', 'evicted',
+                      'unmatched_responses', 'malformed', 'latency_total'):
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        self.latency_max = max(self.latency_max, other.latency_max)
+        self.latency_histogram = [a + b for a, b in zip(self.latency_histogram,
+                                                        other.latency_histogram)]
+        self.rcodes.update(other.rcodes)
+        for field in ('domain_queries', 'domain_nxdomain', 'long_labels'):
+            getattr(self, field).merge(getattr(other, field))
+        for domain, (labels, total, maximum) in other.entropy.items():
+            stats = self.entropy.setdefault(domain, [0, 0.0, 0.0])
+            stats[0] += labels
+            stats[1] += total
+            stats[2] = max(stats[2], maximum)
+        monitored = self.long_labels.counts
+        self.entropy = {domain: stats for domain, stats in self.entropy.items()
+                        if domain in monitored}
+
+class FlowRecord:
+    """Counters of one bidirectional flow, from the first sender's view"""
+    
+    __slots__ = ('src', 'dst', 'sport', 'dport', 'protocol', 'first_seen', 'last_seen',
+                 'packets', 'bytes', 'tcp_flags', 'reverse_packets', 'reverse_bytes',
+                 'reverse_tcp_flags')
+    
+    def __init__(self):
+        self.packets = self.bytes = self.tcp_flags = 0
+        self.reverse_packets = self.reverse_bytes = self.reverse_tcp_flags = 0
+        self.first_seen = self.last_seen = None
+    
+    def tcp_state(self):
+        """Summarize the TCP handshake and teardown seen in both directions"""
+        flags, reverse = self.tcp_flags, self.reverse_tcp_flags
+        if (flags | reverse) & TCP_RST:
+            return 'reset'
+        if flags & TCP_FIN and reverse & TCP_FIN:
+            return 'closed'
+        if not flags & TCP_SYN:
+            return 'midstream'
+        if reverse & TCP_SYN:
+            return 'established'
+        return 'attempt' if not self.reverse_packets else 'partial'
+    
+    def to_dict(self, end_reason):
+        """
+        Build the exported record
+        
+        Args:
+            end_reason (str): Why the flow was exported ('idle', 'active',
+                'lru' or 'flush')
+        
+        Returns:
+            dict: Flow record
+        """
+        return {
+            'src': self.src,
+            'dst': self.dst,
+            'sport': self.sport,
+            'dport': self.dport,
+            'protocol': self.protocol,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'duration': self.last_seen - self.first_seen,
+            'packets': self.packets,
+            'bytes': self.bytes,
+            'reverse_packets': self.reverse_packets,
+            'reverse_bytes': self.reverse_bytes,
+            'tcp_flags': self.tcp_flags if self.protocol == 'TCP' else None,
+            'reverse_tcp_flags': self.reverse_tcp_flags if self.protocol == 'TCP' else None,
+            'tcp_state': self.tcp_state() if self.protocol == 'TCP' else None,
+            'end_reason': end_reason
+        }
+
+@register_analyzer
+class FlowAggregator(PacketAnalyzer):
+    """
+    NetFlow/IPFIX-style bidirectional flow records
+    
+    IP packets are aggregated per bidirectional 5-tuple into packet and
+    byte counts per direction, first/last timestamps and OR-ed TCP flags
+    (as in IPFIX biflows, RFC 5103). A record is exported when its flow
+    has been idle for idle_timeout, every active_timeout for long-lived
+    flows, when the table is full (least recently seen flow first) and
+    at the end of the capture. Byte counts are wire lengths. In parallel
+    mode flows that span two shards are exported in two parts. Records
+    are streamed to a JSON Lines file; without one only the max_records
+    largest (by bytes in both directions) are kept, so memory stays
+    bounded on long captures.
+    """
+    
+    name = 'flows'
+    bounded = True
+    
+    def __init__(self, max_flows=DEFAULT_MAX_FLOWS, idle_timeout=DEFAULT_FLOW_IDLE_TIMEOUT,
+                 active_timeout=DEFAULT_FLOW_ACTIVE_TIMEOUT, output=None,
+                 max_records=DEFAULT_MAX_FLOW_RECORDS):
+        """
+        Initialize an empty flow table
+        
+        Args:
+            max_flows (int): Maximum number of flows tracked at once
+            idle_timeout (float): Seconds without packets before a flow is
+                exported
+            active_timeout (float): Seconds after which a flow that is
+                still active is exported and restarted
+            output (str): Stream records to this JSON Lines file instead
+                of keeping them in memory
+            max_records (int): Largest records kept in memory when there
+                is no output file
+        """
+        self.active_timeout = active_timeout
+        self.table = FlowTable(max_flows, idle_timeout, self._on_evict)
+        self.max_records = max_records
+        self.flow_records = []  # Min-heap of (bytes, sequence, record)
+        self._sequence = 0
+        self.exported = Counter()
+        self.output = output
+        self.output_file = open(output, 'w') if output else None
+        self._next_expire = None
+    
+    def __getstate__(self):
+        # Open flows are exported by finish() before leaving a worker
+        state = self.__dict__.copy()
+        state['output_file'] = None
+        return state
+    
+    def process(self, info):
+        """
+        Add a single frame to its flow
+        
+        Args:
+            info (FrameInfo): Decoded header fields
+        """
+        if info.src is None:
+            return
+        timestamp = info.timestamp
+        if self._next_expire is None or timestamp >= self._next_expire:
+            self.table.expire(timestamp)
+            self._next_expire = timestamp + 1.0
+        
+        sender = (info.src, info.sport)
+        receiver = (info.dst, info.dport)
+        if sender <= receiver:
+            key = (info.protocol, sender, receiver)
+        else:
+            key = (info.protocol, receiver, sender)
+        flow = self.table.lookup(key, timestamp, FlowRecord)
+        if flow.first_seen is not None and timestamp - flow.first_seen >= self.active_timeout:
+            # Long-lived flow: export what we have and start a new record
+            self.table.remove(key)
+            self._export(flow, 'active')
+            flow = self.table.lookup(key, timestamp, FlowRecord)
+        if flow.first_seen is None:
+            flow.src, flow.sport = sender
+            flow.dst, flow.dport = receiver
+            flow.protocol = info.protocol
+            flow.first_seen = timestamp
+        
+        if flow.src == info.src and flow.sport == info.sport:
+            flow.packets += 1
+            flow.bytes += info.length
+            flow.tcp_flags |= info.tcp_flags
+        else:
+            flow.reverse_packets += 1
+            flow.reverse_bytes += info.length
+            flow.reverse_tcp_flags |= info.tcp_flags
+    
+    def finish(self):
+        """Export the flows that are still open"""
+        self.table.flush()
+        if self.output_file is not None:
+            self.output_file.close()
+            self.output_file = None
+    
+    def _on_evict(self, key, flow, reason):
+        self._export(flow, reason)
+    
+    def _export(self, flow, reason):
+        record = flow.to_dict(reason)
+        self.exported[reason] += 1
+        if self.output_file is not None:
+            self.output_file.write(json.dumps(record) + '\n')
+        else:
+            self._keep(record)
+    
+    def _keep(self, record):
+        # The sequence number breaks ties so records are never compared
+        entry = (record['bytes'] + record['reverse_bytes'], self._sequence, record)
+        self._sequence += 1
+        if len(self.flow_records) < self.max_records:
+            heapq.heappush(self.flow_records, entry)
+        elif entry[0] > self.flow_records[0][0]:
+            heapq.heapreplace(self.flow_records, entry)
+    
+    def print_results(self):
+        """Print the largest conversations"""
+        total = sum(self.exported.values())
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in self.exported.most_common())
+        print(f"[+] Exported {total} flow records ({reasons or 'none'})")
+        if self.output:
+            print(f"[+] Flow records saved to: {self.output}")
+        print()
+        
+        if self.flow_records:
+            print("Top 10 Flows by Bytes:")
+            print("-" * 30)
+            for _, _, record in heapq.nlargest(10, self.flow_records):
+                state = f" [{record['tcp_state']}]" if record['tcp_state'] else ''
+                print(f"{record['src']}:{record['sport']} <-> {record['dst']}:{record['dport']} "
+                      f"{record['protocol'] or 'IP'}{state}: "
+                      f"{record['packets'] + record['reverse_packets']} packets, "
+                      f"{record['bytes'] + record['reverse_bytes']} bytes, "
+                      f"{record['duration']:.2f}s")
+            print()
+    
+    def results(self):
+        """
+        Get the flow records
+        
+        Returns:
+            dict: Flow records (the output file they were written to, or
+                the largest ones by bytes) and export counts per reason
+        """
+        results = {'flow_export_reasons': dict(self.exported)}
+        if self.output:
+            results['flow_records_file'] = self.output
+        else:
+            results['flow_records'] = [record for _, _, record
+                                       in sorted(self.flow_records, reverse=True)]
+        return results
+    
+    def merge(self, other):
+        """
+        Add the flow records of another aggregator
+        
+        Args:
+            other (FlowAggregator): Aggregator from a later shard
+        """
+        for _, _, record in sorted(other.flow_records, key=lambda entry: entry[1]):
+            self._keep(record)
+        self.exported.update(other.exported)
+
+@register_analyzer
+class ColumnarExporter(PacketAnalyzer):
+    """
+    Write one record per packet to a columnar file
+    
+    Records (timestamp, 5-tuple, length, TCP flags, protocol) are written
+    in batches, one Parquet row group or Arrow record batch each, so
+    memory stays bounded by the batch size. Later questions about the
+    capture can then be answered with vectorized queries (pandas,
+    pyarrow, DuckDB) instead of re-reading the pcap. Requires pyarrow.
+    
+    Runs sequentially or in live mode; parallel shards cannot share the
+    single output file, so it has no merge().
+    """
+    
+    name = 'export'
+    bounded = True
+    
+    def __init__(self, path, file_format=None, batch_size=DEFAULT_EXPORT_BATCH_SIZE):
+        """
+        Open the output file
+        
+        Args:
+            path (str): Output file
+            file_format (str): 'parquet' or 'arrow' (Arrow IPC file); inferred
+                from the file extension if None
+            batch_size (int): Rows per row group / record batch
+        """
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("Columnar export requires pyarrow (pip install pyarrow)")
+        
+        if file_format is None:
+            file_format = 'arrow' if path.endswith(('.arrow', '.feather', '.ipc')) else 'parquet'
+        if file_format not in ('parquet', 'arrow'):
+            raise ValueError(f"Unknown export format: {file_format}")
+        
+        self.pa = pyarrow
+        self.path = path
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.rows = 0
+        self.schema = pyarrow.schema([
+            ('timestamp', pyarrow.timestamp('us', tz='UTC')),
+            ('src', pyarrow.string()),
+            ('dst', pyarrow.string()),
+            ('sport', pyarrow.uint16()),
+            ('dport', pyarrow.uint16()),
+            ('protocol', pyarrow.string()),
+            ('length', pyarrow.uint32()),
+            ('tcp_flags', pyarrow.uint16())
+        ])
+        if file_format == 'parquet':
+            import pyarrow.parquet
+            self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        else:
+            import pyarrow.ipc
+            self.writer = pyarrow.ipc.new_file(path, self.schema)
+        self._reset_columns()
+    
+    def _reset_columns(self):
+        self.columns = {field: [] for field in self.schema.names}
+    
+    def process(self, info):
+        """
+        Add the record of a single packet
+        
+        Args:
+            info (FrameInfo): Decoded header fields
+        """
+        columns = self.columns
+        columns['timestamp'].append(round(info.timestamp * 1e6))
+        columns['src'].append(info.src)
+        columns['dst'].append(info.dst)
+        columns['sport'].append(info.sport)
+        columns['dport'].append(info.dport)
+        columns['protocol'].append(info.protocol)
+        columns['length'].append(info.length)
+        columns['tcp_flags'].append(info.tcp_flags if info.protocol == 'TCP' else None)
+        if len(columns['timestamp']) >= self.batch_size:
+            self._write_batch()
+    
+    def _write_batch(self):
+        count = len(self.columns['timestamp'])
+        if not count:
+            return
+        batch = self.pa.record_batch(
+            [self.pa.array(self.columns[field.name], type=field.type) for field in self.schema],
+            schema=self.schema)
+        self.writer.write_batch(batch)
+        self.rows += count
+        self._reset_columns()
+    
+    def finish(self):
+        """Write the last batch and close the file"""
+        self._write_batch()
+        self.writer.close()
+    
+    def print_results(self):
+        """Print a summary of the export"""
+        print(f"[+] Exported {self.rows} packet records to: {self.path} ({self.file_format})")
+        print()
+    
+    def results(self):
+        """
+        Get a summary of the export
+        
+        Returns:
+            dict: Output path, format and row count
+        """
+        return {'path': self.path, 'format': self.file_format, 'rows': self.rows}
 
-def extract_http_requests(pcap_file):
+def extract_http_requests(pcap_file, stream=False, engine='fast', index=False, query=None,
+                          packet_filter=None):
     """
     Extract HTTP requests from PCAP file
     
     Args:
         pcap_file (str): Path to PCAP file
+        stream (bool): Stream packets instead of loading the whole file
+        engine (str): Packet decoding engine ('fast', 'scapy' or 'numpy')
+        index (bool): Build (or reuse) a sidecar index of the capture
+        query (dict): Only read the records matching these
+            PcapIndex.query() arguments (host, port, start_time, end_time)
+        packet_filter (PacketFilter): Only read the matching frames
+    
+    Returns:
+        list: Extracted HTTP requests
     """
     print(f"[*] Extracting HTTP requests from: {pcap_file}")
-    packets = rdpcap(pcap_file)
-    
-    http_requests = []
-    for packet in packets:
-        if packet.haslayer(TCP) and packet.haslayer(IP):
-            if packet[TCP].dport == 80 or packet[TCP].sport == 80:
-                if packet.haslayer('Raw'):
-                    payload = packet['Raw'].load.decode('utf-8', errors='ignore')
-                    if payload.startswith('GET') or payload.startswith('POST'):
-                        http_requests.append({
-                            'src': packet[IP].src,
-                            'dst': packet[IP].dst,
-                            'method': payload.split()[0],
-                            'uri': payload.split()[1] if len(payload.split()) > 1 else 'N/A'
-                        })
-    
-    print(f"[+] Found {len(http_requests)} HTTP requests")
-    print()
     
-    for i, req in enumerate(http_requests[:10], 1):
-        print(f"{i}. {req['method']} {req['uri']}")
-        print(f"   {req['src']} -> {req['dst']}")
-        print()
+    extractor = HTTPRequestExtractor()
+    pcap_index = open_index(pcap_file, index, query)
+    run_analyzers(pcap_file, [extractor], engine, stream, pcap_index, query, packet_filter)
+    if pcap_index is not None:
+        pcap_index.close()
+    extractor.print_results()
+    
+    return extractor.http_requests
 
 def main():
     """Main function"""
@@ -176,29 +3815,251 @@ Examples:
   # Analyze a PCAP file
   python packet_analyzer.py capture.pcap
   
-  # Extract HTTP requests
+  # Extract HTTP requests (in the same pass as the statistics)
   python packet_analyzer.py capture.pcap --http
   
+  # Run additional registered analyzers
+  python packet_analyzer.py capture.pcap --analyzer http
+  
+  # DNS query/response analytics (top domains, NXDOMAIN rate, latency, entropy)
+  python packet_analyzer.py capture.pcap --dns
+  
   # Save results to JSON
   python packet_analyzer.py capture.pcap --output results.json
+  
+  # Only analyze matching packets (BPF-like filter, applied before decoding)
+  python packet_analyzer.py capture.pcap --filter "host 10.0.0.5 and tcp port 443"
+  python packet_analyzer.py capture.pcap --filter "net 192.168.0.0/16 and not (arp or icmp)"
+  
+  # Stream a large capture with constant memory use
+  python packet_analyzer.py capture.pcap --stream
+  
+  # Dissect every packet with Scapy instead of the raw-header fast path
+  python packet_analyzer.py capture.pcap --engine scapy
+  
+  # Count protocols, IPs and ports over NumPy arrays, one batch at a time
+  python packet_analyzer.py capture.pcap --engine numpy
+  
+  # Analyze a large capture or a directory of rotated captures on 32 cores
+  python packet_analyzer.py /evidence/captures/ --workers 32
+  
+  # NetFlow-style bidirectional flow records, streamed to JSON Lines
+  python packet_analyzer.py capture.pcap --analyzer flows --flows-output flows.jsonl
+  
+  # Export per-packet records for vectorized queries (requires pyarrow)
+  python packet_analyzer.py capture.pcap --export packets.parquet
+  
+  # Index the capture, then answer repeat questions from the index
+  python packet_analyzer.py capture.pcap --index
+  python packet_analyzer.py capture.pcap --host 10.0.0.5 --port 443 \\
+      --start-time 2026-01-10T08:00:00 --end-time 2026-01-10T09:00:00
+  
+  # Bounded-memory approximate top-N and distinct counts
+  python packet_analyzer.py capture.pcap --approximate --sketch-capacity 5000
+  
+  # Rolling 60 s statistics every 10 s from a live interface (requires root)
+  sudo python packet_analyzer.py --interface eth0 --window 60 --interval 10
+  
+  # ... or from a capture file that is still being written
+  python packet_analyzer.py /evidence/live.pcap --follow
+  
+  # Test live mode by replaying a capture through a pipe at 1000 pps
+  python packet_analyzer.py capture.pcap --replay --rate 1000 | \\
+      python packet_analyzer.py - --follow --snapshot-output snapshots.jsonl
         """
     )
     
-    parser.add_argument('pcap_file', help='Path to PCAP file')
+    parser.add_argument('pcap_file', nargs='?',
+                       help="Path to PCAP file (or directory with --workers, '-' for stdin with --follow)")
     parser.add_argument('--http', action='store_true', 
                        help='Extract HTTP requests')
+    parser.add_argument('--dns', action='store_true',
+                       help='Analyze DNS queries and responses')
+    parser.add_argument('--analyzer', action='append', default=[],
+                       choices=sorted(name for name, cls in ANALYZERS.items()
+                                      if not issubclass(cls, PacketStats)
+                                      and cls is not ColumnarExporter),
+                       help='Run an additional registered analyzer (repeatable)')
     parser.add_argument('--output', metavar='FILE', 
                        help='Save results to JSON file')
+    parser.add_argument('--filter', metavar='EXPR',
+                       help='Only analyze packets matching a BPF-like filter expression '
+                            '(host, net, port, portrange, proto, ip, ip6, arp, tcp, udp, icmp; '
+                            'and/or/not)')
+    parser.add_argument('--stream', action='store_true',
+                       help='Read packets one at a time instead of loading the whole file')
+    parser.add_argument('--engine', choices=['fast', 'scapy', 'numpy'], default='fast',
+                       help='Packet decoding engine (default: fast)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Number of worker processes; 0 uses all CPUs (default: 1)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE // (1024 * 1024),
+                       metavar='MB', help='Shard size for parallel analysis (default: 256)')
+    parser.add_argument('--max-dns-pending', type=int, default=DEFAULT_DNS_MAX_PENDING,
+                       help=f'Maximum DNS queries awaiting a response (default: {DEFAULT_DNS_MAX_PENDING})')
+    parser.add_argument('--dns-timeout', type=float, default=DEFAULT_DNS_TIMEOUT,
+                       help=f'Seconds before a DNS query counts as unanswered '
+                            f'(default: {DEFAULT_DNS_TIMEOUT:g})')
+    parser.add_argument('--flows-output', metavar='FILE',
+                       help='Stream flow records (--analyzer flows) to a JSON Lines file; '
+                            'without it only the --max-flow-records largest are kept')
+    parser.add_argument('--max-flow-records', type=int, default=DEFAULT_MAX_FLOW_RECORDS,
+                       help=f'Largest flow records kept in memory without --flows-output '
+                            f'(default: {DEFAULT_MAX_FLOW_RECORDS})')
+    parser.add_argument('--max-flows', type=int, default=DEFAULT_MAX_FLOWS,
+                       help=f'Maximum flows tracked at once (default: {DEFAULT_MAX_FLOWS})')
+    parser.add_argument('--flow-idle-timeout', type=float, default=DEFAULT_FLOW_IDLE_TIMEOUT,
+                       help=f'Export flows idle this many seconds (default: {DEFAULT_FLOW_IDLE_TIMEOUT:g})')
+    parser.add_argument('--flow-active-timeout', type=float, default=DEFAULT_FLOW_ACTIVE_TIMEOUT,
+                       help=f'Export long-lived flows every this many seconds '
+                            f'(default: {DEFAULT_FLOW_ACTIVE_TIMEOUT:g})')
+    parser.add_argument('--export', metavar='FILE',
+                       help='Write per-packet records to a Parquet or Arrow IPC file')
+    parser.add_argument('--export-format', choices=['parquet', 'arrow'],
+                       help='Export file format (default: from the file extension)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_EXPORT_BATCH_SIZE,
+                       help=f'Rows per exported row group (default: {DEFAULT_EXPORT_BATCH_SIZE})')
+    parser.add_argument('--index', action='store_true',
+                       help='Build (or reuse) a sidecar index for fast repeat queries')
+    parser.add_argument('--index-file', metavar='FILE',
+                       help='Index location (default: <pcap_file>.idx)')
+    parser.add_argument('--host', help='Only analyze packets to or from this IP (uses the index)')
+    parser.add_argument('--port', type=int,
+                       help='Only analyze packets to or from this port (uses the index)')
+    parser.add_argument('--start-time', type=_parse_time,
+                       help='Only analyze packets from this time on (epoch or ISO 8601, UTC)')
+    parser.add_argument('--end-time', type=_parse_time,
+                       help='Only analyze packets up to this time (epoch or ISO 8601, UTC)')
+    parser.add_argument('--approximate', action='store_true',
+                       help='Use bounded-memory sketches for top-N and distinct counts')
+    parser.add_argument('--sketch-capacity', type=int, default=DEFAULT_SKETCH_CAPACITY,
+                       help=f'Counters per top-N table, also used for DNS domains '
+                            f'(default: {DEFAULT_SKETCH_CAPACITY})')
+    parser.add_argument('--hll-precision', type=int, default=DEFAULT_HLL_PRECISION,
+                       help=f'HyperLogLog index bits (default: {DEFAULT_HLL_PRECISION})')
+    parser.add_argument('--follow', action='store_true',
+                       help='Rolling statistics over a growing pcap file or pipe '
+                            '(with bounded-memory analyzers only: dns, flows, sketch, --export)')
+    parser.add_argument('--interface', '-i',
+                       help='Rolling statistics over a live capture on this interface '
+                            '(same analyzers as --follow)')
+    parser.add_argument('--window', type=float, default=DEFAULT_WINDOW,
+                       help=f'Seconds covered by each rolling snapshot (default: {DEFAULT_WINDOW:g})')
+    parser.add_argument('--bucket', type=float, default=DEFAULT_BUCKET,
+                       help=f'Rolling window granularity in seconds (default: {DEFAULT_BUCKET:g})')
+    parser.add_argument('--interval', type=float, default=DEFAULT_SNAPSHOT_INTERVAL,
+                       help=f'Seconds between snapshots (default: {DEFAULT_SNAPSHOT_INTERVAL:g})')
+    parser.add_argument('--snapshot-output', metavar='FILE',
+                       help='Append each snapshot to a JSON Lines file')
+    parser.add_argument('--replay', action='store_true',
+                       help='Write the capture to stdout as pcap (for testing --follow)')
+    parser.add_argument('--rate', type=float,
+                       help='Replay rate in packets per second')
+    parser.add_argument('--speed', type=float,
+                       help='Replay at this multiple of the original timing')
     
     args = parser.parse_args()
+    if args.pcap_file is None and not args.interface:
+        parser.error("a PCAP file is required unless --interface is given")
+    
+    packet_filter = None
+    if args.filter:
+        try:
+            packet_filter = PacketFilter(args.filter)
+        except ValueError as e:
+            parser.error(f"invalid --filter: {e}")
+    
+    if args.replay:
+        count = replay_pcap(args.pcap_file, sys.stdout.buffer, args.rate, args.speed)
+        print(f"[+] Replayed {count} packets", file=sys.stderr)
+        return
+    
+    # Build the analyzers that share a single pass over the capture
+    names = ['sketch' if args.approximate else 'stats']
+    names += list(dict.fromkeys(args.analyzer + (['http'] if args.http else [])
+                                + (['dns'] if args.dns else [])
+                                + (['flows'] if args.flows_output else [])
+                                + (['export'] if args.export else [])))
+    options = {'sketch': {'capacity': args.sketch_capacity,
+                          'precision': args.hll_precision},
+               'dns': {'max_pending': args.max_dns_pending,
+                       'timeout': args.dns_timeout,
+                       'capacity': args.sketch_capacity},
+               'flows': {'max_flows': args.max_flows,
+                         'idle_timeout': args.flow_idle_timeout,
+                         'active_timeout': args.flow_active_timeout,
+                         'output': args.flows_output,
+                         'max_records': args.max_flow_records},
+               'export': {'path': args.export,
+                          'file_format': args.export_format,
+                          'batch_size': args.batch_size}}
+    query = {key: value for key, value in (('host', args.host), ('port', args.port),
+                                           ('start_time', args.start_time),
+                                           ('end_time', args.end_time))
+             if value is not None}
+    
+    if args.follow or args.interface:
+        if args.workers != 1 or args.index or query:
+            parser.error("live mode cannot be combined with --workers or indexed queries")
+        unbounded = [name for name in names[1:] if not ANALYZERS[name].bounded]
+        if unbounded:
+            parser.error(f"live mode cannot run analyzers that keep every record: "
+                         f"{', '.join(unbounded)}")
+        snapshot_file = open(args.snapshot_output, 'a') if args.snapshot_output else None
+        
+        def on_snapshot(snapshot):
+            RollingStats.print_snapshot(snapshot)
+            if snapshot_file is not None:
+                snapshot_file.write(json.dumps(snapshot) + '\n')
+                snapshot_file.flush()
+        
+        rolling = RollingStats(args.window, args.bucket, args.interval, args.sketch_capacity,
+                               args.hll_precision, on_snapshot)
+        analyzers = [rolling] + [ANALYZERS[name](**options.get(name, {})) for name in names[1:]]
+        if args.interface:
+            print(f"[*] Capturing on interface: {args.interface}")
+            records = iter_interface_records(args.interface)
+        else:
+            print(f"[*] Following PCAP stream: {args.pcap_file}")
+            records = follow_pcap_records(args.pcap_file)
+        if packet_filter is not None:
+            print(f"[*] Filter: {packet_filter.expression}")
+        run_live(records, analyzers, args.engine, packet_filter)
+        for analyzer in analyzers:
+            analyzer.print_results()
+        if snapshot_file is not None:
+            snapshot_file.close()
+            print(f"[+] Snapshots saved to: {args.snapshot_output}")
+        return
     
     # Analyze PCAP
-    results = analyze_pcap(args.pcap_file)
+    print(f"[*] Reading PCAP file: {args.pcap_file}")
+    if packet_filter is not None:
+        print(f"[*] Filter: {packet_filter.expression}")
+    if args.workers != 1 or os.path.isdir(args.pcap_file):
+        if args.export or args.flows_output:
+            parser.error("--export and --flows-output cannot be combined with --workers "
+                         "or a directory")
+        if args.index or query:
+            parser.error("indexed queries cannot be combined with --workers or a directory")
+        analyzers = run_analyzers_parallel(args.pcap_file, names, args.workers or None,
+                                           args.chunk_size * 1024 * 1024, args.engine,
+                                           options, packet_filter)
+    else:
+        analyzers = [ANALYZERS[name](**options.get(name, {})) for name in names]
+        pcap_index = open_index(args.pcap_file, args.index, query, args.index_file)
+        run_analyzers(args.pcap_file, analyzers, args.engine, args.stream, pcap_index, query,
+                      packet_filter)
+        if pcap_index is not None:
+            pcap_index.close()
+    stats = analyzers[0]
+    print(f"[+] Processed {stats.total_packets} packets")
+    print()
     
-    # Extract HTTP requests if requested
-    if args.http:
-        print()
-        extract_http_requests(args.pcap_file)
+    results = stats.results()
+    for analyzer in analyzers:
+        analyzer.print_results()
+        if analyzer is not stats:
+            results[analyzer.name] = analyzer.results()
     
     # Save results if requested
     if args.output:
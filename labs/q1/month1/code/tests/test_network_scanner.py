@@ -0,0 +1,255 @@
+"""Scanner engine tests against local listeners on 127.0.0.0/8, and sniffer tests"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+import network_scanner
+from network_scanner import (ConnectScanner, FrameRing, PingSweeper, RTTEstimator,
+                             SynScanner, TokenBucket, iter_sweep_probes, packet_sniffer,
+                             parse_ports, parse_targets, ping_statistics, sweep)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+LISTEN_HOST = '127.0.0.2'
+
+@pytest.fixture
+def listeners():
+    """Five listening sockets on LISTEN_HOST; yields their ports"""
+    sockets = []
+    for _ in range(5):
+        s = socket.socket()
+        s.bind((LISTEN_HOST, 0))
+        s.listen(128)
+        sockets.append(s)
+    yield sorted(s.getsockname()[1] for s in sockets)
+    for s in sockets:
+        s.close()
+
+def closed_ports(count, exclude):
+    """Ports on LISTEN_HOST that refuse connections"""
+    ports = []
+    port = 20000
+    while len(ports) < count:
+        if port not in exclude:
+            with socket.socket() as s:
+                if s.connect_ex((LISTEN_HOST, port)) != 0:
+                    ports.append(port)
+        port += 1
+    return ports
+
+def scan(scanner, ports):
+    try:
+        return asyncio.run(scanner.scan((LISTEN_HOST, port) for port in ports))
+    finally:
+        scanner.close()
+
+def check_results(results, listeners, closed):
+    assert {port for (_, port), state in results.items() if state == 'open'} == set(listeners)
+    assert all(results[(LISTEN_HOST, port)] == 'closed' for port in closed)
+
+def test_parse_ports():
+    assert parse_ports('22,80,8000-8002,80') == [22, 80, 8000, 8001, 8002]
+    with pytest.raises(ValueError):
+        parse_ports('0-10')
+
+def test_token_bucket_rate():
+    async def take(count):
+        bucket = TokenBucket(200)
+        for _ in range(count):
+            await bucket.take()
+    start = time.monotonic()
+    asyncio.run(take(100))
+    assert time.monotonic() - start >= 0.4
+
+def test_connect_scan(listeners):
+    closed = closed_ports(300, listeners)
+    results = scan(ConnectScanner(None, 500, 1.0, 1), closed + listeners)
+    check_results(results, listeners, closed)
+
+@pytest.fixture
+def low_fd_limit():
+    """Lower the open file limit to 256 for the duration of a test"""
+    if resource is None:
+        pytest.skip("resource module not available")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (256, hard))
+    yield
+    resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+def test_connect_scan_caps_concurrency(listeners, low_fd_limit):
+    closed = closed_ports(1000, listeners)
+    scanner = ConnectScanner(None, 2000, 1.0, 1)
+    assert scanner.max_inflight <= 256 - network_scanner.FD_RESERVE
+    check_results(scan(scanner, closed + listeners), listeners, closed)
+
+def test_connect_scan_retries_when_out_of_descriptors(listeners, low_fd_limit, monkeypatch):
+    # Without the cap, attempts hit EMFILE; they must not be reported filtered
+    monkeypatch.setattr(network_scanner, '_descriptor_budget', lambda: 2000)
+    closed = closed_ports(1000, listeners)
+    scanner = ConnectScanner(None, 2000, 1.0, 1)
+    assert scanner.max_inflight == 2000
+    check_results(scan(scanner, closed + listeners), listeners, closed)
+
+def test_syn_scan(listeners):
+    try:
+        scanner = SynScanner(None, 2000, 0.5, 1)
+    except PermissionError:
+        pytest.skip("raw sockets need root")
+    closed = closed_ports(1000, listeners)
+    check_results(scan(scanner, closed + listeners), listeners, closed)
+
+SWEEP_NETWORK = '127.0.1.0/29'
+
+@pytest.fixture
+def sweep_listeners():
+    """Listeners on two hosts of SWEEP_NETWORK; yields {(host, port)}"""
+    sockets = []
+    for host in ('127.0.1.3', '127.0.1.5'):
+        s = socket.socket()
+        s.bind((host, 0))
+        s.listen(128)
+        sockets.append(s)
+    yield {s.getsockname() for s in sockets}
+    for s in sockets:
+        s.close()
+
+def test_parse_targets():
+    spans = parse_targets('10.0.0.0/30, 10.0.1.1-10.0.1.4,127.0.0.1,10.0.2.0/31')
+    assert [(str(ipaddress.IPv4Address(first)), str(ipaddress.IPv4Address(last)))
+            for first, last in spans] == [
+        ('10.0.0.1', '10.0.0.2'), ('10.0.1.1', '10.0.1.4'), ('127.0.0.1', '127.0.0.1'),
+        ('10.0.2.0', '10.0.2.1')]
+    with pytest.raises(ValueError):
+        parse_targets('10.0.0.9-10.0.0.1')
+
+def test_address_range_keeps_every_host():
+    # The range spans CIDR blocks larger than /31 (10.0.0.8/30): none of
+    # their first or last addresses may be dropped
+    probes = iter_sweep_probes(parse_targets('10.0.0.5-10.0.0.12'), [22])
+    assert {host for host, _ in probes} == {f'10.0.0.{i}' for i in range(5, 13)}
+    probes = iter_sweep_probes(parse_targets('192.168.1.10-192.168.1.20'), [22])
+    assert len({host for host, _ in probes}) == 11
+
+def test_sweep_probes_interleave_hosts():
+    probes = list(iter_sweep_probes(parse_targets('10.0.0.0/24'), [22, 80]))
+    hosts = [host for host, _ in probes]
+    assert len(set(probes)) == len(probes) == 254 * 2
+    assert set(hosts) == {f'10.0.0.{i}' for i in range(1, 255)}
+    # Every host is probed once per port pass, never twice in a row
+    assert [port for _, port in probes] == [22] * 254 + [80] * 254
+    assert all(a != b for a, b in zip(hosts, hosts[1:]))
+    rest = iter_sweep_probes(parse_targets('10.0.0.0/24'), [22], set(probes[:200]))
+    assert set(rest) == set(probes[200:254])
+
+def test_sweep_and_resume(sweep_listeners, tmp_path):
+    ports = sorted(port for _, port in sweep_listeners)
+    targets = parse_targets(SWEEP_NETWORK)
+    results_file = tmp_path / 'sweep.jsonl'
+    first = list(iter_sweep_probes(targets, ports))[:5]
+    with open(results_file, 'w') as f:
+        for host, port in first:
+            state = 'open' if (host, port) in sweep_listeners else 'closed'
+            f.write(json.dumps({'host': host, 'port': port, 'state': state}) + '\n')
+        f.write('{"host": "127.0.1.1", "po')  # Cut short by a crash
+    
+    open_ports = sweep(targets, ports, str(results_file), 'connect', None, 100, 1.0, 1)
+    assert {(host, port) for host, ports in open_ports.items() for port in ports} == sweep_listeners
+    lines = results_file.read_text().splitlines()
+    assert lines.pop(5).endswith('"po')
+    records = [json.loads(line) for line in lines]
+    assert len(records) == 6 * len(ports)
+    assert len({(r['host'], r['port']) for r in records}) == len(records)
+
+def test_rtt_estimator():
+    estimator = RTTEstimator(1.0)
+    assert estimator.timeout() == 1.0
+    assert estimator.timeout(3) == 4.0
+    for _ in range(20):
+        estimator.update(0.2)
+    assert estimator.srtt == pytest.approx(0.2)
+    assert 0.2 < estimator.timeout() < 0.3
+    assert estimator.timeout(2) == pytest.approx(2 * estimator.timeout())
+    estimator.update(0.0001)
+    assert estimator.timeout(30) == network_scanner.MAX_RTT_TIMEOUT
+    fast = RTTEstimator(1.0)
+    fast.update(0.0001)
+    assert fast.timeout() == network_scanner.MIN_RTT_TIMEOUT
+
+def test_connect_scan_learns_rtt(listeners):
+    scanner = ConnectScanner(None, 10, 5.0, 1)
+    scan(scanner, listeners)
+    assert scanner.rtt.targets[LISTEN_HOST].samples == len(listeners)
+    assert scanner.rtt.timeout(LISTEN_HOST) == network_scanner.MIN_RTT_TIMEOUT
+    assert scanner.rtt.timeout('192.0.2.1') == network_scanner.MIN_RTT_TIMEOUT
+
+def test_ping_statistics():
+    stats = ping_statistics([0.001, 0.003], 3)
+    assert stats['received'] == 2 and stats['loss'] == pytest.approx(100 / 3)
+    assert (stats['min'], stats['avg'], stats['max']) == pytest.approx((1.0, 2.0, 3.0))
+    assert stats['mdev'] == pytest.approx(1.0)
+    assert ping_statistics([], 3)['avg'] is None
+
+def test_ping_sweep():
+    try:
+        sweeper = PingSweeper(None, 1.0, 1)
+    except PermissionError:
+        pytest.skip("raw sockets need root")
+    hosts = [f'127.0.3.{i}' for i in range(1, 7)]
+    try:
+        rtts, sent = asyncio.run(sweeper.sweep(hosts, 3))
+    finally:
+        sweeper.close()
+    assert all(len(rtts[host]) == sent[host] == 3 for host in hosts)
+    assert sweeper.rtt.timeout('127.0.3.1') == network_scanner.MIN_RTT_TIMEOUT
+
+def test_frame_ring_counts_drops():
+    ring = FrameRing(4, 64)
+    for i in range(6):
+        slot = ring.writable()
+        if slot is None:
+            ring.dropped += 1
+            continue
+        slot[:3] = bytes([i, i, i])
+        ring.commit(3, 100 + i, float(i))
+    assert (ring.head, ring.dropped) == (4, 2)
+    start, count = ring.read(3, 0)
+    assert (start, count) == (0, 3)
+    assert [(ts, wirelen, bytes(frame)) for ts, wirelen, frame in map(ring.frame, range(3))] == [
+        (float(i), 100 + i, bytes([i, i, i])) for i in range(3)]
+    ring.release(count)
+    assert ring.writable() is not None
+    ring.close()
+    assert ring.read(10, 0) == (3, 1)
+
+def test_sniffer_replays_pcap_through_pipe(tmp_path):
+    from scapy.all import IP, TCP, UDP, Ether, wrpcap
+    from packet_analyzer import replay_pcap
+    packets = ([Ether() / IP(src='10.0.0.1', dst='10.0.0.2') / TCP(sport=1234, dport=80)] * 30
+               + [Ether() / IP(src='10.0.0.3', dst='10.0.0.2') / UDP(sport=53, dport=5353)] * 20)
+    pcap_file = str(tmp_path / 'replay.pcap')
+    wrpcap(pcap_file, packets)
+    
+    read_fd, write_fd = os.pipe()
+    def replay():
+        with os.fdopen(write_fd, 'wb') as output:
+            replay_pcap(pcap_file, output)
+    writer = threading.Thread(target=replay)
+    writer.start()
+    try:
+        result = packet_sniffer(None, 0, None, f'/dev/fd/{read_fd}', slots=64, batch_size=16)
+    finally:
+        writer.join()
+        os.close(read_fd)
+    assert result['captured'] == result['decoded'] + result['ring_dropped'] == 50
+    assert result['ring_dropped'] == 0
+    assert result['protocols'] == {'TCP': 30, 'UDP': 20}
@@ -0,0 +1,545 @@
+"""Packet analyzer tests on synthetic captures and hand-built frames"""
+
+import os
+import struct
+import sys
+import threading
+import time
+
+import pytest
+from scapy.all import (ARP, DNS, DNSQR, ICMP, IP, TCP, UDP, Ether, ICMPv6EchoRequest, IPv6,
+                       Raw)
+
+import packet_analyzer
+from benchmark_packet_analyzer import generate_pcap
+from packet_analyzer import (ANALYZERS, DNSAnalyzer, FlowTable, HTTPRequestExtractor,
+                             PacketFilter, PcapIndex, RollingStats, TCPConnection,
+                             _find_record_boundary, decode_frame, follow_pcap_records,
+                             iter_frames, replay_pcap, run_analyzers, run_analyzers_parallel,
+                             run_live, split_pcap)
+
+PARITY_ANALYZERS = ('stats', 'http', 'dns', 'flows')
+
+@pytest.fixture(scope='module')
+def capture(tmp_path_factory):
+    """A mixed capture (HTTP, DNS, TCP, ICMP, ARP, IP fragments)"""
+    path = str(tmp_path_factory.mktemp('pcap') / 'mixed.pcap')
+    generate_pcap(path, packets=3000)
+    return path
+
+def record_offsets(path):
+    """Byte offset of every record in a classic pcap file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    offsets = []
+    offset = 24
+    while offset < len(data):
+        offsets.append(offset)
+        offset += 16 + struct.unpack_from('<I', data, offset + 8)[0]
+    return offsets
+
+def results(analyzers):
+    return [analyzer.results() for analyzer in analyzers]
+
+def sequential(path, names, engine='fast'):
+    analyzers = [ANALYZERS[name]() for name in names]
+    run_analyzers(path, analyzers, engine)
+    return results(analyzers)
+
+def test_split_pcap_finds_record_boundaries(capture):
+    offsets = set(record_offsets(capture))
+    shards = split_pcap(capture, 16 * 1024)
+    assert len(shards) > 4
+    assert shards[0][0] == 24 and shards[-1][1] is None
+    for (start, end), (next_start, _) in zip(shards, shards[1:]):
+        assert end == next_start
+        assert start in offsets
+
+def test_find_record_boundary_skips_to_next_record(capture):
+    offsets = record_offsets(capture)
+    middle = offsets[len(offsets) // 2]
+    with open(capture, 'rb') as f:
+        size = len(f.read())
+        f.seek(0)
+        record_header, _, snaplen, _ = packet_analyzer._read_pcap_header(f, capture)
+        min_ts = record_header.unpack(f.read(16))[0] - 86400
+        for target in (middle, middle + 1, middle + 8, middle + 17):
+            found = _find_record_boundary(f, target, size, record_header, snaplen,
+                                          1000000, min_ts)
+            assert found == min(offset for offset in offsets if offset >= target)
+
+@pytest.mark.parametrize('shift', [1, 8, 20])
+def test_parallel_recovers_from_wrong_boundary(capture, monkeypatch, shift):
+    # Move every boundary into the record that starts there: each shard
+    # after the first starts mid-record and must be redone from where
+    # the previous shard really stopped
+    offsets = set(record_offsets(capture))
+    shards = split_pcap(capture, 16 * 1024)
+    wrong = [start + shift if start != 24 else start for start, _ in shards]
+    assert not offsets & set(wrong[1:])
+    forced = list(zip(wrong, wrong[1:] + [None]))
+    monkeypatch.setattr(packet_analyzer, 'split_pcap', lambda path, chunk_size: forced)
+
+    merged = run_analyzers_parallel(capture, ['stats'], workers=2, chunk_size=16 * 1024)
+    assert results(merged) == sequential(capture, ['stats'])
+
+def test_parallel_matches_sequential(capture):
+    names = ['stats']
+    merged = run_analyzers_parallel(capture, names, workers=2, chunk_size=16 * 1024)
+    assert results(merged) == sequential(capture, names)
+
+@pytest.mark.parametrize('engine', ['scapy', 'numpy'])
+def test_engine_parity(capture, engine):
+    assert sequential(capture, PARITY_ANALYZERS, engine) == \
+        sequential(capture, PARITY_ANALYZERS, 'fast')
+
+# Hand-built frames for the filter tests, with the frames tcpdump selects
+# for each expression (tcpdump has no VLAN skipping, so no tagged frames)
+ETHER = Ether(src='02:00:00:00:00:01', dst='02:00:00:00:00:02')
+FILTER_FRAMES = [
+    (1, ETHER / IP(src='10.0.0.1', dst='192.168.1.5') / TCP(sport=1234, dport=80)),
+    (1, ETHER / IP(src='192.168.1.5', dst='10.0.0.1') / UDP(sport=53, dport=5353)),
+    (1, ETHER / IPv6(src='2001:db8::1', dst='2001:db8::2') / TCP(sport=4000, dport=443)),
+    (1, ETHER / IPv6(src='2001:db8::2', dst='2001:db8::53') / UDP(sport=5353, dport=53)),
+    (1, ETHER / ARP(psrc='10.0.0.1', pdst='10.0.0.254')),
+    (1, ETHER / IP(src='172.16.0.9', dst='10.0.0.1') / ICMP()),
+    (1, ETHER / IPv6(src='2001:db8::1', dst='2001:db8::2') / ICMPv6EchoRequest()),
+    # Non-first fragment whose payload starts like a TCP header to port 80
+    (1, ETHER / IP(src='10.0.0.1', dst='192.168.1.5', proto=6, frag=100)
+        / Raw(struct.pack('!HH', 1234, 80))),
+    (101, IP(src='10.1.2.3', dst='255.255.255.255') / UDP(sport=68, dport=67)),
+    (1, ETHER / IP(src='10.9.9.9', dst='172.16.0.9') / TCP(sport=40000, dport=8080)),
+]
+
+TCPDUMP_RESULTS = {
+    'tcp': {0, 2, 7, 9},
+    'udp': {1, 3, 8},
+    'icmp': {5},
+    'icmp6': {6},
+    'ip': {0, 1, 5, 7, 8, 9},
+    'ip6': {2, 3, 6},
+    'arp': {4},
+    'port 53': {1, 3},
+    'src port 53': {1},
+    'tcp port 80': {0},
+    'udp port 80': set(),
+    'portrange 8000-8100': {9},
+    'host 10.0.0.1': {0, 1, 4, 5, 7},
+    'src host 10.0.0.1': {0, 4, 7},
+    'dst host 2001:db8::53': {3},
+    'net 10.0.0.0/8': {0, 1, 4, 5, 7, 8, 9},
+    'dst net 192.168.0.0/16': {0, 7},
+    'proto 17': {1, 3, 8},
+    'ip proto 1': {5},
+    'ip6 and tcp port 443': {2},
+    'not ip and not ip6': {4},
+    '! (tcp || udp)': {4, 5, 6},
+    'not port 53': {0, 2, 4, 5, 6, 7, 8, 9},
+    # 'and' and 'or' have equal precedence and group left to right
+    'tcp or udp and host 10.1.2.3': {8},
+    'host 10.1.2.3 and udp or tcp': {0, 2, 7, 8, 9},
+}
+
+@pytest.mark.parametrize('expression', sorted(TCPDUMP_RESULTS))
+def test_filter_matches_tcpdump(expression):
+    packet_filter = PacketFilter(expression)
+    matched = {i for i, (linktype, frame) in enumerate(FILTER_FRAMES)
+               if packet_filter(linktype, memoryview(bytes(frame)))}
+    assert matched == TCPDUMP_RESULTS[expression]
+
+@pytest.mark.parametrize('expression', [
+    '', 'tcp and', 'host', 'host 10.0.0.0/8', 'net 10.0.0.0/33', 'host 10.0.0.300',
+    'port 70000', 'port http', 'portrange 90-80', 'proto 256', 'proto bogus',
+    '(tcp', 'tcp)', 'src tcp', 'bogus', 'tcp port',
+])
+def test_filter_rejects_malformed_expressions(expression):
+    with pytest.raises(ValueError):
+        PacketFilter(expression)
+
+CLIENT = ('10.0.0.1', 40000)
+SERVER = ('10.0.0.2', 80)
+CLIENT_ISN = 1000
+SERVER_ISN = 5000
+
+class Connection:
+    """Builds the decoded segments of one TCP connection"""
+    
+    def __init__(self, client=CLIENT):
+        self.client = client
+        self.timestamp = 1700000000.0
+    
+    def segment(self, offset, payload=b'', flags='A', from_client=True):
+        """Segment whose payload starts offset bytes into one direction's stream"""
+        src, dst = (self.client, SERVER) if from_client else (SERVER, self.client)
+        isn = CLIENT_ISN if from_client else SERVER_ISN
+        seq = isn if 'S' in flags else isn + 1 + offset
+        frame = bytes(ETHER / IP(src=src[0], dst=dst[0])
+                      / TCP(sport=src[1], dport=dst[1], seq=seq, flags=flags) / payload)
+        self.timestamp += 0.001
+        return decode_frame(1, frame, self.timestamp, len(frame))
+    
+    def handshake(self):
+        return [self.segment(0, flags='S'), self.segment(0, flags='SA', from_client=False)]
+
+def extract(segments, **options):
+    extractor = HTTPRequestExtractor(**options)
+    for info in segments:
+        extractor.process(info)
+    extractor.finish()
+    return [(r['method'], r['uri'], r['status']) for r in extractor.http_requests]
+
+REQUEST = b'GET /index.html HTTP/1.1\r\nHost: example.com\r\n\r\n'
+RESPONSE = b'HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhello'
+
+def test_reassembles_out_of_order_segments():
+    c = Connection()
+    parts = [REQUEST[:10], REQUEST[10:30], REQUEST[30:]]
+    segments = c.handshake() + [c.segment(30, parts[2]), c.segment(0, parts[0]),
+                                c.segment(10, parts[1]),
+                                c.segment(0, RESPONSE, from_client=False)]
+    assert extract(segments) == [('GET', '/index.html', 200)]
+
+def test_retransmitted_and_overlapping_segments_are_delivered_once():
+    c = Connection()
+    second = b'GET /two HTTP/1.1\r\n\r\n'
+    stream = REQUEST + second
+    segments = c.handshake() + [
+        c.segment(0, stream[:20]),
+        c.segment(0, stream[:20]),                   # Retransmission
+        c.segment(10, stream[10:len(REQUEST) + 5]),  # Overlaps both sides
+        c.segment(len(REQUEST), second),             # Overlaps the previous one
+        c.segment(len(REQUEST), second),
+    ]
+    assert extract(segments) == [('GET', '/index.html', None), ('GET', '/two', None)]
+
+def test_overlapping_out_of_order_segments():
+    c = Connection()
+    segments = c.handshake() + [c.segment(20, REQUEST[20:]), c.segment(15, REQUEST[15:25]),
+                                c.segment(0, REQUEST[:18])]
+    assert extract(segments) == [('GET', '/index.html', None)]
+
+def test_resynchronises_after_joining_mid_stream():
+    # No handshake: the capture starts inside a request body
+    c = Connection()
+    segments = [c.segment(0, b'tail of an earlier body'),
+                c.segment(23, b'more body bytes'),
+                c.segment(38, REQUEST)]
+    assert extract(segments) == [('GET', '/index.html', None)]
+
+def test_skips_gap_when_pending_budget_overflows():
+    # The first request loses its middle segment for good; once more
+    # than max_pending bytes are held the gap is skipped
+    c = Connection()
+    lost = b'POST /lost HTTP/1.1\r\nContent-Length: 40\r\n\r\n' + b'x' * 40
+    after = [b'GET /a HTTP/1.1\r\n\r\n', b'GET /b HTTP/1.1\r\n\r\n']
+    start = len(lost)
+    segments = c.handshake() + [c.segment(0, lost[:10])]
+    for request in after:
+        segments.append(c.segment(start, request))
+        start += len(request)
+    assert extract(segments, max_pending=64) == []
+    assert extract(segments, max_pending=16) == [('GET', '/a', None), ('GET', '/b', None)]
+
+def test_pipelined_requests_get_their_own_status():
+    c = Connection()
+    requests = b''.join(b'GET /%d HTTP/1.1\r\n\r\n' % i for i in range(3))
+    responses = (b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok'
+                 + b'HTTP/1.1 100 Continue\r\n\r\n'
+                 + b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n'
+                 + b'HTTP/1.1 304 Not Modified\r\n\r\n')
+    segments = c.handshake() + [c.segment(0, requests),
+                                c.segment(0, responses[:30], from_client=False),
+                                c.segment(30, responses[30:], from_client=False)]
+    assert extract(segments) == [('GET', '/0', 200), ('GET', '/1', 404), ('GET', '/2', 304)]
+
+def test_bodies_are_skipped():
+    # Request-like text inside bodies must not be reported
+    c = Connection()
+    fake = b'GET /fake HTTP/1.1\r\n\r\n'
+    chunked = (b'POST /upload HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+               + b'%x\r\n' % len(fake) + fake + b'\r\n'
+               + b'4;ext=1\r\nabcd\r\n0\r\nTrailer: x\r\n\r\n')
+    sized = b'PUT /put HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % len(fake) + fake
+    stream = chunked + sized + b'GET /last HTTP/1.1\r\n\r\n'
+    # One byte per segment exercises heads and chunk lines split anywhere
+    segments = c.handshake() + [c.segment(i, stream[i:i + 1]) for i in range(len(stream))]
+    assert extract(segments) == [('POST', '/upload', None), ('PUT', '/put', None),
+                                 ('GET', '/last', None)]
+
+def test_flow_table_evicts_least_recent_and_idle_flows():
+    evicted = []
+    table = FlowTable(max_flows=2, idle_timeout=10.0,
+                      on_evict=lambda key, state, reason: evicted.append((key, reason)))
+    for key, timestamp in (('a', 0.0), ('b', 1.0), ('a', 2.0), ('c', 3.0)):
+        table.lookup(key, timestamp, TCPConnection)
+    assert evicted == [('b', 'lru')]
+    table.expire(12.5)
+    assert evicted == [('b', 'lru'), ('a', 'idle')]
+    table.flush()
+    assert evicted[-1] == ('c', 'flush') and len(table) == 0
+    assert table.evicted == {'lru': 1, 'idle': 1, 'flush': 1}
+
+def test_reassembler_keeps_connections_apart_and_evicts_them():
+    # With room for one connection, the second evicts the first: its
+    # unanswered request keeps status None and later bytes resynchronise
+    first, second = Connection(), Connection(('10.0.0.3', 40001))
+    segments = (first.handshake() + second.handshake()
+                + [first.segment(0, REQUEST), second.segment(0, b'GET /2 HTTP/1.1\r\n\r\n'),
+                   first.segment(0, RESPONSE, from_client=False)])
+    assert extract(segments) == [('GET', '/index.html', 200), ('GET', '/2', None)]
+    assert extract(segments, max_flows=1) == [('GET', '/index.html', None), ('GET', '/2', None)]
+
+DNS_SERVER = '10.0.0.53'
+
+def dns_frame(timestamp, client, ident, name, response=False, rcode=0):
+    """Decoded UDP DNS query (or response) between client and DNS_SERVER"""
+    ip = IP(src=DNS_SERVER, dst=client[0]) if response else IP(src=client[0], dst=DNS_SERVER)
+    ports = dict(sport=53, dport=client[1]) if response else dict(sport=client[1], dport=53)
+    frame = bytes(ETHER / ip / UDP(**ports)
+                  / DNS(id=ident, qr=int(response), rcode=rcode, qd=DNSQR(qname=name)))
+    return decode_frame(1, frame, timestamp, len(frame))
+
+def test_dns_analyzer_matches_transactions():
+    a, b, c = ('10.0.0.1', 5000), ('10.0.0.2', 5000), ('10.0.0.3', 6000)
+    frames = [
+        dns_frame(0.000, a, 1, 'www.example.com'),
+        dns_frame(0.001, b, 1, 'www.example.com'),        # Same id, other client
+        dns_frame(0.004, b, 1, 'www.example.com', response=True),
+        dns_frame(0.012, a, 1, 'www.example.com', response=True),
+        dns_frame(0.100, a, 2, 'nosuch.example.com'),
+        dns_frame(0.140, a, 2, 'nosuch.example.com', response=True, rcode=3),
+        dns_frame(0.200, a, 3, 'lost.example.com'),       # Never answered
+        dns_frame(0.300, c, 9, 'stray.example.com', response=True),
+        dns_frame(0.400, a, 4, 'x7kq2mzp9w4rt8vb.tunnel.example.net'),
+    ]
+    dns = DNSAnalyzer()
+    for info in frames:
+        dns.process(info)
+    dns.finish()
+    results = dns.results()
+    
+    assert (results['queries'], results['responses'], results['answered'],
+            results['unanswered'], results['unmatched_responses']) == (5, 4, 3, 2, 1)
+    assert results['rcodes'] == {'NOERROR': 3, 'NXDOMAIN': 1}
+    assert results['nxdomain_rate'] == 0.25
+    assert results['top_domains'] == {'www.example.com': 2, 'nosuch.example.com': 1,
+                                      'lost.example.com': 1,
+                                      'x7kq2mzp9w4rt8vb.tunnel.example.net': 1}
+    assert results['top_nxdomain_domains'] == {'nosuch.example.com': 1}
+    # Latencies 3, 12 and 40 ms: matched by client, server and id
+    histogram = results['latency_ms']['histogram']
+    assert (histogram['<=5ms'], histogram['<=20ms'], histogram['<=50ms']) == (1, 1, 1)
+    assert sum(histogram.values()) == 3
+    assert results['latency_ms']['max'] == pytest.approx(40.0, abs=0.01)
+    assert list(results['long_label_entropy']) == ['example.net']
+    assert results['long_label_entropy']['example.net']['long_labels'] == 1
+
+def test_dns_queries_time_out():
+    client = ('10.0.0.1', 5000)
+    dns = DNSAnalyzer(timeout=5.0)
+    dns.process(dns_frame(0.0, client, 1, 'slow.example.com'))
+    dns.process(dns_frame(10.0, client, 2, 'next.example.com'))
+    assert dns.unanswered == 1
+    dns.process(dns_frame(10.5, client, 1, 'slow.example.com', response=True))
+    assert dns.unmatched_responses == 1 and dns.answered == 0
+
+def test_dns_domain_counts_are_bounded():
+    client = ('10.0.0.1', 5000)
+    names = ['c.example.com'] + ['a.example.com'] * 5 + ['b.example.com'] * 3
+    dns = DNSAnalyzer(capacity=2)
+    for ident, name in enumerate(names):
+        dns.process(dns_frame(ident * 0.001, client, ident, name))
+    counts = dns.domain_queries
+    assert len(counts.counts) == 2
+    assert counts.most_common(1) == [('a.example.com', 5)]
+    # Space-Saving: never an underestimate, off by at most the recorded error
+    for name, estimate in counts.most_common():
+        true = names.count(name)
+        assert estimate - counts.errors[name] <= true <= estimate
+    assert dns.results()['top_domains'] == dict(counts.most_common(10))
+
+@pytest.fixture
+def indexed_capture(capture, tmp_path):
+    """A private copy of the mixed capture (its sidecar index goes next to it)"""
+    path = tmp_path / 'indexed.pcap'
+    path.write_bytes(open(capture, 'rb').read())
+    return str(path)
+
+def frame_keys(frames):
+    return [(info.timestamp, info.length, info.src, info.sport) for info in frames]
+
+def first_http_client(path):
+    return next(info.src for info in iter_frames(path) if info.dport in (80, 8080))
+
+def test_index_query_matches_filter(indexed_capture):
+    host = first_http_client(indexed_capture)
+    for query, expression in (({'host': host}, f'host {host} and (tcp or udp or icmp)'),
+                              ({'port': 53}, 'port 53'),
+                              ({'host': host, 'port': 80}, f'host {host} and port 80')):
+        index = PcapIndex(indexed_capture)
+        try:
+            indexed = frame_keys(iter_frames(indexed_capture, index=index, query=query))
+        finally:
+            index.close()
+        filtered = frame_keys(iter_frames(indexed_capture,
+                                          packet_filter=PacketFilter(expression)))
+        assert indexed and indexed == filtered
+
+def test_index_query_by_time(indexed_capture):
+    timestamps = [info.timestamp for info in iter_frames(indexed_capture)]
+    start, end = timestamps[100], timestamps[200]
+    index = PcapIndex(indexed_capture)
+    offsets = index.query(start_time=start, end_time=end)
+    assert [record[0] for record in index.iter_records(offsets)] == \
+        [t for t in timestamps if start <= t <= end]
+    index.close()
+
+def test_stale_index_is_rebuilt(indexed_capture):
+    index = PcapIndex(indexed_capture)
+    assert index.build() == 3000
+    assert index.build() == 0
+    index.close()
+    
+    # Append a copy of the first record: size and mtime change
+    with open(indexed_capture, 'rb') as f:
+        data = f.read()
+    caplen = struct.unpack_from('<I', data, 32)[0]
+    with open(indexed_capture, 'ab') as f:
+        f.write(data[24:24 + 16 + caplen])
+    index = PcapIndex(indexed_capture)
+    assert not index.is_current()
+    assert len(index.query()) == 3001
+    assert index.build() == 0
+    index.close()
+
+def test_interrupted_index_is_rebuilt(indexed_capture):
+    index = PcapIndex(indexed_capture)
+    frames = index.build_frames()
+    for _ in range(10):
+        next(frames)
+    frames.close()  # Stopped before the index was marked complete
+    assert not index.is_current()
+    assert len(index.query()) == 3000
+    index.close()
+
+@pytest.mark.parametrize('contents', [b'', b'not an sqlite database' * 100,
+                                      b'SQLite format 3\x00' + b'\xff' * 200])
+def test_corrupt_index_is_replaced(indexed_capture, contents):
+    with open(indexed_capture + '.idx', 'wb') as f:
+        f.write(contents)
+    index = PcapIndex(indexed_capture)
+    assert len(index.query(port=53)) == len(list(iter_frames(
+        indexed_capture, packet_filter=PacketFilter('port 53'))))
+    index.close()
+
+LIVE_START = 1700000000
+
+def udp_frame(timestamp, src):
+    frame = bytes(ETHER / IP(src=src, dst='10.0.0.99') / UDP(sport=1234, dport=9999))
+    return frame, decode_frame(1, frame, timestamp, len(frame))
+
+def pcap_record(timestamp, frame):
+    return struct.pack('<IIII', int(timestamp), 0, len(frame), len(frame)) + frame
+
+def test_follow_reads_appended_records(tmp_path):
+    path = tmp_path / 'growing.pcap'
+    frames = [udp_frame(LIVE_START + i, f'10.0.0.{i}')[0] for i in range(10)]
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1))
+        f.write(b''.join(pcap_record(LIVE_START + i, frames[i]) for i in range(5)))
+    
+    def append():
+        time.sleep(0.2)
+        with open(path, 'ab') as f:
+            record = b''.join(pcap_record(LIVE_START + i, frames[i]) for i in range(5, 10))
+            f.write(record[:30])  # A writer flushing mid-record
+            f.flush()
+            time.sleep(0.1)
+            f.write(record[30:])
+    
+    writer = threading.Thread(target=append)
+    writer.start()
+    records, idle = [], 0
+    for record in follow_pcap_records(str(path), poll_interval=0.02):
+        if record is None:
+            idle += 1
+        else:
+            records.append(record)
+            if len(records) == 10:
+                break
+    writer.join()
+    assert idle > 0
+    assert [(timestamp, bytes(frame)) for timestamp, _, _, frame in records] == \
+        [(LIVE_START + i, frames[i]) for i in range(10)]
+
+def test_rolling_window_contents_and_idle_ticks():
+    snapshots = []
+    rolling = RollingStats(window=10, bucket=1, interval=5, on_snapshot=snapshots.append)
+    for i in range(10):
+        rolling.process(udp_frame(LIVE_START + i, '10.0.0.1')[1])
+    for i in range(10, 13):
+        rolling.process(udp_frame(LIVE_START + i, '10.0.0.2')[1])
+    assert [s['total_packets'] for s in snapshots] == [5, 10]
+    assert snapshots[-1]['window_end'] == LIVE_START + 10
+    
+    # No more frames: idle ticks advance capture time from the last frame
+    rolling.tick(1.0)
+    assert len(snapshots) == 2
+    rolling.tick(8.0)
+    assert snapshots[-1]['window_end'] == LIVE_START + 15
+    assert snapshots[-1]['top_src_ips'] == {'10.0.0.1': 5, '10.0.0.2': 3}
+    rolling.tick(20.0)
+    assert snapshots[-1]['window_end'] == LIVE_START + 25
+    assert snapshots[-1]['total_packets'] == 0
+    assert snapshots[-1]['packets_per_second'] == 0
+
+def test_replay_through_pipe_into_live_mode(capture):
+    read_fd, write_fd = os.pipe()
+    
+    def replay():
+        with os.fdopen(write_fd, 'wb') as output:
+            replay_pcap(capture, output)
+    
+    writer = threading.Thread(target=replay)
+    writer.start()
+    try:
+        snapshots = []
+        analyzers = [RollingStats(on_snapshot=snapshots.append), DNSAnalyzer()]
+        count = run_live(follow_pcap_records(f'/dev/fd/{read_fd}'), analyzers)
+    finally:
+        writer.join()
+        os.close(read_fd)
+    assert count == 3000
+    assert snapshots[-1] == analyzers[0].results()
+    assert analyzers[1].results() == sequential(capture, ['dns'])[0]
+
+@pytest.mark.parametrize('options', [['--http'], ['--analyzer', 'http'],
+                                     ['--analyzer', 'dns', '--http']])
+def test_live_mode_rejects_unbounded_analyzers(monkeypatch, capsys, options):
+    monkeypatch.setattr(sys, 'argv', ['packet_analyzer.py', '-', '--follow'] + options)
+    with pytest.raises(SystemExit) as exit_info:
+        packet_analyzer.main()
+    assert exit_info.value.code == 2
+    assert 'keep every record' in capsys.readouterr().err
+
+def test_live_mode_exports_records(capture, tmp_path, monkeypatch):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    output = str(tmp_path / 'live.parquet')
+    read_fd, write_fd = os.pipe()
+    
+    def replay():
+        with os.fdopen(write_fd, 'wb') as stream:
+            replay_pcap(capture, stream)
+    
+    writer = threading.Thread(target=replay)
+    writer.start()
+    monkeypatch.setattr(sys, 'argv', ['packet_analyzer.py', f'/dev/fd/{read_fd}', '--follow',
+                                      '--export', output, '--batch-size', '1000'])
+    try:
+        packet_analyzer.main()
+    finally:
+        os.close(read_fd)
+        writer.join()
+    table = parquet.read_table(output)
+    assert table.num_rows == 3000
+    assert table.column('src').to_pylist() == [info.src for info in iter_frames(capture)]
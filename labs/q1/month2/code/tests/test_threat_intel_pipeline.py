@@ -0,0 +1,197 @@
+"""Threat intelligence store tests on temporary SQLite databases"""
+
+import io
+import json
+import os
+import sqlite3
+
+import pytest
+
+import threat_intel_pipeline
+from threat_intel_pipeline import BloomFilter, MIGRATIONS, ThreatIntelPipeline, load_indicator_file
+
+@pytest.fixture
+def pipeline(tmp_path):
+    pipeline = ThreatIntelPipeline(str(tmp_path / 'ti.db'))
+    yield pipeline
+    pipeline.close()
+
+def indicators(count, prefix='10.0'):
+    return ({'type': 'IPv4', 'value': f'{prefix}.{i // 256}.{i % 256}', 'confidence': 70}
+            for i in range(count))
+
+def test_store_pulses(pipeline):
+    pulses = pipeline._generate_sample_otx_data(4)
+    assert pipeline.store_pulses(pulses, source='OTX') == (4, 8)
+    stats = pipeline.get_statistics()
+    assert stats['total_pulses'] == 4
+    assert stats['total_indicators'] == 2
+    pipeline.cursor.execute('SELECT "references" FROM pulses')
+    assert json.loads(pipeline.cursor.fetchone()[0]) == ['https://example.com/analysis']
+
+def test_store_indicators_in_batches(pipeline):
+    assert pipeline.store_indicators(indicators(1000), source='feed', batch_size=128) == 1000
+    assert pipeline.get_statistics()['total_indicators'] == 1000
+    row = pipeline.search_indicator('10.0.3.231')
+    assert (row['source'], row['confidence'], row['threat_type']) == ('feed', 70, 'IPv4')
+
+def test_load_indicator_file(tmp_path):
+    records = list(indicators(5))
+    array_file = tmp_path / 'feed.json'
+    array_file.write_text(json.dumps(records))
+    lines_file = tmp_path / 'feed.jsonl'
+    lines_file.write_text('\n'.join(json.dumps(record) for record in records) + '\n')
+    assert list(load_indicator_file(str(array_file))) == records
+    assert list(load_indicator_file(str(lines_file))) == records
+
+def test_upsert_keeps_first_sighting(pipeline):
+    pipeline._store_indicator('domain', 'evil.example', 'first pulse', source='OTX', confidence=40)
+    first = pipeline.search_indicator('evil.example')
+    pipeline.store_indicators([{'type': 'domain', 'value': 'evil.example', 'confidence': 90,
+                                'first_seen': '2030-01-01T00:00:00'}])
+    pipeline._store_indicator('domain', 'evil.example', None, confidence=80)
+    row = pipeline.search_indicator('evil.example')
+    for column in ('id', 'first_seen', 'created_at', 'source', 'description'):
+        assert row[column] == first[column]
+    assert row['confidence'] == 80
+    assert row['last_seen'] == '2030-01-01 00:00:00'
+
+def test_migrates_unversioned_database(tmp_path):
+    db_path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute(MIGRATIONS[0][0])
+    conn.execute("INSERT INTO indicators (indicator_type, indicator_value) VALUES ('IPv4', '192.0.2.1')")
+    conn.commit()
+    conn.close()
+    
+    pipeline = ThreatIntelPipeline(db_path)
+    try:
+        assert pipeline.cursor.execute('PRAGMA user_version').fetchone()[0] == len(MIGRATIONS)
+        assert pipeline.search_indicator('192.0.2.1')['indicator_type'] == 'IPv4'
+        plan = pipeline.cursor.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM indicators WHERE indicator_type = ? '
+            'ORDER BY last_seen DESC LIMIT 10', ('IPv4',)).fetchall()
+        assert 'idx_indicators_type_last_seen' in plan[0][3]
+        assert not any('TEMP B-TREE' in step[3] for step in plan)
+    finally:
+        pipeline.close()
+    # Reopening does not migrate again
+    pipeline = ThreatIntelPipeline(db_path)
+    assert pipeline.cursor.execute('PRAGMA user_version').fetchone()[0] == len(MIGRATIONS)
+    pipeline.close()
+
+def test_query_indicators_newest_first(pipeline):
+    pipeline.store_indicators({'type': 'IPv4' if i % 2 else 'domain', 'value': f'v{i}',
+                               'source': f's{i % 3}', 'last_seen': f'2026-01-{i + 1:02d}'}
+                              for i in range(20))
+    rows = pipeline.query_indicators('IPv4', limit=3)
+    assert [row['indicator_value'] for row in rows] == ['v19', 'v17', 'v15']
+    rows = pipeline.query_indicators(source='s0', limit=2)
+    assert [row['indicator_value'] for row in rows] == ['v18', 'v15']
+    rows = pipeline.query_indicators('IPv4', source='s0')
+    assert [row['indicator_value'] for row in rows] == ['v15', 'v9', 'v3']
+    assert pipeline.get_statistics()['by_source'] == {'s0': 7, 's1': 7, 's2': 6}
+
+def test_bloom_filter():
+    bloom = BloomFilter(1000)
+    for i in range(1000):
+        bloom.add(f'in-{i}')
+    assert all(f'in-{i}' in bloom for i in range(1000))
+    false_positives = sum(f'out-{i}' in bloom for i in range(10000))
+    assert false_positives < 10000 * 3 * threat_intel_pipeline.BLOOM_ERROR_RATE
+    # Values that look present are not counted (twice)
+    count = bloom.count
+    assert count > 990
+    bloom.add('in-0')
+    assert bloom.count == count
+    
+    buf = io.BytesIO()
+    bloom.save(buf, 'ab' * 16, 42, 40)
+    buf.seek(0)
+    loaded, database_id, max_id, rows = BloomFilter.load(buf)
+    assert (database_id, max_id, rows) == ('ab' * 16, 42, 40)
+    assert (loaded.count, loaded.bits) == (count, bloom.bits)
+    with pytest.raises(ValueError):
+        BloomFilter.load(io.BytesIO(buf.getvalue()[:-1]))
+
+def test_search_cache_follows_stores(pipeline):
+    pipeline.store_indicators(indicators(100))
+    assert pipeline.search_indicator('10.0.0.5')['confidence'] == 70
+    assert pipeline.search_indicator('10.0.0.5')['confidence'] == 70
+    assert pipeline.search_indicator('192.0.2.1') is None
+    stats = pipeline.lookup.stats
+    assert stats['cache_hits'] == 1 and stats['queries'] + stats['filtered'] == 2
+    
+    # Stored indicators update the filter and evict cached rows
+    pipeline.store_indicators([{'type': 'IPv4', 'value': '10.0.0.5', 'confidence': 95}])
+    pipeline._store_indicator('IPv4', '192.0.2.1')
+    assert pipeline.search_indicator('10.0.0.5')['confidence'] == 95
+    assert pipeline.search_indicator('192.0.2.1')['indicator_type'] == 'IPv4'
+
+def test_search_sees_other_writers(pipeline, monkeypatch):
+    monkeypatch.setattr(threat_intel_pipeline, 'LOOKUP_REFRESH_INTERVAL', 0)
+    pipeline.store_indicators(indicators(10))
+    assert pipeline.search_indicator('10.0.0.1')['confidence'] == 70
+    other = ThreatIntelPipeline(pipeline.db_path)
+    other.store_indicators([{'type': 'IPv4', 'value': '10.0.0.1', 'confidence': 10},
+                            {'type': 'IPv4', 'value': '198.51.100.7'}])
+    other.close()
+    assert pipeline.search_indicator('10.0.0.1')['confidence'] == 10
+    assert pipeline.search_indicator('198.51.100.7') is not None
+
+def test_filter_persists_and_catches_up(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'ti.db')
+    pipeline = ThreatIntelPipeline(db_path)
+    pipeline.store_indicators(indicators(500))
+    assert pipeline.search_indicator('10.0.1.1') is not None
+    pipeline.close()
+    assert os.path.exists(db_path + threat_intel_pipeline.BLOOM_SUFFIX)
+    
+    # Rows stored without the filter loaded are added from their ids
+    pipeline = ThreatIntelPipeline(db_path)
+    pipeline.store_indicators(indicators(50, prefix='10.9'))
+    pipeline.close()
+    def no_rebuild(self):
+        raise AssertionError("filter rebuilt")
+    monkeypatch.setattr(threat_intel_pipeline.IndicatorLookup, '_rebuild', no_rebuild)
+    pipeline = ThreatIntelPipeline(db_path)
+    try:
+        assert pipeline.search_indicator('10.9.0.49') is not None
+        assert pipeline.search_indicator('10.0.1.1') is not None
+        assert pipeline.lookup.max_id == 550
+    finally:
+        pipeline.close()
+
+def test_filter_rebuilt_for_replaced_database(tmp_path):
+    db_path = str(tmp_path / 'ti.db')
+    pipeline = ThreatIntelPipeline(db_path)
+    pipeline.store_indicators(indicators(100))
+    assert pipeline.search_indicator('10.9.0.5') is None
+    pipeline.close()
+    saved = str(tmp_path / 'saved.bloom')
+    os.rename(db_path + threat_intel_pipeline.BLOOM_SUFFIX, saved)
+
+    # A recreated database reaches the old max id and row count with
+    # different rows, so only its identity tells the filter is stale
+    os.remove(db_path)
+    pipeline = ThreatIntelPipeline(db_path)
+    pipeline.store_indicators(indicators(100, prefix='10.9'))
+    pipeline.close()
+    os.replace(saved, db_path + threat_intel_pipeline.BLOOM_SUFFIX)
+    pipeline = ThreatIntelPipeline(db_path)
+    try:
+        assert pipeline.search_indicator('10.9.0.5') is not None
+        assert pipeline.lookup.rows == 100
+    finally:
+        pipeline.close()
+
+@pytest.mark.parametrize('prefilter', [False, True])
+def test_match_many(pipeline, prefilter):
+    pipeline.store_indicators(indicators(300))
+    observables = (value for i in range(1000)
+                   for value in (f'10.0.{i // 256}.{i % 256}', f'192.0.2.{i % 256}'))
+    hits = list(pipeline.match_many(observables, batch_size=128, prefilter=prefilter))
+    assert sorted(hit['indicator_value'] for hit in hits) == sorted(
+        f'10.0.{i // 256}.{i % 256}' for i in range(300))
+    assert all(hit['confidence'] == 70 for hit in hits)
+    assert list(pipeline.match_many(['10.0.0.1', '10.0.0.1'])) == [pipeline.search_indicator('10.0.0.1')]
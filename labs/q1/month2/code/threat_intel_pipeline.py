@@ -13,22 +13,490 @@ import requests
 import sqlite3
 import json
 import argparse
+import hashlib
+import math
+import os
+import struct
+import sys
+from collections import Counter, OrderedDict
 from datetime import datetime
+from itertools import islice
 import time
 
+# Bulk ingestion: rows written per transaction
+DEFAULT_BATCH_SIZE = 10000
+# Bulk matching: observables joined against the store per statement
+DEFAULT_MATCH_BATCH_SIZE = 50000
+
+INDICATOR_COLUMNS = ('indicator_type', 'indicator_value', 'description', 'threat_type',
+                     'malware_family', 'first_seen', 'last_seen', 'confidence', 'source')
+
+# Upsert: a re-sighted indicator keeps its row (id, first_seen,
+# created_at) and only updates last_seen, confidence and description.
+# INSERT OR REPLACE would delete and reinsert it instead.
+INSERT_INDICATOR_SQL = '''
+    INSERT INTO indicators 
+    (indicator_type, indicator_value, description, threat_type, 
+     malware_family, first_seen, last_seen, confidence, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(indicator_value) DO UPDATE SET
+        last_seen = MAX(COALESCE(last_seen, excluded.last_seen), excluded.last_seen),
+        confidence = excluded.confidence,
+        description = COALESCE(excluded.description, description)
+'''
+
+INSERT_PULSE_SQL = '''
+    INSERT OR REPLACE INTO pulses 
+    (pulse_id, name, description, author, created, modified, tags, "references")
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# PRAGMAs applied to every connection: WAL lets readers run alongside a
+# writer, synchronous=NORMAL is durable in WAL mode without an fsync per
+# commit, and reads go through a 256 MB memory map and a 64 MB page cache
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('mmap_size', 256 * 1024 * 1024),
+    ('cache_size', -64 * 1024),
+    ('temp_store', 'MEMORY'),
+)
+
+# Schema migrations: MIGRATIONS[n - 1] takes the database to version n
+# (PRAGMA user_version)
+MIGRATIONS = [
+    # 1: Tables
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS indicators (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            indicator_type TEXT NOT NULL,
+            indicator_value TEXT NOT NULL UNIQUE,
+            description TEXT,
+            threat_type TEXT,
+            malware_family TEXT,
+            first_seen TIMESTAMP,
+            last_seen TIMESTAMP,
+            confidence INTEGER,
+            source TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS pulses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pulse_id TEXT UNIQUE,
+            name TEXT,
+            description TEXT,
+            author TEXT,
+            created TIMESTAMP,
+            modified TIMESTAMP,
+            tags TEXT,
+            "references" TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ],
+    # 2: Indexes for query_indicators (type or source filter, newest
+    # first) and covering indexes for the per-type/per-source counts
+    [
+        'CREATE INDEX IF NOT EXISTS idx_indicators_type_last_seen '
+        'ON indicators (indicator_type, last_seen)',
+        'CREATE INDEX IF NOT EXISTS idx_indicators_source_last_seen '
+        'ON indicators (source, last_seen)',
+        'CREATE INDEX IF NOT EXISTS idx_indicators_last_seen '
+        'ON indicators (last_seen)',
+    ],
+    # 3: Random database identity, so a saved Bloom filter is never
+    # reused for a database that was replaced or recreated
+    [
+        'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)',
+        "INSERT OR IGNORE INTO meta VALUES ('database_id', lower(hex(randomblob(16))))",
+    ],
+]
+
+# Lookup layer in front of search_indicator: Bloom filter false positive
+# rate and minimum capacity, recent hits kept, and seconds between checks
+# for rows written by other connections
+BLOOM_ERROR_RATE = 0.01
+BLOOM_MIN_CAPACITY = 1000000
+DEFAULT_CACHE_SIZE = 10000
+LOOKUP_REFRESH_INTERVAL = 5.0
+BLOOM_SUFFIX = '.bloom'
+BLOOM_MAGIC = b'TIB2'
+# magic, hashes, bits, count, capacity, database id, max id, rows covered
+BLOOM_HEADER = struct.Struct('!4sBQQQ32sqq')
+BLOOM_DIGEST = struct.Struct('<QQ')
+
+def _timestamp(value, default):
+    """
+    Normalize a timestamp to SQLite's 'YYYY-MM-DD HH:MM:SS[.ffffff]' text form
+    
+    Args:
+        value: datetime, ISO 8601 string or None
+        default (str): Value to use when none is given
+    
+    Returns:
+        str: Timestamp text that sorts chronologically
+    """
+    if value is None:
+        return default
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return value
+    return value.isoformat(' ')
+
+def _indicator_row(record, now, source=None, description=None):
+    """
+    Build an indicators row from an indicator record
+    
+    Accepts OTX indicators ('type', 'indicator'), feed files ('type',
+    'value') and records keyed by column name.
+    
+    Args:
+        record (dict): Indicator record
+        now (str): Timestamp for missing first_seen/last_seen
+        source (str): Source when the record has none
+        description (str): Description when the record has none
+    
+    Returns:
+        tuple: Values in INDICATOR_COLUMNS order
+    """
+    indicator_type = record.get('indicator_type') or record.get('type')
+    first_seen = _timestamp(record.get('first_seen'), now)
+    return (
+        indicator_type,
+        record.get('indicator_value') or record.get('indicator') or record.get('value'),
+        record.get('description', description),
+        record.get('threat_type', indicator_type or 'unknown'),
+        record.get('malware_family'),
+        first_seen,
+        _timestamp(record.get('last_seen'), max(first_seen, now)),
+        record.get('confidence', 50),
+        record.get('source', source)
+    )
+
+def _chunks(iterable, size):
+    """Yield lists of up to size items from an iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def load_indicator_file(path):
+    """
+    Read indicator records from a JSON array or JSON Lines file
+    
+    JSON Lines files are streamed one record at a time, so they can be
+    larger than memory.
+    
+    Args:
+        path (str): Path to the file
+    
+    Yields:
+        dict: Indicator records
+    """
+    with open(path) as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == '[':
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+class BloomFilter:
+    """
+    Bloom filter over strings
+    
+    A negative answer is exact; a positive one is wrong with probability
+    about error_rate while no more than capacity values have been added.
+    Positions come from one 128-bit BLAKE2b digest split into two hashes
+    (Kirsch-Mitzenmacher double hashing).
+    """
+    
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        """
+        Args:
+            capacity (int): Number of values the error rate is sized for
+            error_rate (float): Target false positive rate
+        """
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, value):
+        """Bit positions of a value, generated lazily so misses can stop early"""
+        h1, h2 = BLOOM_DIGEST.unpack(hashlib.blake2b(value.encode(), digest_size=16).digest())
+        h2 |= 1
+        size = self.size
+        for _ in range(self.hashes):
+            yield h1 % size
+            h1 += h2
+    
+    def add(self, value):
+        """
+        Add a value
+        
+        Values that already appear to be present are not counted again,
+        so re-adding stored values does not fill the filter.
+        
+        Args:
+            value (str): Value to add
+        """
+        bits = self.bits
+        new = False
+        for position in self._positions(value):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        if new:
+            self.count += 1
+    
+    def __contains__(self, value):
+        bits = self.bits
+        for position in self._positions(value):
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False  # Most misses stop at the first or second bit
+        return True
+    
+    def save(self, f, database_id, max_id, rows):
+        """
+        Write the filter to a binary file object
+        
+        Args:
+            f: File object opened for writing in binary mode
+            database_id (str): Identity of the database it was built from
+            max_id (int): Highest indicators.id the filter covers
+            rows (int): Number of indicators with ids up to max_id
+        """
+        f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, self.hashes, self.size, self.count,
+                                  self.capacity, database_id.encode(), max_id, rows))
+        f.write(self.bits)
+    
+    @classmethod
+    def load(cls, f):
+        """
+        Read a filter written by save()
+        
+        Args:
+            f: File object opened for reading in binary mode
+        
+        Returns:
+            tuple: (BloomFilter, database id, highest indicators.id and
+                number of indicators it covers)
+        
+        Raises:
+            ValueError: If the file is not a complete filter
+        """
+        header = f.read(BLOOM_HEADER.size)
+        if len(header) < BLOOM_HEADER.size:
+            raise ValueError("truncated Bloom filter header")
+        (magic, hashes, size, count, capacity,
+         database_id, max_id, rows) = BLOOM_HEADER.unpack(header)
+        if magic != BLOOM_MAGIC:
+            raise ValueError("not a Bloom filter file")
+        bloom = cls.__new__(cls)
+        bloom.capacity, bloom.size, bloom.hashes, bloom.count = capacity, size, hashes, count
+        bloom.bits = bytearray(f.read())
+        if len(bloom.bits) != (size + 7) // 8:
+            raise ValueError("truncated Bloom filter")
+        return bloom, database_id.rstrip(b'\0').decode(), max_id, rows
+
+class IndicatorLookup:
+    """
+    Negative cache and hit cache for indicator lookups
+    
+    A Bloom filter of every indicator_value answers most misses without
+    touching SQLite, and an LRU cache holds recently found rows. Both are
+    kept current incrementally: stored indicators are added to the filter
+    and evicted from the cache, and rows written by other connections are
+    picked up by id every LOOKUP_REFRESH_INTERVAL seconds (the cache is
+    cleared when PRAGMA data_version shows another writer). The filter is
+    saved next to the database and caught up from its highest id on the
+    next start instead of being rebuilt. It is only reused when it was
+    built from the same database (meta.database_id) and that database
+    still holds the same number of rows up to that id.
+    """
+    
+    def __init__(self, conn, path=None, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Load the saved filter, or build one from the indicators table
+        
+        Args:
+            conn (sqlite3.Connection): Database connection
+            path (str): Filter file (None to keep it in memory only)
+            cache_size (int): Rows kept in the LRU cache
+        """
+        self.conn = conn
+        self.path = path
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.stats = Counter()
+        self.bloom = None
+        self.max_id = 0
+        self.rows = 0
+        self.dirty = False
+        self.database_id = conn.execute(
+            "SELECT value FROM meta WHERE key = 'database_id'").fetchone()[0]
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    bloom, database_id, max_id, rows = BloomFilter.load(f)
+            except (OSError, ValueError, struct.error) as e:
+                print(f"[-] Rebuilding indicator filter ({path}: {e})")
+            else:
+                if database_id == self.database_id and rows == self._rows(max_id):
+                    self.bloom, self.max_id, self.rows = bloom, max_id, rows
+                else:
+                    print(f"[-] Rebuilding indicator filter ({path} was built "
+                          f"from another database)")
+        self.data_version = self._data_version()
+        self.checked = time.monotonic()
+        if self.bloom is None or not self._catch_up():
+            self._rebuild()
+    
+    def _data_version(self):
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+    
+    def _rows(self, max_id):
+        return self.conn.execute('SELECT COUNT(*) FROM indicators WHERE id <= ?',
+                                 (max_id,)).fetchone()[0]
+    
+    def _rebuild(self):
+        """Build the filter from every stored indicator"""
+        rows = self.conn.execute('SELECT COUNT(*) FROM indicators').fetchone()[0]
+        self.bloom = BloomFilter(max(BLOOM_MIN_CAPACITY, 2 * rows))
+        self.max_id = 0
+        self.rows = 0
+        self._catch_up()
+    
+    def _catch_up(self):
+        """
+        Add indicators stored since the filter's highest id
+        
+        Returns:
+            bool: False if the filter no longer matches the database (it
+                covers ids the database does not have, or it is full) and
+                must be rebuilt
+        """
+        max_id = self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM indicators').fetchone()[0]
+        if max_id < self.max_id:
+            return False
+        if max_id > self.max_id:
+            for (value,) in self.conn.execute(
+                    'SELECT indicator_value FROM indicators WHERE id > ? AND id <= ?',
+                    (self.max_id, max_id)):
+                self.bloom.add(value)
+                self.rows += 1
+            self.max_id = max_id
+            self.dirty = True
+        return self.bloom.count <= self.bloom.capacity
+    
+    def refresh(self):
+        """Pick up rows written by other connections, at most every LOOKUP_REFRESH_INTERVAL"""
+        now = time.monotonic()
+        if now - self.checked < LOOKUP_REFRESH_INTERVAL:
+            return
+        self.checked = now
+        data_version = self._data_version()
+        if data_version != self.data_version:
+            self.data_version = data_version
+            self.cache.clear()
+            if not self._catch_up():
+                self._rebuild()
+    
+    def stored(self, values):
+        """
+        Record indicators this connection just stored
+        
+        Args:
+            values: Indicator values inserted or updated
+        """
+        cache = self.cache
+        for value in values:
+            self.bloom.add(value)
+            cache.pop(value, None)
+        self.dirty = True
+        if self.bloom.count > self.bloom.capacity:
+            self._rebuild()
+    
+    def get(self, value):
+        """
+        Look up a value in the caches
+        
+        Args:
+            value (str): Indicator value
+        
+        Returns:
+            tuple: (known, row): known is True when row is the answer
+                (None for a definite miss), False when the database must
+                be queried
+        """
+        self.refresh()
+        row = self.cache.get(value)
+        if row is not None:
+            self.cache.move_to_end(value)
+            self.stats['cache_hits'] += 1
+            return True, dict(row)
+        if value not in self.bloom:
+            self.stats['filtered'] += 1
+            return True, None
+        return False, None
+    
+    def put(self, value, row):
+        """
+        Remember the result of a database lookup
+        
+        Args:
+            value (str): Indicator value
+            row (dict): Indicator row, or None if the filter was wrong
+        """
+        self.stats['queries'] += 1
+        if row is None:
+            self.stats['false_positives'] += 1
+            return
+        self.cache[value] = dict(row)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+    
+    def save(self):
+        """Write the filter to disk if it changed (atomically, via a temporary file)"""
+        if self.path is None or not self.dirty:
+            return
+        self._catch_up()
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            self.bloom.save(f, self.database_id, self.max_id, self.rows)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
 class ThreatIntelPipeline:
     """Threat Intelligence Data Pipeline"""
     
-    def __init__(self, db_path='threat_intel.db'):
+    def __init__(self, db_path='threat_intel.db', cache_size=DEFAULT_CACHE_SIZE):
         """
         Initialize the pipeline
         
         Args:
             db_path (str): Path to SQLite database
+            cache_size (int): Indicator rows kept in the lookup cache
         """
         self.db_path = db_path
         self.conn = None
         self.cursor = None
+        self.cache_size = cache_size
+        self.lookup = None  # IndicatorLookup, loaded on the first search
         self.init_database()
     
     def init_database(self):
@@ -36,42 +504,33 @@ class ThreatIntelPipeline:
         print("[*] Initializing database...")
         self.conn = sqlite3.connect(self.db_path)
         self.cursor = self.conn.cursor()
+        for name, value in SQLITE_PRAGMAS:
+            self.cursor.execute(f'PRAGMA {name} = {value}')
+        self._migrate()
+        print("[+] Database initialized")
+    
+    def _migrate(self):
+        """
+        Bring the schema up to date
         
-        # Create indicators table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS indicators (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                indicator_type TEXT NOT NULL,
-                indicator_value TEXT NOT NULL UNIQUE,
-                description TEXT,
-                threat_type TEXT,
-                malware_family TEXT,
-                first_seen TIMESTAMP,
-                last_seen TIMESTAMP,
-                confidence INTEGER,
-                source TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create pulses table (for OTX pulses)
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS pulses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pulse_id TEXT UNIQUE,
-                name TEXT,
-                description TEXT,
-                author TEXT,
-                created TIMESTAMP,
-                modified TIMESTAMP,
-                tags TEXT,
-                references TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
+        The schema version is kept in PRAGMA user_version; every migration
+        after it runs in its own transaction. Databases created before
+        versioning (version 0) already have the tables, which the first
+        migration creates only if missing. Statistics are refreshed with
+        ANALYZE afterwards so the planner picks the new indexes.
+        """
+        version = self.cursor.execute('PRAGMA user_version').fetchone()[0]
+        if version >= len(MIGRATIONS):
+            return
+        for number, statements in enumerate(MIGRATIONS[version:], version + 1):
+            print(f"[*] Migrating database schema to version {number}")
+            with self.conn:
+                self.cursor.execute('BEGIN')
+                for statement in statements:
+                    self.cursor.execute(statement)
+                self.cursor.execute(f'PRAGMA user_version = {number}')
+        self.cursor.execute('ANALYZE')
         self.conn.commit()
-        print("[+] Database initialized")
     
     def collect_from_otx(self, api_key=None, pulse_count=10):
         """
@@ -100,18 +559,8 @@ class ThreatIntelPipeline:
             
             sample_pulses = self._generate_sample_otx_data(pulse_count)
             
-            for pulse in sample_pulses:
-                self._store_pulse(pulse)
-                
-                # Extract and store indicators
-                for indicator in pulse.get('indicators', []):
-                    self._store_indicator(
-                        indicator_type=indicator['type'],
-                        indicator_value=indicator['indicator'],
-                        description=pulse['name'],
-                        threat_type=indicator.get('type', 'unknown'),
-                        source='OTX'
-                    )
+            # Store pulses and their indicators in bulk
+            self.store_pulses(sample_pulses, source='OTX')
             
             print(f"[+] Successfully collected {len(sample_pulses)} pulses")
             
@@ -147,81 +596,148 @@ class ThreatIntelPipeline:
         
         return sample_pulses
     
+    @staticmethod
+    def _pulse_row(pulse):
+        """Build a pulses row from an OTX pulse"""
+        return (
+            pulse['id'],
+            pulse['name'],
+            pulse['description'],
+            pulse['author'],
+            pulse['created'],
+            pulse['modified'],
+            json.dumps(pulse['tags']),
+            json.dumps(pulse['references'])
+        )
+    
+    def _report(self, what, rows, elapsed):
+        """Print the ingestion rate"""
+        rate = rows / elapsed if elapsed > 0 else float('inf')
+        print(f"[+] Stored {rows} {what} in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+    
+    def store_indicators(self, indicators, source=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Store many indicators with one transaction per batch
+        
+        Args:
+            indicators: Iterable of indicator records (see _indicator_row);
+                consumed lazily, so it can be a generator over a large feed
+            source (str): Source for records that have none
+            batch_size (int): Rows written per transaction
+        
+        Returns:
+            int: Number of indicator rows written
+        """
+        start = time.perf_counter()
+        rows = 0
+        for chunk in _chunks(indicators, batch_size):
+            now = datetime.now().isoformat(' ')
+            chunk = [_indicator_row(record, now, source) for record in chunk]
+            with self.conn:
+                self.conn.executemany(INSERT_INDICATOR_SQL, chunk)
+            self._stored(chunk)
+            rows += len(chunk)
+        self._report('indicators', rows, time.perf_counter() - start)
+        return rows
+    
+    def store_pulses(self, pulses, source=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Store many pulses and their indicators with one transaction per batch
+        
+        Args:
+            pulses: Iterable of OTX pulses, consumed lazily
+            source (str): Source of the pulses' indicators
+            batch_size (int): Pulses written per transaction
+        
+        Returns:
+            tuple: (pulse rows, indicator rows) written
+        """
+        start = time.perf_counter()
+        pulse_rows = indicator_rows = 0
+        for chunk in _chunks(pulses, batch_size):
+            now = datetime.now().isoformat(' ')
+            indicators = [_indicator_row(indicator, now, source, pulse['name'])
+                          for pulse in chunk for indicator in pulse.get('indicators', [])]
+            with self.conn:
+                self.conn.executemany(INSERT_PULSE_SQL, [self._pulse_row(pulse) for pulse in chunk])
+                self.conn.executemany(INSERT_INDICATOR_SQL, indicators)
+            self._stored(indicators)
+            pulse_rows += len(chunk)
+            indicator_rows += len(indicators)
+        self._report('pulses and indicators', pulse_rows + indicator_rows,
+                     time.perf_counter() - start)
+        return pulse_rows, indicator_rows
+    
+    def _stored(self, rows):
+        """Update the lookup layer, if loaded, for stored indicator rows"""
+        if self.lookup is not None:
+            self.lookup.stored(row[1] for row in rows)
+    
+    def _lookup(self):
+        """Lookup layer for search_indicator, loaded or built on first use"""
+        if self.lookup is None:
+            path = None if self.db_path == ':memory:' else self.db_path + BLOOM_SUFFIX
+            self.lookup = IndicatorLookup(self.conn, path, self.cache_size)
+        return self.lookup
+    
     def _store_pulse(self, pulse):
         """Store pulse in database"""
         try:
-            self.cursor.execute('''
-                INSERT OR REPLACE INTO pulses 
-                (pulse_id, name, description, author, created, modified, tags, references)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                pulse['id'],
-                pulse['name'],
-                pulse['description'],
-                pulse['author'],
-                pulse['created'],
-                pulse['modified'],
-                json.dumps(pulse['tags']),
-                json.dumps(pulse['references'])
-            ))
+            self.cursor.execute(INSERT_PULSE_SQL, self._pulse_row(pulse))
             self.conn.commit()
         except sqlite3.IntegrityError:
             pass  # Pulse already exists
     
     def _store_indicator(self, indicator_type, indicator_value, description=None, 
                         threat_type=None, malware_family=None, source=None, confidence=50):
-        """Store indicator in database"""
-        try:
-            self.cursor.execute('''
-                INSERT OR REPLACE INTO indicators 
-                (indicator_type, indicator_value, description, threat_type, 
-                 malware_family, first_seen, last_seen, confidence, source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                indicator_type,
-                indicator_value,
-                description,
-                threat_type,
-                malware_family,
-                datetime.now(),
-                datetime.now(),
-                confidence,
-                source
-            ))
-            self.conn.commit()
-        except sqlite3.IntegrityError:
-            # Update last_seen if indicator exists
-            self.cursor.execute('''
-                UPDATE indicators 
-                SET last_seen = ?, description = COALESCE(?, description)
-                WHERE indicator_value = ?
-            ''', (datetime.now(), description, indicator_value))
-            self.conn.commit()
+        """
+        Store indicator in database, or record a new sighting of it
+        
+        Use store_indicators for many indicators.
+        """
+        now = datetime.now().isoformat(' ')
+        self.cursor.execute(INSERT_INDICATOR_SQL, (
+            indicator_type,
+            indicator_value,
+            description,
+            threat_type,
+            malware_family,
+            now,
+            now,
+            confidence,
+            source
+        ))
+        self.conn.commit()
+        if self.lookup is not None:
+            self.lookup.stored([indicator_value])
     
-    def query_indicators(self, indicator_type=None, limit=100):
+    def query_indicators(self, indicator_type=None, limit=100, source=None):
         """
-        Query indicators from database
+        Query indicators from database, newest sighting first
         
         Args:
             indicator_type (str): Filter by indicator type
             limit (int): Maximum number of results
+            source (str): Filter by source (combined with indicator_type)
         
         Returns:
             list: List of indicators
         """
+        conditions = []
+        params = []
         if indicator_type:
-            self.cursor.execute('''
-                SELECT * FROM indicators 
-                WHERE indicator_type = ? 
-                ORDER BY last_seen DESC 
-                LIMIT ?
-            ''', (indicator_type, limit))
-        else:
-            self.cursor.execute('''
-                SELECT * FROM indicators 
-                ORDER BY last_seen DESC 
-                LIMIT ?
-            ''', (limit,))
+            conditions.append('indicator_type = ?')
+            params.append(indicator_type)
+        if source:
+            conditions.append('source = ?')
+            params.append(source)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        self.cursor.execute(f'''
+            SELECT * FROM indicators 
+            {where}
+            ORDER BY last_seen DESC 
+            LIMIT ?
+        ''', params + [limit])
         
         columns = [desc[0] for desc in self.cursor.description]
         results = []
@@ -234,12 +750,20 @@ class ThreatIntelPipeline:
         """
         Search for a specific indicator
         
+        Most misses are answered by the Bloom filter and repeated hits by
+        the LRU cache without a query (see IndicatorLookup).
+        
         Args:
             indicator_value (str): Indicator to search for
         
         Returns:
             dict: Indicator details or None
         """
+        lookup = self._lookup()
+        known, result = lookup.get(indicator_value)
+        if known:
+            return result
+        
         self.cursor.execute('''
             SELECT * FROM indicators WHERE indicator_value = ?
         ''', (indicator_value,))
@@ -247,8 +771,56 @@ class ThreatIntelPipeline:
         row = self.cursor.fetchone()
         if row:
             columns = [desc[0] for desc in self.cursor.description]
-            return dict(zip(columns, row))
-        return None
+            result = dict(zip(columns, row))
+        lookup.put(indicator_value, result)
+        return result
+    
+    def match_many(self, observables, batch_size=DEFAULT_MATCH_BATCH_SIZE, prefilter=False):
+        """
+        Match a stream of observables against the indicator store
+        
+        Observables are read in batches; each batch is loaded into a
+        temporary table and joined against indicators in one statement.
+        Memory use is bounded by the batch size, so the input can be a
+        generator over files larger than memory.
+        
+        Args:
+            observables: Iterable of values (IPs, domains, URLs, hashes)
+            batch_size (int): Observables joined per statement
+            prefilter (bool): Drop definite misses with the lookup Bloom
+                filter before they reach SQLite. Worth it when the store is
+                much larger than the page cache; on a cached store the join
+                alone is as fast
+        
+        Yields:
+            dict: Indicator rows of the matching observables, once per batch
+                an observable appears in
+        """
+        lookup = self._lookup() if prefilter else None
+        self.cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS match_batch (
+                value TEXT PRIMARY KEY
+            ) WITHOUT ROWID
+        ''')
+        for chunk in _chunks(observables, batch_size):
+            if lookup is not None:
+                lookup.refresh()
+                bloom = lookup.bloom
+                chunk = [value for value in chunk if value in bloom]
+                if not chunk:
+                    continue
+            with self.conn:
+                self.cursor.executemany('INSERT OR IGNORE INTO match_batch VALUES (?)',
+                                        ((value,) for value in chunk))
+                self.cursor.execute('''
+                    SELECT indicators.* FROM match_batch
+                    JOIN indicators ON indicators.indicator_value = match_batch.value
+                ''')
+                columns = [desc[0] for desc in self.cursor.description]
+                rows = self.cursor.fetchall()
+                self.cursor.execute('DELETE FROM match_batch')
+            for row in rows:
+                yield dict(zip(columns, row))
     
     def get_statistics(self):
         """Get statistics about the threat intelligence database"""
@@ -266,6 +838,14 @@ class ThreatIntelPipeline:
         ''')
         stats['by_type'] = dict(self.cursor.fetchall())
         
+        # Indicators by source
+        self.cursor.execute('''
+            SELECT source, COUNT(*) as count 
+            FROM indicators 
+            GROUP BY source
+        ''')
+        stats['by_source'] = dict(self.cursor.fetchall())
+        
         # Total pulses
         self.cursor.execute('SELECT COUNT(*) FROM pulses')
         stats['total_pulses'] = self.cursor.fetchone()[0]
@@ -273,8 +853,11 @@ class ThreatIntelPipeline:
         return stats
     
     def close(self):
-        """Close database connection"""
+        """Close database connection, refreshing planner statistics if needed"""
         if self.conn:
+            if self.lookup is not None:
+                self.lookup.save()
+            self.conn.execute('PRAGMA optimize')
             self.conn.close()
 
 def main():
@@ -296,6 +879,12 @@ Examples:
   # Search for specific indicator
   python threat_intel_pipeline.py --search 192.0.2.1
   
+  # Bulk-load indicators from a JSON or JSON Lines feed file
+  python threat_intel_pipeline.py --import ../data/sample_indicators.json
+  
+  # Match a file of observables (one per line, - for stdin) against the store
+  python threat_intel_pipeline.py --match observables.txt
+  
   # Get statistics
   python threat_intel_pipeline.py --stats
         """
@@ -309,11 +898,17 @@ Examples:
                        help='Threat intelligence source')
     parser.add_argument('--count', type=int, default=10,
                        help='Number of items to collect')
+    parser.add_argument('--import', dest='import_file', metavar='FILE',
+                       help='Bulk-load indicators from a JSON array or JSON Lines file')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                       help=f'Rows written per transaction when loading (default: {DEFAULT_BATCH_SIZE})')
     parser.add_argument('--query', action='store_true',
                        help='Query indicators')
     parser.add_argument('--type', help='Filter by indicator type')
     parser.add_argument('--search', metavar='INDICATOR',
                        help='Search for specific indicator')
+    parser.add_argument('--match', metavar='FILE',
+                       help='Match observables from a file (one per line, - for stdin)')
     parser.add_argument('--stats', action='store_true',
                        help='Show statistics')
     parser.add_argument('--api-key', help='API key for threat intelligence source')
@@ -328,6 +923,12 @@ Examples:
             if args.source == 'otx':
                 pipeline.collect_from_otx(args.api_key, args.count)
         
+        elif args.import_file:
+            print(f"[*] Loading indicators from {args.import_file}...")
+            pipeline.store_indicators(load_indicator_file(args.import_file),
+                                      source=os.path.basename(args.import_file),
+                                      batch_size=args.batch_size)
+        
         elif args.query:
             indicators = pipeline.query_indicators(args.type, limit=50)
             print(f"\n[+] Found {len(indicators)} indicators")
@@ -345,6 +946,21 @@ Examples:
             else:
                 print(f"\n[-] Indicator not found: {args.search}")
         
+        elif args.match:
+            f = sys.stdin if args.match == '-' else open(args.match)
+            try:
+                start = time.perf_counter()
+                observables = (line.strip() for line in f)
+                hits = 0
+                for hit in pipeline.match_many(value for value in observables if value):
+                    hits += 1
+                    print(f"[+] {hit['indicator_value']}\t{hit['indicator_type']}\t"
+                          f"{hit['threat_type']}\t{hit['source']}")
+                print(f"\n[+] {hits} matches in {time.perf_counter() - start:.2f}s")
+            finally:
+                if f is not sys.stdin:
+                    f.close()
+        
         elif args.stats:
             stats = pipeline.get_statistics()
             print("\n" + "=" * 60)
@@ -355,6 +971,9 @@ Examples:
             print("\nIndicators by Type:")
             for itype, count in stats['by_type'].items():
                 print(f"  {itype}: {count}")
+            print("\nIndicators by Source:")
+            for source, count in stats['by_source'].items():
+                print(f"  {source}: {count}")
         
         else:
             parser.print_help()